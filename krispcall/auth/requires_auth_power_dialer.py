@@ -9,7 +9,14 @@ from typing import Any, Callable, List
 from krispcall.auth.enums import AuthFeatureEnum
 from krispcall.common.error_handler.parse_error_response import create_error_response
 from krispcall.common.error_handler.translator import get_translator
-from krispcall.providers.foundation_provider import get_workspace_feature
+from krispcall.providers.foundation_provider import (
+    get_workspace_feature,
+    invalidate_workspace_feature,
+)
+
+
+def _is_enabled(feature) -> bool:
+    return bool(feature and feature.get("is_enabled", False))
 
 
 def requires_power_dialer_enabled(func: Callable):
@@ -23,7 +30,16 @@ def requires_power_dialer_enabled(func: Callable):
             workspace_id=workspace_id,
             feature_name=AuthFeatureEnum.POWER_DIALER.value,
         )
-        if power_dialer_feature and power_dialer_feature.get("is_enabled", False):
+        if not _is_enabled(power_dialer_feature):
+            # the feature may have been enabled since it was cached
+            await invalidate_workspace_feature(
+                workspace_id, AuthFeatureEnum.POWER_DIALER.value
+            )
+            power_dialer_feature = await get_workspace_feature(
+                workspace_id=workspace_id,
+                feature_name=AuthFeatureEnum.POWER_DIALER.value,
+            )
+        if _is_enabled(power_dialer_feature):
             return await func(*args, **kwargs)
 
         return create_error_response(
@@ -172,6 +172,9 @@ campaigns_campaigns = sa.Table(
         "contact_list_id", postgresql.UUID(as_uuid=False), nullable=False
     ),
     sa.Column("next_number_to_dial", sa.String(255), nullable=True),
+    sa.Column(
+        "lines_per_agent", sa.Integer(), nullable=False, server_default="1"
+    ),
     sa.Column("created_by", postgresql.UUID(as_uuid=False), nullable=False),
     sa.Column("modified_by", postgresql.UUID(as_uuid=False), nullable=False),
     sa.Column(
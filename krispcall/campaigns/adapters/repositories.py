@@ -5,8 +5,8 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from sqlalchemy.dialects import postgresql
-from sqlalchemy import select
+from sqlalchemy import func
+from krispcall.common.database.bulk import copy_records
 from krispcall.common.database.connection import DbConnection
 from krispcall.campaigns.domain import models
 from krispcall.campaigns.adapters.orm import (
@@ -19,7 +19,7 @@ from krispcall.campaigns.adapters.orm import (
     campaign_stats,
 )
 
-from typing import List
+from typing import Dict, List
 
 
 class CampaignContactListRepository:
@@ -74,6 +74,16 @@ class CampaignContactListRepository:
             query=campaign_contact_list_detail.insert(), values=values
         )
 
+    async def update_contact_count(
+        self, ref: UUID, contact_count: int, principal: UUID
+    ):
+        await self.db.execute(
+            query=campaign_contact_list_mast.update().where(
+                campaign_contact_list_mast.c.id == ref
+            ),
+            values={"contact_count": str(contact_count), "modified_by": principal},
+        )
+
     async def update_contact_mast(self, model: models.CampaignContactListMast):
         values = {
             "name": model.name,
@@ -91,14 +101,13 @@ class CampaignContactListRepository:
         )
 
     async def upload_contact_in_bulk(self, records: List[dict]):
-        """Bulk insert of contacts, doesn't need custom query because fields are same as table columns"""
-        insert_stmt = postgresql.insert(campaign_contact_list_detail).values(
-            records
-        )  # noqa
-
-        await self.db.execute(
-            query=insert_stmt.on_conflict_do_nothing()
-        )  # noqa
+        """Bulk insert of contacts through COPY, doesn't need custom query because fields are same as table columns"""
+        await copy_records(
+            self.db,
+            campaign_contact_list_detail,
+            records,
+            on_conflict_do_nothing=True,
+        )
 
     async def delete_contacts(self, contacts):
         return await self.db.execute(
@@ -107,6 +116,19 @@ class CampaignContactListRepository:
             )
         )
 
+    async def delete_contact_list(self, ref: UUID):
+        """Deletes the list with its contacts"""
+        await self.db.execute(
+            query=campaign_contact_list_detail.delete().where(
+                campaign_contact_list_detail.c.contact_list_id == ref,
+            )
+        )
+        await self.db.execute(
+            query=campaign_contact_list_mast.delete().where(
+                campaign_contact_list_mast.c.id == ref,
+            )
+        )
+
 
 class CampaignVoicemailRepository:
     def __init__(self, db: DbConnection):
@@ -300,6 +322,7 @@ class CampaignsRepository:
             created_by=record["created_by"],
             modified_by=record["modified_by"],
             callable_data=record["callable_data"],
+            lines_per_agent=record["lines_per_agent"],
         )
 
     async def add(self, model: models.Campaigns, principal: UUID):
@@ -330,6 +353,7 @@ class CampaignsRepository:
             "created_by": principal,
             "modified_by": principal,
             "callable_data": model.callable_data,
+            "lines_per_agent": model.lines_per_agent,
         }
         await self.db.execute(
             query=campaigns_campaigns.insert(), values=values
@@ -361,6 +385,7 @@ class CampaignsRepository:
             "contact_list_id": model.contact_list_id,
             "next_number_to_dial": model.next_number_to_dial,
             "is_archived": model.is_archived,
+            "lines_per_agent": model.lines_per_agent,
             "created_by": created_by,
             "modified_by": principal,
         }
@@ -396,29 +421,31 @@ class CampaignStatRepository:
     async def update(
         self, model: models.CampaignStats, field: str, value: int
     ) -> models.CampaignStats:
-        async with self.db.connection() as connection:
-            async with connection.transaction():
-                connection = self.db
-
-                await connection.execute(
-                    select([campaign_stats.c.id])
-                    .where(campaign_stats.c.id == model.id_)
-                    .with_for_update()
-                )
-                record = await self.db.fetch_one(
-                    query=campaign_stats.select().where(
-                        campaign_stats.c.id == model.id_
-                    )
-                )
-                # model = model.update({field: record[field] + value})
-                query = (
-                    campaign_stats.update()
-                    .values(**{field: record[field] + value})
-                    .where(campaign_stats.c.id == model.id_)
-                )
-                await self.db.execute(query=query)
+        await self.increment(model.campaign_id, field, value)
         return model
 
+    async def increment(self, ref: UUID, field: str, value: int) -> None:
+        """Adds value to a counter of the campaign stats in one statement"""
+        await self.increment_many(ref, {field: value})
+
+    async def increment_many(self, ref: UUID, increments: Dict[str, int]) -> None:
+        """Adds to several counters of the campaign stats in one statement,
+        the row lock is held only for the duration of the UPDATE itself
+        """
+        values = {
+            field: func.coalesce(campaign_stats.c[field], 0) + value
+            for field, value in increments.items()
+            if value
+        }
+        if not values:
+            return
+        query = (
+            campaign_stats.update()
+            .values(values)
+            .where(campaign_stats.c.campaign_id == ref)
+        )
+        await self.db.execute(query=query)
+
     async def add(self, model: models.CampaignStats) -> models.CampaignStats:
         query = campaign_stats.insert().values(
             id=model.id_,
@@ -0,0 +1,61 @@
+"""
+Redis side accumulator for campaign stats counters.
+
+Increments are added to a per campaign redis hash and the worker periodically
+moves the accumulated totals to campaign_stats with one UPDATE per campaign.
+"""
+from __future__ import annotations
+
+import typing
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+DIRTY_CAMPAIGNS_KEY = "campaign_stats:dirty"
+
+
+def _decode(value: typing.Union[bytes, str]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class CampaignStatCounter:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    @staticmethod
+    def pending_key(campaign_id: str) -> str:
+        return f"campaign_stats:pending:{campaign_id}"
+
+    async def increment(
+        self, campaign_id: typing.Union[UUID, str], field: str, value: int
+    ) -> None:
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hincrby(self.pending_key(str(campaign_id)), field, value)
+            pipe.sadd(DIRTY_CAMPAIGNS_KEY, str(campaign_id))
+            await pipe.execute()
+
+    async def take_pending(
+        self,
+    ) -> typing.Dict[str, typing.Dict[str, int]]:
+        """Removes and returns the accumulated increments of every campaign"""
+        pending: typing.Dict[str, typing.Dict[str, int]] = {}
+        while True:
+            campaign_id = await self.cache.spop(DIRTY_CAMPAIGNS_KEY)
+            if campaign_id is None:
+                return pending
+            campaign_id = _decode(campaign_id)
+            async with self.cache.pipeline(transaction=True) as pipe:
+                pipe.hgetall(self.pending_key(campaign_id))
+                pipe.delete(self.pending_key(campaign_id))
+                counters, _ = await pipe.execute()
+            if counters:
+                pending[campaign_id] = {
+                    _decode(field): int(value) for field, value in counters.items()
+                }
+
+    async def restore(
+        self, campaign_id: str, increments: typing.Dict[str, int]
+    ) -> None:
+        """Adds back increments that could not be written to the database"""
+        for field, value in increments.items():
+            await self.increment(campaign_id, field, value)
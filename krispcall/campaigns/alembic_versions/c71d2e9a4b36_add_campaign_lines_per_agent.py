@@ -0,0 +1,32 @@
+"""Add campaign lines_per_agent
+
+Revision ID: c71d2e9a4b36
+Revises: 5aa35ee08e27
+Create Date: 2026-10-18 14:05:12.204711
+
+"""
+# pylint: disable=invalid-name, no-member, missing-function-docstring
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c71d2e9a4b36"
+down_revision = "5aa35ee08e27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 1 keeps the one contact per agent dialing of existing campaigns
+    op.add_column(
+        "campaigns",
+        sa.Column(
+            "lines_per_agent", sa.Integer(), nullable=False, server_default="1"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("campaigns", "lines_per_agent")
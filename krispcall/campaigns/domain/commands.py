@@ -210,6 +210,7 @@ class AddCampaigns(Command):
     cooloff_period_enabled: bool = False
     voicemail_enabled: bool = False
     call_script_enabled: bool = False
+    lines_per_agent: int = 1
 
 
 @dataclass
@@ -249,6 +250,7 @@ class UpdateCampaignCommand(CampaignsCommand):
     is_archived: bool
     next_number_to_dial: str
     modified_by: UUID
+    lines_per_agent: int = 1
 
 
 @dataclass
@@ -48,6 +48,7 @@ class Campaigns(BaseEntity):
     next_number_to_dial: typing.Optional[str]
     is_archived: bool
     callable_data: typing.Dict = None # type: ignore
+    lines_per_agent: int = 1
 
     def update(self, mapping: typing.Dict[str, typing.Any]):
         return self.copy(update=mapping)
@@ -257,6 +258,7 @@ def campaigns_factory(
     is_archived: bool,
     dialing_number_id: UUID,
     callable_data: typing.Dict = None, # type: ignore
+    lines_per_agent: int = 1,
 ) -> Campaigns:
     return Campaigns(
         id_=uuid4(),
@@ -283,6 +285,7 @@ def campaigns_factory(
         created_by_name=created_by_name,
         dialing_number_id=dialing_number_id,
         callable_data=callable_data,
+        lines_per_agent=lines_per_agent,
     )
 
 
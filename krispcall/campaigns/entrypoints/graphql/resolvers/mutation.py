@@ -1,10 +1,8 @@
 import json
-import copy
 import io
 from typing import Any, Dict
 from aiobotocore import session
 from uuid import uuid4
-from redis import Redis
 from krispcall.auth.constant import AUTHENTICATED_ACCESS_USER
 
 from krispcall.auth.requires_auth_power_dialer import (
@@ -17,7 +15,10 @@ from graphql.type.definition import GraphQLResolveInfo
 from pydantic import ValidationError
 from krispcall.campaigns.service_layer.exceptions import CampaignAlreadyEnded, CampaignAlreadyPaused
 from krispcall.common.bootstrap import JobQueue
-from krispcall.common.services.file_storage.csv_file_helper import process_contacts_csv
+from krispcall.common.services.file_storage.csv_file_helper import (
+    process_contacts_csv,
+    stream_contacts_csv,
+)
 from krispcall.common.error_handler.exceptions import CSVProcessingError
 from krispcall.common.error_handler.parse_error_response import create_error_response
 from krispcall.common.services.file_storage.file_services import upload_file_to_s3
@@ -27,7 +28,7 @@ from krispcall.common.error_handler.translator import get_translator
 from krispcall.konference.service_layer.exceptions import ContactNotFoundException
 from krispcall.twilio.utils import TwilioClient
 from krispcall.common.database.connection import DbConnection
-from krispcall.common.configs.request_helpers import get_database
+from krispcall.common.configs.request_helpers import get_cache, get_database
 
 
 from krispcall.common.services import status as status
@@ -49,7 +50,8 @@ from krispcall.twilio.utils import sub_client
 from krispcall.auth.requires_auth_power_dialer import (
     requires_power_dialer_enabled,
 )
-from krispcall.konference.adapters.provider import get_workspace_credit
+from krispcall.konference.billing.ledger import CreditLedger
+from krispcall.konference.adapters.state_store import CampaignStateStore
 from krispcall.konference.billing.billing_service import BillingService
 from krispcall.campaigns.service_layer import abstracts, views
 from krispcall.campaigns import services
@@ -71,26 +73,32 @@ async def resolve_create_contact_list_with_csv(
         if not skip_csv_upload:
             # TODO harris
             csv_file = data.get("file")
-            all_contacts = await process_contacts_csv(
+            contact_batches = await stream_contacts_csv(
                 csv_file=csv_file,
                 contact_name_column="Contact Name",
                 usecols=["Contact Name", "Phone Number"],
             )
-            total_records = len(all_contacts)
-
-            await services.upload_campaign_contact_list(
+            # contacts are streamed into the list, so create it empty first
+            contact_mast_id = await services.upload_campaign_contact_list(
                 workspace_id=workspace_id,
                 contact_list_name=data.get("contact_list_name"),
                 created_by_name=data.get("created_by_name"),
                 is_list_hidden=data.get("is_contact_list_hidden"),
-                skip_csv_upload=skip_csv_upload,
+                skip_csv_upload=True,
                 user=user.id_,
                 member=member_id,
-                contact_data=all_contacts,
-                contact_count=total_records,
+                contact_data=[],
+                contact_count=0,
                 db_conn=db_conn,
                 job_queue=request.app.state.queue,
             )
+            total_records = await services.import_new_contact_list_csv(
+                member=member_id,
+                user=user.id_,
+                contact_list_id=contact_mast_id,
+                contact_batches=contact_batches,
+                db_conn=db_conn,
+            )
         else:
             await services.upload_campaign_contact_list(
                 workspace_id=workspace_id,
@@ -243,18 +251,16 @@ async def resolve_upload_contact_detail_csv(
     contact_list_id = ShortId(data.get("contact_list_id")).uuid()
     try:
         csv_file = data.get("file")
-        all_contacts = await process_contacts_csv(
+        contact_batches = await stream_contacts_csv(
             csv_file=csv_file,
             contact_name_column="Contact Name",
             usecols=["Contact Name", "Phone Number"],
         )
-        total_records = len(all_contacts)
-        await services.upload_contact_detail_csv(
+        total_records = await services.import_contact_list_csv(
             member=member_id,
             user=user,
-            contact_data=all_contacts,
-            total_records=total_records,
             contact_list_id=contact_list_id,
+            contact_batches=contact_batches,
             db_conn=db_conn,
         )
         return {
@@ -611,25 +617,31 @@ async def resolve_update_campaign(
     try:
         if not skip_csv_upload:
             csv_file = data.get("file")
-            all_contacts = await process_contacts_csv(
+            contact_batches = await stream_contacts_csv(
                 csv_file=csv_file,
                 contact_name_column="Contact Name",
                 usecols=["Contact Name", "Phone Number"],
             )
-            total_records = len(all_contacts)
             contact_mast_id = await services.upload_campaign_contact_list(
                 workspace_id=workspace_id,
                 contact_list_name=csv_file.file_name,
                 created_by_name=validated_data.created_by_name,
                 is_list_hidden=data.get("is_contact_list_hidden"),
-                skip_csv_upload=skip_csv_upload,
+                skip_csv_upload=True,
                 user=user.id_,
                 member=member_id,
-                contact_data=all_contacts,
-                contact_count=total_records,
+                contact_data=[],
+                contact_count=0,
                 db_conn=db_conn,
                 job_queue=request.app.state.queue,
             )
+            await services.import_new_contact_list_csv(
+                member=member_id,
+                user=user.id_,
+                contact_list_id=contact_mast_id,
+                contact_batches=contact_batches,
+                db_conn=db_conn,
+            )
             await services.update_campaign(
                 validated_data=validated_data,
                 workspace_id=workspace_id,
@@ -682,13 +694,12 @@ async def resolve_hold_campaign_conversation(
 ):
     request = info.context["request"]
     workspace = request.user.get_claim("workspace_id", ShortId).uuid()
-    settings = request.app.state.settings
-    cache = Redis.from_url(settings.redis_settings)
+    cache = get_cache(request)
     try:
         validated_data = abstracts.HoldCampaignConversation(**data)
 
         # get active conversation from cache
-        conversation = cache.get(
+        conversation = await cache.get(
             ShortId.with_uuid(validated_data.conversation_sid)
         )
         if not conversation:
@@ -783,7 +794,7 @@ async def resolve_skip_campaign_conversation(
     request = info.context["request"]
     user = request.user
     db_conn: DbConnection = request.app.state.db
-    cache = Redis.from_url(request.app.state.settings.redis_settings)
+    cache = get_cache(request)
     try:
         # do stuff
         validated_data = abstracts.SkipCampaignConversation(**data)
@@ -793,22 +804,18 @@ async def resolve_skip_campaign_conversation(
             db_conn=db_conn,
         )
         resp = {}
-        values = cache.get(ShortId.with_uuid(validated_data.campaign_id)) or {}
-        camp_obj = json.loads(values)
+        state_store = CampaignStateStore(cache)
         if next_in_seq:
             # if skipping is successful we'll change
             # the cache value of next number to dial
             # to the next in sequence contact number
             # TODO: Abstract and move this to helper services
-            camp_obj.update(
+            await state_store.update(
+                ShortId.with_uuid(validated_data.campaign_id),
                 {
                     "next_number_to_dial": next_in_seq.get("contact_number"),
                     "current_call_seq": next_in_seq.get("sequence_number"),
-                }
-            )
-            cache.set(
-                ShortId.with_uuid(validated_data.campaign_id),
-                json.dumps(camp_obj),
+                },
             )
 
             resp = {
@@ -816,12 +823,9 @@ async def resolve_skip_campaign_conversation(
                 "contact_number": next_in_seq.get("contact_number"),
             }
         if not next_in_seq:
-            camp_obj.update(
-                {"next_number_to_dial": None, "current_call_seq": None}
-            )
-            cache.set(
+            await state_store.update(
                 ShortId.with_uuid(validated_data.campaign_id),
-                json.dumps(camp_obj),
+                {"next_number_to_dial": None, "current_call_seq": None},
             )
         return {
             "status": 200,
@@ -837,6 +841,34 @@ async def resolve_skip_campaign_conversation(
         )
 
 
+@required_scope(AUTHENTICATED_ACCESS_USER)
+@convert_kwargs_to_snake_case
+@requires_power_dialer_enabled
+async def resolve_skip_campaign_cooldown(
+    _: Any, info: GraphQLResolveInfo, data: abstracts.SkipCampaignConversation
+):
+    request = info.context["request"]
+    try:
+        validated_data = abstracts.SkipCampaignConversation(**data)
+        await services.skip_campaign_cooldown(
+            conversation_sid=validated_data.conversation_sid,
+            campaign_id=validated_data.campaign_id,
+            db_conn=get_database(request),
+            cache=get_cache(request),
+        )
+        return {
+            "status": 200,
+            "data": {"next_id": validated_data.conversation_sid},
+            "error": None,
+        }
+    except Exception as e:
+        return create_error_response(
+            translator=get_translator(request),
+            message=str(e),
+            error_status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
 @required_scope(AUTHENTICATED_ACCESS_USER)
 @requires_power_dialer_enabled
 async def resolve_control_campaign(
@@ -849,9 +881,12 @@ async def resolve_control_campaign(
     member_id = user.get_claim("member_id", ShortId).uuid()
     workspace_id = user.get_claim("workspace_id", ShortId).uuid()
     try:
-        workspace_credit = await get_workspace_credit(
-            ShortId.with_uuid(workspace_id)
-        )
+        ledger = CreditLedger(get_cache(request))
+        workspace_credit = await ledger.available(workspace_id)
+        if not BillingService.is_sufficient_credit(workspace_credit):
+            # the workspace may have topped up since the ledger was synced
+            await ledger.refresh(workspace_id)
+            workspace_credit = await ledger.available(workspace_id)
 
         if not BillingService.is_sufficient_credit(workspace_credit):
             return create_error_response(
@@ -870,6 +905,7 @@ async def resolve_control_campaign(
             provider_client=request.app.state.twilio,
             settings=request.app.state.settings,
             queue=queue,
+            cache=get_cache(request),
         )
 
         if validated_data.action == abstracts.CampaignAction.START:
@@ -894,8 +930,9 @@ async def resolve_control_campaign(
             abstracts.CampaignAction.END.value,
             abstracts.CampaignAction.PAUSE.value,
         ]:
-            cache = Redis.from_url(request.app.state.settings.redis_settings)
-            cache.delete(validated_data.id)
+            # the loop wrote its paused / ended status, keep it for the
+            # callbacks of the calls still in flight
+            await CampaignStateStore(get_cache(request)).expire(validated_data.id)
 
         status_to_command_map = {
             "start": "inprogress",
@@ -1020,18 +1057,18 @@ async def resolve_campaign_voicemail_drop(
     _: Any, info: GraphQLResolveInfo, input: abstracts.VoicemailDropInput
 ):
     request = info.context["request"]
-    cache = Redis.from_url(request.app.state.settings.redis_settings)
+    cache = get_cache(request)
     db_conn = get_database(request)
     _twilio = request.app.state.twilio
     try:
         input = abstracts.VoicemailDropInput(**input)
-        campaign_data = cache.get(ShortId.with_uuid(input.campaign_id)) or "{}"
-        camp_obj = json.loads(campaign_data)
-        if not camp_obj:
+        cpass_details = await CampaignStateStore(cache).get_field(
+            ShortId.with_uuid(input.campaign_id), "cpass_user"
+        )
+        if not cpass_details:
             raise Exception("Campaign is not active.")
-        cpass_details = camp_obj.get("cpass_user")
         _sub_client: TwilioClient = sub_client(
-            obj=copy.copy(_twilio),
+            obj=_twilio,
             details=cpass_details,
         )
         await services.drop_campaign_voicemail(
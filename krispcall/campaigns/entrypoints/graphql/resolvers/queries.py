@@ -8,6 +8,10 @@ from krispcall.auth.requires_auth_power_dialer import (
 from ariadne import convert_kwargs_to_snake_case
 from graphql.type.definition import GraphQLResolveInfo
 from krispcall.common.models.response_model import PaginationParams
+from krispcall.common.services.pagination.count import (
+    COUNT_CACHED,
+    COUNT_ESTIMATE,
+)
 from krispcall.common.error_handler.parse_error_response import create_error_response
 
 from krispcall.common.utils.shortid import ShortId
@@ -188,6 +192,7 @@ async def resolve_campaign_list(
             workspace_id,
             fetch_archived,
             db_conn,
+            count_mode=COUNT_CACHED,
         )
 
         return abstracts.create_paginated_response(resource=campaignList)
@@ -231,6 +236,7 @@ async def resolve_campaign_analytics(
             campaign_id=data.campaign_id,
             db_conn=db_conn,
             status_filter=status_filter,
+            count_mode=COUNT_ESTIMATE,
         )
         if not conversations.edges:
             return create_error_response(
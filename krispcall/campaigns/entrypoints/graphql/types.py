@@ -16,6 +16,7 @@ from krispcall.campaigns.entrypoints.graphql.resolvers.mutation import (
     resolve_archive_campaign,
     resolve_update_campaign,
     resolve_skip_campaign_conversation,
+    resolve_skip_campaign_cooldown,
     resolve_control_campaign,
     resolve_hold_campaign_conversation,
     resolve_record_campaign_conversation,
@@ -118,6 +119,7 @@ mutation.set_field("updateCampaignCallNote", resolve_update_campaign_call_note)
 mutation.set_field(
     "skipCampaignConversation", resolve_skip_campaign_conversation
 )
+mutation.set_field("skipCampaignCooldown", resolve_skip_campaign_cooldown)
 mutation.set_field(
     "holdCampaignConversation", resolve_hold_campaign_conversation
 )
@@ -1,8 +1,8 @@
-import json
 import typing
 from uuid import UUID
 from krispcall.campaigns import services
-from redis import Redis
+from redis.asyncio import Redis
+from krispcall.konference.adapters.state_store import CampaignStateStore
 
 from krispcall.common.utils.shortid import ShortId
 
@@ -24,12 +24,18 @@ async def create_campaign_stats(ctx, campaign_id: UUID, contact_list_id: UUID):
     )
 
 
+def _stats_cache(ctx) -> typing.Optional[Redis]:
+    """redis accumulator for stats counters, None writes them directly"""
+    return ctx["cache"] if ctx["settings"].campaign_stats_buffered else None
+
+
 async def update_campaign_duration(ctx, campaign_id: UUID, add_seconds: int):
     db_conn = ctx["db"]
     await services.update_campaign_duration(
         campaign_id=campaign_id,
         db_conn=db_conn,
         add_seconds=add_seconds,
+        cache=_stats_cache(ctx),
     )
 
 
@@ -38,6 +44,7 @@ async def update_dialed_contacts(ctx, campaign_id: UUID):
     await services.update_campaign_dialed_contacts(
         campaign_id=campaign_id,
         db_conn=db_conn,
+        cache=_stats_cache(ctx),
     )
 
 
@@ -47,6 +54,7 @@ async def update_campaign_calls(ctx, campaign_id: UUID, answered: bool):
         campaign_id=campaign_id,
         db_conn=db_conn,
         answered=answered,
+        cache=_stats_cache(ctx),
     )
 
 
@@ -55,19 +63,22 @@ async def update_voicemail_drops(ctx, campaign_id: UUID):
     await services.update_campaign_voicemail_drops(
         campaign_id=campaign_id,
         db_conn=db_conn,
+        cache=_stats_cache(ctx),
     )
 
 
+async def flush_campaign_stats(ctx):
+    await services.flush_campaign_stats(cache=ctx["cache"], db_conn=ctx["db"])
+
+
 async def end_campaign(ctx, campaign_id: UUID):
     db_conn = ctx["db"]
-    settings = ctx["settings"]
-    cache = Redis.from_url(settings.redis_settings)
-    campaign = cache.get(ShortId.with_uuid(campaign_id)) or {}
+    cache: Redis = ctx["cache"]
+    camp_obj = await CampaignStateStore(cache).get(ShortId.with_uuid(campaign_id))
     # If we don't find the campaign in cache, it means its paused or
     # ended so we do nothing
-    if not campaign:
+    if not camp_obj:
         return
-    camp_obj = json.loads(campaign)
 
     # Now, we'll check if the campaign is still in dialing_completed
     # state if it is we'll end the campaign
@@ -7,7 +7,7 @@ from datetime import datetime
 from uuid import UUID
 from pydantic import BaseModel, Field, root_validator
 from krispcall.common.models.response_model import create_success_response
-from krispcall.common.services.pagination.query import QueryModel
+from krispcall.common.services.pagination.query import Cursor, QueryModel
 from krispcall.common.services.status import HTTP_200_OK
 
 from krispcall.common.with_response import (
@@ -21,6 +21,9 @@ from pydantic import validator
 
 from krispcall.common.utils.shortid import ShortId
 
+# contacts rung at once for every agent in parallel dialing
+MAX_LINES_PER_AGENT = 5
+
 
 class CampaignContactListMastData(ResourceModel):
     id: ShortId
@@ -234,6 +237,7 @@ def get_campaign(response_factory, *, resource):
                 "call_script_id": record["call_script_id"],
                 "contact_list_id": record["contact_list_id"],
                 "next_number_to_dial": record["next_number_to_dial"],
+                "lines_per_agent": record["lines_per_agent"],
                 "assigne_name": record["assigne_name"],
                 "campaign_name": record["campaign_name"],
                 "campaign_status": record["campaign_status"],
@@ -339,6 +343,15 @@ class CreateCampaign(DataModel):
     call_attempt_gap: Optional[int]
     is_call_script_enabled: bool
     call_script_id: Optional[ShortId]
+    lines_per_agent: Optional[int]
+
+    @validator("lines_per_agent")
+    def lines_per_agent_validation(cls, v):
+        if v is not None and not 1 <= v <= MAX_LINES_PER_AGENT:
+            raise ValueError(
+                f"Lines per agent must be between 1 and {MAX_LINES_PER_AGENT}"
+            )
+        return v
 
 
 class UpdateCampaign(DataModel):
@@ -365,6 +378,15 @@ class UpdateCampaign(DataModel):
     call_script_id: Optional[ShortId]
     contact_list_id: Optional[ShortId]
     created_by_name: str
+    lines_per_agent: Optional[int]
+
+    @validator("lines_per_agent")
+    def lines_per_agent_validation(cls, v):
+        if v is not None and not 1 <= v <= MAX_LINES_PER_AGENT:
+            raise ValueError(
+                f"Lines per agent must be between 1 and {MAX_LINES_PER_AGENT}"
+            )
+        return v
 
 
 @unique
@@ -440,11 +462,11 @@ class SearchParams(QueryModel):
 
 class CampPaginationParams(QueryModel):
     first: int = None
-    after: datetime = None
-    after_with: Optional[datetime]
+    after: Cursor = None
+    after_with: Optional[Cursor]
     last: int = None
-    before: datetime = None
-    before_with: Optional[datetime]
+    before: Cursor = None
+    before_with: Optional[Cursor]
     search: Optional[SearchParams]
     order: Literal["asc", "desc"] = Field("asc")
 
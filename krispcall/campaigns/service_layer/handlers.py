@@ -214,6 +214,7 @@ def add_campaigns(
         next_number_to_dial=cmd.next_number_to_dial,
         is_archived=cmd.is_archived,
         callable_data=cmd.callable_data,
+        lines_per_agent=cmd.lines_per_agent,
     )
 
 
@@ -246,6 +247,7 @@ def update_campaign(
                 "call_script_id": cmd.call_script_id,
                 "contact_list_id": cmd.contact_list_id,
                 "is_archived": cmd.is_archived,
+                "lines_per_agent": cmd.lines_per_agent,
             }
         )
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import typing
 from uuid import UUID
 from krispcall.campaigns.service_layer.abstracts import CampPaginationParams
 # from krispcall.common.services.pagination import PaginationParams
@@ -263,6 +264,7 @@ async def get_campaigns_list(
     workspace_id: UUID,
     fetch_archived: bool,
     db_conn: DbConnection,
+    count_mode: typing.Optional[str] = None,
 ):
     query_j = orm.campaigns_campaigns.join(
         orm.campaign_contact_list_mast,
@@ -307,6 +309,7 @@ async def get_campaigns_list(
                 orm.campaigns_campaigns.c.call_script_id,
                 orm.campaigns_campaigns.c.contact_list_id,
                 orm.campaigns_campaigns.c.next_number_to_dial,
+                orm.campaigns_campaigns.c.lines_per_agent,
                 orm.campaigns_campaigns.c.created_on,
                 orm.campaigns_campaigns.c.assigne_name.label("created_by"),
                 orm.campaign_contact_list_mast.c.contact_count,
@@ -321,7 +324,11 @@ async def get_campaigns_list(
         .order_by(orm.campaigns_campaigns.c.created_on.desc())
     )
     pagination = CursorPagination(
-        query=query, db_conn=db_conn, cursor_column="created_on"
+        query=query,
+        db_conn=db_conn,
+        cursor_column="created_on",
+        count_mode=count_mode,
+        count_scope=workspace_id,
     )
     return await pagination.page(params)
 
@@ -361,6 +368,7 @@ async def get_campaign_by_id(
                 orm.campaigns_campaigns.c.call_script_id,
                 orm.campaigns_campaigns.c.contact_list_id,
                 orm.campaigns_campaigns.c.next_number_to_dial,
+                orm.campaigns_campaigns.c.lines_per_agent,
                 orm.campaigns_campaigns.c.created_on,
                 orm.campaign_contact_list_mast.c.contact_count,
                 orm.campaign_contact_list_mast.c.name,
@@ -9,14 +9,16 @@ from krispcall.campaigns.service_layer.exceptions import (
 )
 from krispcall.providers.queue_service.job_queue import JobQueue
 from krispcall.common.configs.app_settings import Settings
+from redis.asyncio import Redis
 from krispcall.konference.domain.models import CampaignConversation
 from loguru import logger
 from starlette.requests import Request
 from datetime import date, datetime
-from typing import Dict, List, Union
+from typing import AsyncIterator, Dict, List, Union
 from uuid import UUID, uuid4
 from krispcall.common.utils.shortid import ShortId
 from krispcall.common.database.connection import DbConnection
+from krispcall.campaigns.adapters.stat_counter import CampaignStatCounter
 from krispcall.campaigns.domain import commands, models
 from krispcall.campaigns.service_layer import (
     abstracts,
@@ -32,6 +34,18 @@ from krispcall.campaigns.service_layer import helpers
 import copy
 
 
+def _contact_record(contact: Dict, member: UUID, contact_list_id: UUID) -> Dict:
+    today = str(date.today())
+    return {
+        "id": uuid4(),
+        "created_by": member,
+        "contact_name": contact.get("Contact Name", f"import_{today}"),
+        "contact_number": contact.get("Phone Number", ""),
+        "created_on": datetime.now(),
+        "contact_list_id": contact_list_id,
+    }
+
+
 async def upload_campaign_contact_list(
     workspace_id: UUID,
     member: UUID,
@@ -64,21 +78,10 @@ async def upload_campaign_contact_list(
         )
 
         if not skip_csv_upload:
-            contact_list = []
-            for each in contact_data: # type: ignore
-                today = str(date.today())
-                name = each.get("Contact Name", f"import_{today}")
-                phone_number = each.get("Phone Number", "")
-                id_ = uuid4()
-                record = {
-                    "id": id_,
-                    "created_by": member,
-                    "contact_name": name,
-                    "contact_number": phone_number,
-                    "created_on": datetime.now(),
-                    "contact_list_id": contact_mast_data.id_,
-                }
-                contact_list.append(record)
+            contact_list = [
+                _contact_record(each, member, contact_mast_data.id_)
+                for each in contact_data  # type: ignore
+            ]
 
             if contact_list:
                 await uow.repository.upload_contact_in_bulk(contact_list)
@@ -95,21 +98,9 @@ async def upload_contact_detail_csv(
 ) -> models.Client: # type: ignore
     async with unit_of_work.CampaignContactSqlUnitOfWork(db_conn) as uow:
         contact_mast = await uow.repository.get(contact_list_id)
-        contact_list = []
-        for each in contact_data:
-            today = str(date.today())
-            name = each.get("Contact Name", f"import_{today}")
-            phone_number = each.get("Phone Number", "")
-            id_ = uuid4()
-            record = {
-                "id": id_,
-                "created_by": member,
-                "contact_name": name,
-                "contact_number": phone_number,
-                "created_on": datetime.now(),
-                "contact_list_id": contact_list_id,
-            }
-            contact_list.append(record)
+        contact_list = [
+            _contact_record(each, member, contact_list_id) for each in contact_data
+        ]
 
         if contact_list:
             await uow.repository.upload_contact_in_bulk(contact_list)
@@ -127,6 +118,61 @@ async def upload_contact_detail_csv(
             )
 
 
+async def import_contact_list_csv(
+    member: UUID,
+    user: UUID,
+    contact_list_id: UUID,
+    contact_batches: AsyncIterator[List[Dict]],
+    db_conn: DbConnection,
+) -> int:
+    """Inserts contacts streamed from a csv batch by batch and adds them to
+    the contact count of the list, returns the number of imported contacts
+    """
+    total_records = 0
+    async with unit_of_work.CampaignContactSqlUnitOfWork(db_conn) as uow:
+        async for contacts in contact_batches:
+            await uow.repository.upload_contact_in_bulk(
+                [
+                    _contact_record(each, member, contact_list_id)
+                    for each in contacts
+                ]
+            )
+            total_records += len(contacts)
+
+        if total_records:
+            contact_mast = await uow.repository.get(contact_list_id)
+            await uow.repository.update_contact_count(
+                contact_list_id,
+                int(contact_mast.contact_count) + total_records,
+                user,
+            )
+    return total_records
+
+
+async def import_new_contact_list_csv(
+    member: UUID,
+    user: UUID,
+    contact_list_id: UUID,
+    contact_batches: AsyncIterator[List[Dict]],
+    db_conn: DbConnection,
+) -> int:
+    """import_contact_list_csv into a list created for this upload, the list
+    is deleted again when the csv can't be imported as a whole
+    """
+    try:
+        return await import_contact_list_csv(
+            member=member,
+            user=user,
+            contact_list_id=contact_list_id,
+            contact_batches=contact_batches,
+            db_conn=db_conn,
+        )
+    except Exception:
+        async with unit_of_work.CampaignContactSqlUnitOfWork(db_conn) as uow:
+            await uow.repository.delete_contact_list(contact_list_id)
+        raise
+
+
 async def update_campaign_contact_list(
     user_id: UUID,
     validated_data: abstracts.UpdateCampaignContactList,
@@ -422,6 +468,7 @@ async def create_campaign(
         contact_list_id=contact_list_id,
         next_number_to_dial=next_number_to_dial,
         callable_data=helpers.build_callable_list(callable_data),
+        lines_per_agent=validated_data.lines_per_agent or 1,
     )
     async with unit_of_work.CampaignSqlUnitOfWork(db_conn) as uow:
         campaign = handlers.add_campaigns(cmd)
@@ -491,6 +538,8 @@ async def update_campaign(
                 next_number_to_dial=campaign.next_number_to_dial,
                 is_archived=campaign.is_archived,
                 modified_by=member,
+                lines_per_agent=validated_data.lines_per_agent
+                or campaign.lines_per_agent,
             )
         )
         await uow.repository.update_campaigns(campaign, member, created_by)  # type: ignore
@@ -572,6 +621,17 @@ async def skip_campaign_conversation(
     return next_in_sequence
 
 
+async def skip_campaign_cooldown(
+    conversation_sid: UUID, campaign_id: UUID, db_conn: DbConnection, cache: Redis
+) -> bool:
+    return await konference_services.skip_conversation_cooldown(
+        conversation_sid=conversation_sid,
+        campaign_id=campaign_id,
+        db_conn=db_conn,
+        cache=cache,
+    )
+
+
 async def control_campaign(
     validated_data: abstracts.ControlCampaign,
     member: UUID,
@@ -580,6 +640,7 @@ async def control_campaign(
     provider_client: TwilioClient,
     settings: Settings,
     queue: JobQueue,
+    cache: Redis,
 ) -> models.Campaigns:
     status_to_command_map = {
         "start": "inprogress",
@@ -660,6 +721,7 @@ async def control_campaign(
         member=member,
         settings=settings,
         queue=queue,
+        cache=cache,
     )
     return campaign
 
@@ -680,63 +742,85 @@ async def end_campaign(campaign_id: UUID, db_conn: DbConnection):
         )
 
 
-async def update_campaign_duration(
-    campaign_id: UUID, db_conn: DbConnection, add_seconds: int
+async def increment_campaign_stats(
+    campaign_id: UUID,
+    db_conn: DbConnection,
+    increments: Dict[str, int],
+    cache: Redis = None,  # type: ignore
 ):
-    """Adds seconds to the campaign stats for the provided campaign"""
+    """Adds to the campaign stats counters. With a cache the increments are
+    accumulated in redis and written later by flush_campaign_stats,
+    otherwise they are written right away with a single UPDATE
+    """
+    if cache is not None:
+        counter = CampaignStatCounter(cache)
+        for field, value in increments.items():
+            await counter.increment(campaign_id, field, value)
+        return
     async with unit_of_work.CampaignStatsSqlUnitOfWork(db_conn) as uow:
-        stats: models.CampaignStats = await uow.repository.get(ref=campaign_id)
+        await uow.repository.increment_many(campaign_id, increments)
 
-        updated_stats = handlers.update_campaign_stats(
-            cmd=commands.UpdateCampaignCallDuration(
-                stats=stats,
-                active_call_duration=stats.active_call_duration + add_seconds,
-            )  # type: ignore
-        )
-        return await uow.repository.update(updated_stats, "active_call_duration", add_seconds)  # type: ignore
+
+async def flush_campaign_stats(cache: Redis, db_conn: DbConnection):
+    """Writes the counters accumulated in redis to campaign_stats"""
+    counter = CampaignStatCounter(cache)
+    pending = await counter.take_pending()
+    async with unit_of_work.CampaignStatsSqlUnitOfWork(db_conn) as uow:
+        for campaign_id, increments in pending.items():
+            try:
+                await uow.repository.increment_many(campaign_id, increments)
+            except Exception as e:
+                print(f"campaign stats flush failed for {campaign_id}: {e}")
+                await counter.restore(campaign_id, increments)
+
+
+async def update_campaign_duration(
+    campaign_id: UUID,
+    db_conn: DbConnection,
+    add_seconds: int,
+    cache: Redis = None,  # type: ignore
+):
+    """Adds seconds to the campaign stats for the provided campaign"""
+    await increment_campaign_stats(
+        campaign_id, db_conn, {"active_call_duration": add_seconds}, cache
+    )
 
 
 async def update_campaign_dialed_contacts(
-    campaign_id: UUID, db_conn: DbConnection
+    campaign_id: UUID,
+    db_conn: DbConnection,
+    cache: Redis = None,  # type: ignore
 ):
     """Adds +1 to the dialed_contacts table for the campaign"""
-    async with unit_of_work.CampaignStatsSqlUnitOfWork(db_conn) as uow:
-        stats: models.CampaignStats = await uow.repository.get(ref=campaign_id)
-        updated_stats = handlers.update_campaign_stats(
-            cmd=commands.UpdateCampaignDialedContacts(
-                stats=stats, dialed_contacts=stats.dialed_contacts + 1
-            )  # type: ignore
-        )
-        return await uow.repository.update(updated_stats, "dialed_contacts", 1)  # type: ignore
+    await increment_campaign_stats(
+        campaign_id, db_conn, {"dialed_contacts": 1}, cache
+    )
 
 
 async def update_campaign_calls(
     campaign_id: UUID,
     db_conn: DbConnection,
     answered: bool,
+    cache: Redis = None,  # type: ignore
 ):
     """Adds +1 to the answered or unanswered calls table for the campaign"""
-    async with unit_of_work.CampaignStatsSqlUnitOfWork(db_conn) as uow:
-        stats: models.CampaignStats = await uow.repository.get(ref=campaign_id)
-        updated_stats = handlers.update_campaign_stats(
-            cmd=commands.UpdateCampaignAnsweredCalls(stats, answered_calls=stats.answered_calls + 1) if answered else commands.UpdateCampaignUnansweredCalls(stats, unanswered_calls=stats.unanswered_calls + 1)  # type: ignore
-        )
-        return await uow.repository.update(updated_stats, "answered_calls" if answered else "unanswered_calls", 1)  # type: ignore
+    await increment_campaign_stats(
+        campaign_id,
+        db_conn,
+        {"answered_calls" if answered else "unanswered_calls": 1},
+        cache,
+    )
 
 
 async def update_campaign_voicemail_drops(
-    campaign_id: UUID, db_conn: DbConnection
+    campaign_id: UUID,
+    db_conn: DbConnection,
+    cache: Redis = None,  # type: ignore
 ):
     """Adds +1 to the voicemail drops  table for the campaign"""
-    async with unit_of_work.CampaignStatsSqlUnitOfWork(db_conn) as uow:
-        stats: models.CampaignStats = await uow.repository.get(ref=campaign_id)
-        updated_stats = handlers.update_campaign_stats(
-            cmd=commands.UpdateCampaignVoicemailDrops(
-                stats=stats,
-                voicemail_drops=stats.voicemail_drops + 1,
-            )  # type: ignore
-        )
-        return await uow.repository.update(updated_stats, "voicemail_drops", 1)  # type: ignore
+    await increment_campaign_stats(
+        campaign_id, db_conn, {"voicemail_drops": 1}, cache
+    )
 
 
 async def create_campaign_stats(
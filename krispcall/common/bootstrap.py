@@ -3,6 +3,9 @@
 from __future__ import annotations
 
 from databases import Database
+from redis.asyncio import BlockingConnectionPool, Redis
+from krispcall.common.metrics import MeteredRedis
+from krispcall.common.database.instrumented import InstrumentedDatabase
 from krispcall.common.configs.app_settings import Settings
 from krispcall.providers.queue_service.job_queue import JobQueue
 from krispcall.twilio.twilio_client import TwilioClient
@@ -12,19 +15,31 @@ def init_queue(settings: Settings) -> JobQueue:
     return JobQueue(settings.redis_settings, skip_rpc=settings.is_testing)
 
 
+def init_cache(settings: Settings) -> Redis:
+    """initialize shared async redis client backed by a connection pool"""
+    pool = BlockingConnectionPool.from_url(
+        settings.redis_settings,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+    )
+    return MeteredRedis(connection_pool=pool)
+
+
 def init_twillo(settings: Settings) -> TwilioClient:
     """initialize twillo client"""
     return TwilioClient(settings)
 
-def init_worker_database(settings: Settings) -> Database:
+def init_worker_database(settings: Settings) -> InstrumentedDatabase:
     """load/unload postgres engine"""
     if settings.is_testing:
-        return Database(
+        database = Database(
             settings.pg_dsn, ssl=settings.pg_use_ssl, force_rollback=True
         )
-    return Database(
-        settings.pg_dsn,
-        ssl=settings.pg_use_ssl,
-        min_size=settings.worker_pg_min_size,
-        max_size=settings.worker_pg_max_size,
-    )
+    else:
+        database = Database(
+            settings.pg_dsn,
+            ssl=settings.pg_use_ssl,
+            min_size=settings.worker_pg_min_size,
+            max_size=settings.worker_pg_max_size,
+        )
+    return InstrumentedDatabase(database, slow_query_ms=settings.pg_slow_query_ms)
@@ -77,6 +77,10 @@ class CoreSettings(BaseSettings):
     pg_min_size: int = 5
     pg_max_size: int = 10
     pg_use_ssl: bool = True
+    # statements slower than this are logged with their sql
+    pg_slow_query_ms: int = 200
+    # queries from one call site in a request or job reported as N+1
+    pg_n_plus_one_threshold: int = 10
 
 
 class WebSettings(CoreSettings):
@@ -123,6 +127,22 @@ class Settings(WebSettings):
 
     app_uri: AnyHttpUrl
     redis_settings: RedisDsn
+    # shared async redis connection pool settings
+    redis_max_connections: PositiveInt = typing.cast(PositiveInt, 50)
+    redis_pool_timeout: PositiveInt = typing.cast(PositiveInt, 5)
+    # share foundation lookups (provider details, features) through redis
+    provider_cache_use_redis: bool = True
+    # accumulate campaign stats counters in redis, flushed by the worker
+    campaign_stats_buffered: bool = True
+    # pause before dialing the next contact when the campaign has no cool off
+    next_dial_delay_seconds: float = 3
+    # upcoming conversations of a live campaign prepared for dialing ahead
+    dial_lookahead: int = 2
+    # campaign webhooks appended to redis streams and processed by the worker
+    webhook_stream_ingestion: bool = False
+    webhook_stream_partitions: PositiveInt = typing.cast(PositiveInt, 16)
+    # prometheus exporter of the pd worker, 0 disables it
+    worker_metrics_port: int = 9100
     send_grid_api_key: str
     broadcaster_dsn: RedisDsn
 
@@ -183,6 +203,16 @@ class Settings(WebSettings):
 
     twilio_outgoing_application_sid = ""
 
+    # pooled http session used for the twilio REST api
+    twilio_http_pool_size: PositiveInt = typing.cast(PositiveInt, 100)
+    twilio_http_pool_size_per_host: PositiveInt = typing.cast(PositiveInt, 50)
+    twilio_http_timeout: float = 10
+    twilio_http_max_retries: int = 3
+    # requests in flight per account, twilio rejects an account over its limit
+    twilio_http_concurrency_per_account: PositiveInt = typing.cast(PositiveInt, 25)
+    # sub account clients kept with their resources, least recently used go first
+    twilio_subaccount_clients: PositiveInt = typing.cast(PositiveInt, 256)
+
     # stripe keys
     stripe_public_key: str
     stripe_secret_key: str
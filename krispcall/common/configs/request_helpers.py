@@ -1,3 +1,4 @@
+from redis.asyncio import Redis
 from starlette.requests import Request
 
 from krispcall.common.configs.app_settings import WebSettings
@@ -10,3 +11,7 @@ def get_app_settings(request: Request) -> WebSettings:
 
 def get_database(request: Request) -> DbConnection:
     return request.app.state.db
+
+
+def get_cache(request: Request) -> Redis:
+    return request.app.state.cache
@@ -8,6 +8,7 @@ import sqlalchemy as sa
 from databases import Database
 
 from krispcall.common.error_handler import error_handlers
+from krispcall.common.database.instrumented import InstrumentedDatabase
 
 SQL_METADATA = sa.MetaData()
 
@@ -45,15 +46,16 @@ def load_exception_handlers() -> dict[typing.Any, typing.Any]:
     }
 
 
-def init_database(settings: DatabaseSettings) -> Database:
+def init_database(settings: DatabaseSettings) -> InstrumentedDatabase:
     # """load/unload postgres engine"""
     # if settings.is_testing:
     #     return Database(
     #         settings.pg_dsn, ssl=settings.pg_use_ssl, force_rollback=True
         # )
-    return Database(
+    database = Database(
         settings.pg_dsn,
         ssl=settings.pg_use_ssl,
         min_size=settings.pg_min_size,
         max_size=settings.pg_max_size,
     )
+    return InstrumentedDatabase(database, slow_query_ms=settings.pg_slow_query_ms)
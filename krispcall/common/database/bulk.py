@@ -0,0 +1,150 @@
+"""
+bulk loading of rows through postgres COPY
+
+rows are streamed with asyncpg copy_records_to_table in fixed size chunks
+instead of one multi-row INSERT, conflicting rows can be skipped by copying
+into a temporary staging table first and merging it with
+INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+"""
+from __future__ import annotations
+
+import logging
+import typing
+from uuid import uuid4
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from krispcall.common.database.connection import DbConnection
+
+LOGGER = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 5000
+
+ProgressCallback = typing.Callable[[int, int], typing.Any]
+
+
+def _chunks(
+    records: typing.Sequence[tuple], size: int
+) -> typing.Iterator[typing.Sequence[tuple]]:
+    for start in range(0, len(records), size):
+        yield records[start : start + size]
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _qualified(name: str, schema_name: typing.Optional[str]) -> str:
+    if schema_name is None:
+        return _quote(name)
+    return f"{_quote(schema_name)}.{_quote(name)}"
+
+
+async def _default_factories(
+    raw_connection: typing.Any,
+    table: sa.Table,
+    present: typing.Collection[str],
+) -> typing.Dict[str, typing.Callable[[], typing.Any]]:
+    """Value factories of the columns left out that have an orm default,
+    sql defaults such as now() are evaluated once in the copy transaction
+    """
+    factories: typing.Dict[str, typing.Callable[[], typing.Any]] = {}
+    for column in table.columns:
+        default = column.default
+        if column.name in present or default is None:
+            continue
+        if default.is_callable:
+            factories[column.name] = lambda arg=default.arg: arg(None)
+        elif default.is_clause_element:
+            expression = default.arg.compile(
+                dialect=postgresql.dialect(),
+                compile_kwargs={"literal_binds": True},
+            )
+            value = await raw_connection.fetchval(f"SELECT {expression}")
+            factories[column.name] = lambda value=value: value
+        else:
+            factories[column.name] = lambda value=default.arg: value
+    return factories
+
+
+async def copy_records(
+    db: DbConnection,
+    table: sa.Table,
+    records: typing.List[typing.Dict[str, typing.Any]],
+    on_conflict_do_nothing: bool = False,
+    chunk_size: int = COPY_CHUNK_SIZE,
+    on_progress: typing.Optional[ProgressCallback] = None,
+    schema_name: typing.Optional[str] = None,
+) -> int:
+    """Loads records into table with COPY in one transaction,
+    returns the number of rows inserted.
+
+    every record must have the same keys. COPY doesn't run the orm
+    defaults, so columns left out are filled with them here, columns
+    without one are left to the database. schema_name defaults to the
+    schema of the table, the search path when it has none. on_progress is
+    called with (copied, total) after every chunk.
+    """
+    if not records:
+        return 0
+    schema_name = schema_name or table.schema
+    total = len(records)
+
+    async with db.connection() as connection:  # type: ignore
+        raw_connection = connection.raw_connection
+        async with connection.transaction():
+            defaults = await _default_factories(raw_connection, table, records[0])
+            columns = [
+                column.name
+                for column in table.columns
+                if column.name in records[0] or column.name in defaults
+            ]
+            rows = [
+                tuple(
+                    record[column] if column in record else defaults[column]()
+                    for column in columns
+                )
+                for record in records
+            ]
+
+            target, target_schema = table.name, schema_name
+            if on_conflict_do_nothing:
+                # temporary tables live in their own schema
+                target, target_schema = f"_bulk_{table.name}_{uuid4().hex[:8]}", None
+                await raw_connection.execute(
+                    f"CREATE TEMPORARY TABLE {_quote(target)} "
+                    f"(LIKE {_qualified(table.name, schema_name)} "
+                    "INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+
+            copied = 0
+            for chunk in _chunks(rows, chunk_size):
+                await raw_connection.copy_records_to_table(
+                    target,
+                    records=chunk,
+                    columns=columns,
+                    schema_name=target_schema,
+                )
+                copied += len(chunk)
+                LOGGER.debug("copied %s/%s rows into %s", copied, total, target)
+                if on_progress is not None:
+                    await _report(on_progress, copied, total)
+
+            if not on_conflict_do_nothing:
+                return total
+
+            column_list = ", ".join(_quote(column) for column in columns)
+            status = await raw_connection.execute(
+                f"INSERT INTO {_qualified(table.name, schema_name)} ({column_list}) "
+                f"SELECT {column_list} FROM {_quote(target)} "
+                "ON CONFLICT DO NOTHING"
+            )
+            # status is "INSERT 0 <rows>"
+            return int(status.split()[-1])
+
+
+async def _report(on_progress: ProgressCallback, copied: int, total: int) -> None:
+    result = on_progress(copied, total)
+    if hasattr(result, "__await__"):
+        await result
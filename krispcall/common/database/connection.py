@@ -35,6 +35,10 @@ class DbConnection(typing.Protocol):
     async def transaction(self) -> DbTransaction:
         raise NotImplementedError()
 
+    def connection(self) -> typing.Any:
+        """driver connection of the current task, exposes raw_connection"""
+        raise NotImplementedError()
+
     async def execute(self, query: ClauseElement) -> typing.Any:
         raise NotImplementedError()
 
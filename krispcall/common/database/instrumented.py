@@ -0,0 +1,191 @@
+"""
+Query instrumentation of the database connection.
+
+InstrumentedDatabase wraps the databases.Database every repository and view
+receives as db_conn. Each statement is timed and tagged with the repository
+method or function that issued it, statements over pg_slow_query_ms are
+logged with their compiled sql.
+
+Queries are counted per http request (QueryCountMiddleware) and per arq job
+(on_job_start / on_job_end of the worker). At the end of the scope a call
+site that ran pg_n_plus_one_threshold queries or more is reported as a
+possible N+1.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import sys
+import time
+import typing
+from collections import Counter
+
+from databases import Database
+from sqlalchemy.dialects import postgresql
+
+LOGGER = logging.getLogger(__name__)
+
+_DIALECT = postgresql.dialect()
+# longest statement written to the log
+SQL_LOG_LIMIT = 2000
+
+
+class QueryStats:
+    """Queries of one http request or arq job"""
+
+    def __init__(self, name: str, n_plus_one_threshold: int):
+        self.name = name
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.seconds = 0.0
+        self.callers: typing.Counter[str] = Counter()
+        # first statement of every caller, compiled only when reported
+        self.samples: typing.Dict[str, typing.Any] = {}
+        self.token: typing.Optional[contextvars.Token] = None
+
+    def add(self, caller: str, query: typing.Any, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.callers[caller] += 1
+        self.samples.setdefault(caller, query)
+
+    def report(self) -> None:
+        LOGGER.debug(
+            "%s: %d queries in %.1fms", self.name, self.count, self.seconds * 1000
+        )
+        for caller, count in self.callers.most_common():
+            if count < self.n_plus_one_threshold:
+                break
+            LOGGER.warning(
+                "Possible N+1 in %s: %s ran %d queries, %s",
+                self.name,
+                caller,
+                count,
+                compiled_sql(self.samples[caller]),
+            )
+
+
+_QUERY_STATS: contextvars.ContextVar[
+    typing.Optional[QueryStats]
+] = contextvars.ContextVar("query_stats", default=None)
+
+
+def start_query_scope(name: str, n_plus_one_threshold: int) -> QueryStats:
+    """Counts the queries of the current task and the tasks it starts"""
+    stats = QueryStats(name, n_plus_one_threshold)
+    stats.token = _QUERY_STATS.set(stats)
+    return stats
+
+
+def end_query_scope(stats: QueryStats) -> None:
+    if stats.token is not None:
+        _QUERY_STATS.reset(stats.token)
+        stats.token = None
+    stats.report()
+
+
+def compiled_sql(query: typing.Any, values: typing.Any = None) -> str:
+    """Postgres sql of the statement with its parameters inlined when
+    possible, truncated to SQL_LOG_LIMIT
+    """
+    if isinstance(query, str):
+        sql = query if values is None else f"{query} {values}"
+    else:
+        try:
+            sql = str(
+                query.compile(dialect=_DIALECT, compile_kwargs={"literal_binds": True})
+            )
+        except Exception:
+            # types without a literal renderer, e.g. json and arrays
+            compiled = query.compile(dialect=_DIALECT)
+            sql = f"{compiled} {compiled.params}"
+    if len(sql) > SQL_LOG_LIMIT:
+        return sql[:SQL_LOG_LIMIT] + "..."
+    return sql
+
+
+def _caller() -> str:
+    """Repository method or function the statement was issued from"""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back  # type: ignore
+    if frame is None:
+        return "unknown"
+    code = frame.f_code
+    if code.co_argcount and code.co_varnames[0] == "self":
+        owner = type(frame.f_locals.get("self")).__name__
+    else:
+        owner = frame.f_globals.get("__name__", "")
+    return f"{owner}.{code.co_name}"
+
+
+class InstrumentedDatabase:
+    """databases.Database timing, tagging and counting every statement,
+    everything else is passed through
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        slow_query_ms: float = 200,
+    ):
+        self._database = database
+        self.slow_query_seconds = slow_query_ms / 1000
+
+    def __getattr__(self, name: str) -> typing.Any:
+        return getattr(self._database, name)
+
+    async def _run(self, method, query, *args, **kwargs) -> typing.Any:
+        caller = _caller()
+        started = time.perf_counter()
+        try:
+            return await method(query, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = _QUERY_STATS.get()
+            if stats is not None:
+                stats.add(caller, query, elapsed)
+            if elapsed >= self.slow_query_seconds:
+                values = args[0] if args else kwargs.get("values")
+                LOGGER.warning(
+                    "Slow query %.1fms in %s%s: %s",
+                    elapsed * 1000,
+                    caller,
+                    f" ({stats.name})" if stats is not None else "",
+                    compiled_sql(query, values),
+                )
+
+    async def execute(self, query, values=None) -> typing.Any:
+        return await self._run(self._database.execute, query, values)
+
+    async def execute_many(self, query, values) -> None:
+        return await self._run(self._database.execute_many, query, values)
+
+    async def fetch_all(self, query, values=None) -> typing.List[typing.Mapping]:
+        return await self._run(self._database.fetch_all, query, values)
+
+    async def fetch_one(self, query, values=None) -> typing.Optional[typing.Mapping]:
+        return await self._run(self._database.fetch_one, query, values)
+
+    async def fetch_val(self, query, values=None, column=0) -> typing.Any:
+        return await self._run(self._database.fetch_val, query, values, column)
+
+
+class QueryCountMiddleware:
+    """Counts the queries of every http request"""
+
+    def __init__(self, app, n_plus_one_threshold: int = 10):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = start_query_scope(
+            f"{scope['method']} {scope['path']}", self.n_plus_one_threshold
+        )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_query_scope(stats)
@@ -39,3 +39,5 @@ class DatabaseSettings(CoreSettings):
     pg_min_size: int = 5
     pg_max_size: int = 10
     pg_use_ssl: bool = True
+    pg_slow_query_ms: int = 200
+    pg_n_plus_one_threshold: int = 10
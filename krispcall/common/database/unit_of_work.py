@@ -6,6 +6,7 @@ from __future__ import annotations
 import logging
 import typing
 
+from krispcall.common.metrics import metered
 from krispcall.common.database.connection import (
     DbConnection,
     DbTransaction,
@@ -26,7 +27,7 @@ class SqlAlchemyUnitOfWork:
     def __init__(self, connection: DbConnection):
         self._transaction: DbTransaction = None
         self._conn = connection
-        self._repository = self.repository_class(self._conn)
+        self._repository = metered(self.repository_class(self._conn))
 
     @property
     def repository(self) -> SqlAlchemyRepository:
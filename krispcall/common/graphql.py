@@ -8,6 +8,8 @@ from ariadne import ScalarType
 from base64 import b64encode, b64decode
 from datetime import datetime
 
+from krispcall.common.services.pagination.query import KeysetCursor
+
 
 datetime_scalar = ScalarType("Datetime")
 uid_scalar = ScalarType("ShortId")
@@ -56,8 +58,11 @@ def parse_uid_value(value: uuid) -> UUID:
 @cursor_scalar.serializer
 def serialize_cursor(value: Any) -> str:
     """
-    datetime to base64 isodate
+    datetime to base64 isodate, keyset cursor to base64 isodate|id
     """
+    if isinstance(value, KeysetCursor):
+        keyset = f"{value.value.isoformat()}|{value.id}"
+        return b64encode(keyset.encode()).decode()
     if isinstance(value, datetime):
         isodate = value.isoformat()
         return b64encode(isodate.encode()).decode()
@@ -67,9 +72,12 @@ def serialize_cursor(value: Any) -> str:
 @cursor_scalar.value_parser
 def parse_cursor(value: Any) -> Any:
     """
-    base64 isodate to datetime
+    base64 isodate to datetime, base64 isodate|id to keyset cursor
     """
     isodate = b64decode(value).decode()
+    if "|" in isodate:
+        isodate, id_ = isodate.rsplit("|", 1)
+        return KeysetCursor(datetime.fromisoformat(isodate), id_)
     return datetime.fromisoformat(isodate)
 
 
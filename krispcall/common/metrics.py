@@ -0,0 +1,226 @@
+"""
+Prometheus metrics of the sales dialer.
+
+The web app serves them on /metrics, the pd worker on its own port
+(worker_metrics_port). Label values are kept low cardinality: routes are
+endpoint names and twilio urls are reduced to their resource path, nothing
+is labelled by campaign, workspace or call.
+"""
+from __future__ import annotations
+
+import inspect
+import re
+import time
+import typing
+from urllib.parse import urlsplit
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from krispcall.providers.cache import cache_stats
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+GAP_BUCKETS = (0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 60, 120, 300)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "salesapi_http_request_seconds",
+    "Latency of the http handlers, webhooks included",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+TWILIO_REQUEST_SECONDS = Histogram(
+    "salesapi_twilio_request_seconds",
+    "Latency of the twilio REST requests",
+    ["method", "resource", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+GRPC_REQUEST_SECONDS = Histogram(
+    "salesapi_grpc_request_seconds",
+    "Latency of the grpc calls",
+    ["rpc", "code"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "salesapi_db_query_seconds",
+    "Latency of the repository methods",
+    ["repository", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "salesapi_redis_command_seconds",
+    "Latency of the redis commands, pipelines as PIPELINE",
+    ["command"],
+    buckets=LATENCY_BUCKETS,
+)
+INTER_CALL_GAP_SECONDS = Histogram(
+    "salesapi_inter_call_gap_seconds",
+    "Time from the end of a campaign call to the next agent dial",
+    buckets=GAP_BUCKETS,
+)
+ACTIVE_CONFERENCES = Gauge(
+    "salesapi_active_conferences",
+    "Campaign conferences in progress",
+)
+
+
+class ProviderCacheCollector:
+    """Lookups and sizes of the provider caches, read from cache_stats on
+    every scrape
+    """
+
+    def collect(self):
+        lookups = CounterMetricFamily(
+            "salesapi_provider_cache_lookups",
+            "Provider cache lookups by where they were answered",
+            labels=["cache", "result"],
+        )
+        size = GaugeMetricFamily(
+            "salesapi_provider_cache_size",
+            "Values held in process by the provider caches",
+            labels=["cache"],
+        )
+        for name, stats in cache_stats().items():
+            lookups.add_metric([name, "hit"], stats["hits"])
+            lookups.add_metric([name, "redis_hit"], stats["redis_hits"])
+            lookups.add_metric([name, "miss"], stats["misses"])
+            size.add_metric([name], stats["size"])
+        yield lookups
+        yield size
+
+
+REGISTRY.register(ProviderCacheCollector())
+
+# resource names of twilio urls, everything else is an id
+_RESOURCE = re.compile(r"^(?:[A-Z][a-z]+)+$|^v\d+$|^\d{4}-\d{2}-\d{2}$")
+
+
+def twilio_resource(url: str) -> str:
+    """Path of a twilio url below the account with the ids left out,
+    Conferences/{id}/Participants/{id}.json
+    """
+    path = urlsplit(str(url)).path
+    if "/Accounts/" in path:
+        path = path.split("/Accounts/", 1)[1].split("/", 1)[-1]
+    segments = []
+    for segment in path.strip("/").split("/"):
+        name, dot, extension = segment.partition(".")
+        if _RESOURCE.match(name):
+            segments.append(segment)
+        else:
+            segments.append("{id}" + dot + extension)
+    return "/".join(segments)
+
+
+def metered(repository: typing.Any) -> typing.Any:
+    """Times every coroutine method of the repository"""
+    return MeteredRepository(repository)
+
+
+class MeteredRepository:
+    def __init__(self, repository: typing.Any):
+        self._repository = repository
+        self._name = type(repository).__name__
+
+    def __getattr__(self, name: str) -> typing.Any:
+        attribute = getattr(self._repository, name)
+        if name.startswith("_") or not inspect.iscoroutinefunction(attribute):
+            return attribute
+        histogram = DB_QUERY_SECONDS.labels(repository=self._name, method=name)
+
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await attribute(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return timed
+
+
+class MeteredPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error=raise_on_error)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(command="PIPELINE").observe(
+                time.perf_counter() - started
+            )
+
+
+class MeteredRedis(Redis):
+    """Redis client timing every command by name"""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(command=str(args[0]).upper()).observe(
+                time.perf_counter() - started
+            )
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return MeteredPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class MetricsMiddleware:
+    """Times every http request by the endpoint it was routed to"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            endpoint = scope.get("endpoint")
+            route = (
+                getattr(endpoint, "__name__", type(endpoint).__name__)
+                if endpoint is not None
+                else "unmatched"
+            )
+            HTTP_REQUEST_SECONDS.labels(
+                route=route,
+                method=scope["method"],
+                status=status["code"],
+            ).observe(time.perf_counter() - started)
+
+
+def metrics_body() -> typing.Tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -7,7 +7,7 @@ from pydantic import ValidationError, validator
 from pydantic import BaseModel, Field, root_validator
 from pydantic.generics import GenericModel
 from krispcall.common.models.resource_models import ResourceModel
-from krispcall.common.services.pagination.query import QueryModel
+from krispcall.common.services.pagination.query import Cursor, QueryModel
 
 from krispcall.common.services.status import (
     HTTP_200_OK,
@@ -54,8 +54,8 @@ class MultipleError(BaseModel):
 
 
 class PageInfo(BaseModel):
-    start_cursor: datetime
-    end_cursor: datetime
+    start_cursor: Cursor
+    end_cursor: Cursor
     has_next_page: bool
     has_previous_page: bool
     total_count: int
@@ -135,11 +135,11 @@ search / filter example
 
 class PaginationParams(QueryModel):
     first: int = None  # type: ignore
-    after: datetime = None  # type: ignore
-    after_with: typing.Optional[datetime]
+    after: Cursor = None  # type: ignore
+    after_with: typing.Optional[Cursor]
     last: int = None  # type: ignore
-    before: datetime = None  # type: ignore
-    before_with: typing.Optional[datetime]
+    before: Cursor = None  # type: ignore
+    before_with: typing.Optional[Cursor]
     q: typing.Optional[str]
     s: typing.Optional[str]
     sort: typing.Optional[str]
@@ -1,7 +1,11 @@
+import codecs
+import csv
 import io
 import re
 import typing
+from itertools import islice
 import pandas as pd
+from starlette.concurrency import run_in_threadpool
 from starlette.datastructures import UploadFile
 
 from krispcall.common.error_handler.exceptions import CSVProcessingError, ColumnNotFound
@@ -12,13 +16,121 @@ from krispcall.common.error_handler.exceptions import CSVProcessingError, Column
 #     PermissionDenied,
 # )
 
+NON_DIGITS = re.compile(r"\D")
+# same markers pandas was told to treat as missing values
+CSV_NA_VALUES = {"", ".", "??", "no value"}
+CONTACT_BATCH_SIZE = 1000
+
+
 def clean_phone_number(text):
-    ph_no = re.sub(r"\D", "", str(text))
+    ph_no = NON_DIGITS.sub("", str(text))
     if ph_no:
         return f"+{ph_no}"
     return ""
 
 
+async def stream_contacts_csv(
+    csv_file: UploadFile,
+    contact_number_column: str = "phone number",
+    contact_name_column: str = "full name",
+    usecols: typing.List[str] = None,
+    batch_size: int = CONTACT_BATCH_SIZE,
+) -> typing.AsyncIterator[typing.List[dict]]:
+    """
+    Stream the contacts of a CSV file in batches, without loading the file.
+
+    The header is read and validated right away, so an invalid file raises
+    before anything is stored. Rows are then read from the spooled upload in
+    batches off the event loop, contact numbers are cleaned, rows without a
+    usable number or with too long values are skipped and repeated numbers
+    only keep their first row, so memory only grows with the set of seen
+    numbers.
+
+    Parameters:
+        - csv_file (UploadFile): CSV file to be processed.
+        - contact_name_column (str): The CSV file header's label for the contact name column.
+        - contact_number_column (str): The CSV file header's label for the contact number column.
+        - usecols (list, optional): List of columns to be used. If None, all columns will be considered.
+        - batch_size (int, optional): Number of contacts yielded at once.
+
+    Returns:
+        AsyncIterator[List[dict]]: Batches of processed contacts keyed by title cased column.
+    """
+    contact_name_column = contact_name_column.title()
+    contact_number_column = contact_number_column.title()
+
+    await csv_file.seek(0)
+    # decodes the spooled upload lazily, unlike io.TextIOWrapper it doesn't
+    # need the readable() SpooledTemporaryFile only has from python 3.11,
+    # and leaves the upload open, it is closed with the request
+    reader = csv.reader(codecs.getreader("utf-8-sig")(csv_file.file))
+    try:
+        header = await run_in_threadpool(next, reader, None)
+    except (csv.Error, UnicodeDecodeError):
+        raise CSVProcessingError()
+    if not header:
+        raise CSVProcessingError()
+    if usecols and not set(usecols).issubset(header):
+        raise CSVProcessingError()
+
+    columns = [
+        (index, column.title())
+        for index, column in enumerate(header)
+        if not usecols or column in usecols
+    ]
+    if contact_number_column not in [column for _, column in columns]:
+        raise ColumnNotFound(
+            f"{contact_number_column} column missing from the csv file!"
+        )
+
+    return _contact_batches(
+        reader,
+        columns,
+        contact_number_column,
+        contact_name_column,
+        batch_size,
+    )
+
+
+async def _contact_batches(
+    reader,
+    columns: typing.List[typing.Tuple[int, str]],
+    contact_number_column: str,
+    contact_name_column: str,
+    batch_size: int,
+) -> typing.AsyncIterator[typing.List[dict]]:
+    seen_numbers: typing.Set[str] = set()
+    while True:
+        try:
+            rows = await run_in_threadpool(
+                lambda: list(islice(reader, batch_size))
+            )
+        except (csv.Error, UnicodeDecodeError):
+            raise CSVProcessingError()
+        if not rows:
+            return
+
+        contacts = []
+        for row in rows:
+            contact = {}
+            for index, column in columns:
+                value = row[index] if index < len(row) else ""
+                contact[column] = "" if value in CSV_NA_VALUES else value
+            number = clean_phone_number(contact[contact_number_column])
+            if (
+                not number
+                or number in seen_numbers
+                or len(number) > 15
+                or len(contact.get(contact_name_column, "")) > 63
+            ):
+                continue
+            seen_numbers.add(number)
+            contact[contact_number_column] = number
+            contacts.append(contact)
+        if contacts:
+            yield contacts
+
+
 async def process_contacts_csv(
     csv_file: UploadFile,
     contact_number_column: str = "phone number",
@@ -27,56 +139,34 @@ async def process_contacts_csv(
     dtype: typing.Dict = None,
 ) -> typing.List[dict]:
     """
-    Process a CSV file containing contact information.
+    Process a CSV file containing contact information into a list, for
+    callers that need every contact at once (e.g. campaign callable data).
+    Imports that only store the contacts should use stream_contacts_csv.
 
     Parameters:
         - csv_file (UploadFile): CSV file to be processed.
         - contact_name_column (str): The CSV file header's label for the contact name column.
         - contact_number_column (str): The CSV file header's label for the contact number column.
         - usecols (list, optional): List of columns to be used. If None, all columns will be considered.
-        - dtype (dict, optional): Dictionary specifying data types for columns.
+        - dtype (dict, optional): Unused, values are always read as strings.
 
     Returns:
         List[dict]: A list of dictionaries representing processed contacts.
     """
     contact_name_column = contact_name_column.title()  # contact name
-    contact_number_column = contact_number_column.title()  # contact number
-
-    # process csv file and get back data frame
-    try:
-        df = await csv_file_to_df(
-            csv_file=csv_file,
-            columns_to_clean=[contact_number_column],
-            usecols=usecols,
-            dtype=dtype,
-        )
-    # Incase of invalid csv, use cols error, catch and raise '400' in resolver
-    except ValueError:
-        raise CSVProcessingError()
 
-    # clean phone number
-    df[contact_number_column] = df[contact_number_column].apply(
-        lambda num: clean_phone_number(num)
+    valid_contacts = []
+    contact_batches = await stream_contacts_csv(
+        csv_file=csv_file,
+        contact_number_column=contact_number_column,
+        contact_name_column=contact_name_column,
+        usecols=usecols,
     )
-
-    # remove duplicates from the contact number column and only keep last occurence
-    df_clean = df.drop_duplicates(subset=contact_number_column, keep="last")
+    async for contacts in contact_batches:
+        valid_contacts.extend(contacts)
 
     # Sort contacts based on contact name in ascending order
-    if contact_name_column in df.columns:
-        df_clean = df_clean.sort_values(by=contact_name_column, ascending=True)
-
-    # convert dataframe into python dictionary
-    all_contacts = df_clean.to_dict("records")
-
-    # saving contact history logs
-    valid_contacts = [
-        contact
-        for contact in all_contacts
-        if not len(contact.get(contact_number_column, "")) > 15
-        and not len(contact.get(contact_name_column, "")) > 63
-    ]
-
+    valid_contacts.sort(key=lambda contact: contact.get(contact_name_column, ""))
     return valid_contacts
 
 # csv files helpers
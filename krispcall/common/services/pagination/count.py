@@ -0,0 +1,96 @@
+"""
+total counts for paginated queries
+
+count modes:
+exact: SELECT count(*) over the query on every page
+cached: exact count kept for COUNT_CACHE_TTL seconds, keyed by the compiled
+    query, its parameters and a scope such as the workspace id
+estimate: planner row estimate, falls back to an exact count when the
+    estimate is below ESTIMATE_THRESHOLD rows so small lists stay exact
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import typing
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable, select
+from sqlalchemy.sql.selectable import Selectable
+
+from krispcall.common.database.connection import DbConnection
+from krispcall.providers.cache import MISSING, TTLCache
+
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATE = "estimate"
+
+COUNT_CACHE_TTL = 30
+ESTIMATE_THRESHOLD = 10000
+
+count_cache = TTLCache(
+    "pagination_count",
+    maxsize=2048,
+    ttl=COUNT_CACHE_TTL,
+    dumps=str,
+    loads=int,
+)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a select, keeps its bind parameters"""
+
+    def __init__(self, statement: Selectable):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimate_count(db: DbConnection, query: Selectable) -> int:
+    """row estimate of the planner, costs a plan instead of a scan"""
+    plan: typing.Any = await db.fetch_val(Explain(query))  # type: ignore
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def exact_count(db: DbConnection, query: Selectable) -> int:
+    total_count = query.alias("total_count")
+    return await db.fetch_val(select([func.count()]).select_from(total_count))
+
+
+def count_cache_key(query: Selectable, scope: typing.Any = None) -> str:
+    """same query text and parameters give the same key"""
+    compiled = query.compile(dialect=postgresql.dialect())
+    params = sorted((name, str(value)) for name, value in compiled.params.items())
+    digest = hashlib.sha1(f"{compiled}|{params}".encode()).hexdigest()
+    return f"{scope}:{digest}"
+
+
+async def count_rows(
+    db: DbConnection,
+    query: Selectable,
+    mode: str = COUNT_EXACT,
+    scope: typing.Any = None,
+    threshold: int = ESTIMATE_THRESHOLD,
+) -> int:
+    if mode == COUNT_ESTIMATE:
+        estimate = await estimate_count(db, query)
+        if estimate >= threshold:
+            return estimate
+        return await exact_count(db, query)
+    if mode == COUNT_CACHED:
+        key = count_cache_key(query, scope)
+        total = await count_cache.get(key)
+        if total is MISSING:
+            total = await exact_count(db, query)
+            await count_cache.set(key, total)
+        return total
+    if mode == COUNT_EXACT:
+        return await exact_count(db, query)
+    raise ValueError(f"unknown count mode {mode}")
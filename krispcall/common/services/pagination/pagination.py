@@ -4,13 +4,15 @@ from __future__ import annotations
 
 import typing
 from krispcall.common.database.connection import DbConnection
+from krispcall.common.services.pagination.count import COUNT_EXACT, count_rows
+from krispcall.common.services.pagination.query import Cursor, KeysetCursor
 from krispcall.common.services.pagination.query_builder import (
     query_builder,
-    get_column,
+    keyset_condition,
     offset_query,
     query_builder_before_paginated,
 )
-from sqlalchemy.sql.expression import select
+from sqlalchemy.sql.expression import exists, select
 from sqlalchemy.sql.selectable import Selectable
 from krispcall.common.models.response_model import (
     OffsetPageInfo,
@@ -21,8 +23,6 @@ from krispcall.common.models.response_model import (
     OffsetPaginationParams,
     OffsetPaginatedResource,
 )
-from datetime import datetime
-from sqlalchemy import func
 
 
 class PaginationError(Exception):
@@ -35,6 +35,12 @@ class CursorPagination(object):
     query: query to execute
     db_conn: database connection
     node_model: model to format data node
+    cursor_column: column the pages are ordered by
+    tiebreak_column: unique column ordering rows with the same cursor value,
+        edges get (cursor, tiebreak) keyset cursors
+    count_mode: None keeps total_count at 0, otherwise one of the
+        count modes of pagination.count
+    count_scope: scope of cached counts, usually the workspace id
     """
 
     def __init__(
@@ -43,38 +49,59 @@ class CursorPagination(object):
         query: Selectable = None, # type: ignore
         node_model=None,
         cursor_column="created_on",
+        tiebreak_column: typing.Optional[str] = "id",
+        count_mode: typing.Optional[str] = None,
+        count_scope: typing.Any = None,
     ):
         self.db = db_conn
         self.query = None
         self.cursor_column = cursor_column
+        self.tiebreak_column = tiebreak_column
+        self.count_mode = count_mode
+        self.count_scope = count_scope
         self.node_model = node_model
         self._query = query
 
     async def resource(self, params: PaginationParams):
+        """fetches one row more than the page, the extra row only tells
+        there is another page in the paging direction
+        """
         limit = self.page_limit(params)
         if limit:
-            return await self.db.fetch_all(query=self.query.limit(limit)) # type: ignore
+            return await self.db.fetch_all(query=self.query.limit(limit + 1)) # type: ignore
         else:
             return await self.db.fetch_all(self.query)
 
     async def total_count(self, initial_query):
-        return 0
-        # self.count = initial_query.alias("count")
-        # count_query = select([func.count()]).select_from(self.count)
-        # return await self.db.fetch_val(count_query)
+        if self.count_mode is None:
+            return 0
+        return await count_rows(
+            self.db, initial_query, self.count_mode, self.count_scope
+        )
 
     async def page(self, params: PaginationParams):
         initial_query_builder = query_builder_before_paginated(
             self._query, params
         )
         self.query = query_builder(
-            initial_query_builder, params, self.cursor_column
+            initial_query_builder,
+            params,
+            self.cursor_column,
+            self.tiebreak_column,
         )
-        edges = await self.edges(params)
+        paging = self.paging_direction(params)
+        limit = self.page_limit(params)
+        resource = list(await self.resource(params))
+        has_more = bool(limit) and len(resource) > limit
+        edges = self.edges(resource[:limit] if limit else resource, paging)
         start_cursor = self.__start_cursor(edges)
         end_cursor = self.__end_cursor(edges)
-        has_next_page = await self.__has_next(params, end_cursor) # type: ignore
-        has_previous_page = await self.__has_previous(params, start_cursor) # type: ignore
+        if paging == "forward":
+            has_next_page = has_more
+            has_previous_page = await self.__has_previous(params, start_cursor) # type: ignore
+        else:
+            has_next_page = await self.__has_next(params, end_cursor) # type: ignore
+            has_previous_page = has_more
         total_count = await self.total_count(initial_query_builder)
         paginated_data = PaginatedResource.construct(
             edges=edges,
@@ -88,27 +115,10 @@ class CursorPagination(object):
         )
         return paginated_data
 
-    async def edges(self, params: PaginationParams):
-        resource = await self.resource(params)
-        paging = self.paging_direction(params)
-        edges = []
-        # for node in resource:
-        #     try:
-        #         print("##### \n", node.get("content"))
-        #         edges.append(
-        #             Edges.construct(
-        #                 cursor=node.get(self.cursor_column, None),
-        #                 node=self.__node(dict(node)),
-        #             )
-        #         )
-        #     except Exception as e:
-        #         print(e)
-        #         print(dir(node))
-        #         print(node)
-        #         continue
+    def edges(self, resource, paging: str):
         edges = [
             Edges.construct(
-                cursor=node.get(self.cursor_column, None),
+                cursor=self.__cursor(node),
                 node=self.__node(node),
             )
             for node in resource
@@ -118,6 +128,17 @@ class CursorPagination(object):
             edges.reverse()
         return edges
 
+    def __cursor(self, node):
+        value = node.get(self.cursor_column, None)
+        tiebreak = (
+            node.get(self.tiebreak_column, None)
+            if self.tiebreak_column
+            else None
+        )
+        if value is None or tiebreak is None:
+            return value
+        return KeysetCursor(value, str(tiebreak))
+
     def __start_cursor(self, edges: typing.List[Edges]):
         try:
             return edges[0].cursor
@@ -135,39 +156,37 @@ class CursorPagination(object):
             return self.node_model(**dict(node))
         return dict(node)
 
-    async def __has_next(self, params: PaginationParams, beyond: datetime):
-        before = params.before
-        query = query_builder_before_paginated(self._query, params).alias(
-            "alias"
-        )
-
+    async def __has_next(self, params: PaginationParams, beyond: Cursor):
+        before = params.before or params.before_with
+        if before is None:
+            # backward pages without a cursor start at the oldest row
+            return False
         if beyond is None:
-            if before is None:
-                return False
             beyond = before
+        return await self.__exists_beyond(params, beyond, "lt")
 
-        cursor = get_column(query, self.cursor_column)
-        beyond_the_limit = await self.db.fetch_all(
-            query=select([query]).where(cursor < beyond)
-        )
-        return bool(beyond_the_limit)
+    async def __has_previous(self, params: PaginationParams, beyond: Cursor):
+        after = params.after or params.after_with
+        if after is None:
+            # forward pages without a cursor start at the newest row
+            return False
+        if beyond is None:
+            beyond = after
+        return await self.__exists_beyond(params, beyond, "gt")
 
-    async def __has_previous(self, params: PaginationParams, beyond: datetime):
-        after = params.after
+    async def __exists_beyond(
+        self, params: PaginationParams, beyond: Cursor, operation: str
+    ) -> bool:
         query = query_builder_before_paginated(self._query, params).alias(
             "alias"
         )
-
-        if beyond is None:
-            if after is None:
-                return False
-            beyond = after
-
-        cursor = get_column(query, self.cursor_column)
-        beyond_the_limit = await self.db.fetch_all(
-            query=select([query]).where(cursor > beyond)
+        condition = keyset_condition(
+            query, self.cursor_column, self.tiebreak_column, beyond, operation
+        )
+        beyond_the_limit = exists(
+            select([1]).select_from(query).where(condition)
         )
-        return bool(beyond_the_limit)
+        return bool(await self.db.fetch_val(query=select([beyond_the_limit])))
 
     def __enter__(self):
         return self
@@ -204,6 +223,8 @@ class OffsetPagination(object):
     parameters:
     query: query to execute
     db_conn: database connection
+    count_mode: how page_info counts the total, see pagination.count
+    count_scope: scope of cached counts, usually the workspace id
     """
 
     def __init__(
@@ -211,10 +232,14 @@ class OffsetPagination(object):
         db_conn: DbConnection,
         query: Selectable = None, # type: ignore
         node_model=None,
+        count_mode: str = COUNT_EXACT,
+        count_scope: typing.Any = None,
     ):
         self.db = db_conn
         self.query = None
         self.node_model = node_model
+        self.count_mode = count_mode
+        self.count_scope = count_scope
         self._query = query
 
     async def resource(self, params: OffsetPaginationParams):
@@ -230,9 +255,9 @@ class OffsetPagination(object):
             return await self.db.fetch_all(query=query)
 
     async def page_info(self, params: OffsetPaginationParams):
-        total_count = self._query.alias("total_count")
-        count_query = select([func.count()]).select_from(total_count)
-        total_count = await self.db.fetch_val(count_query)
+        total_count = await count_rows(
+            self.db, self._query, self.count_mode, self.count_scope
+        )
         edges = await self.edges(params)
 
         return OffsetPaginatedResource.construct(
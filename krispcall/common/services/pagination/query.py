@@ -23,6 +23,17 @@ class QueryModel(BaseModel):
         fields = None
 
 
+class KeysetCursor(typing.NamedTuple):
+    """composite cursor, the row id breaks ties between equal timestamps"""
+
+    value: datetime
+    id: str
+
+
+# plain datetime cursors are still accepted from older clients
+Cursor = typing.Union[KeysetCursor, datetime]
+
+
 class KeysetQueryParam(BaseModel):
     first: str
     second: str
@@ -3,12 +3,14 @@ advanced query builder for filters and sorting
 """
 
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Union, Literal
+from typing import Any, Callable, Dict, List, Optional, Union, Literal
+from uuid import UUID
 from krispcall.common.models.response_model import (
     PaginationParams,
     SearchType,
     OffsetPaginationParams,
 )
+from krispcall.common.services.pagination.query import Cursor, KeysetCursor
 from krispcall.common.services.helper import change_camel_case_to_snake
 import sqlalchemy as sa
 from sqlalchemy.sql.selectable import Selectable
@@ -246,8 +248,36 @@ def query_builder_before_paginated(
     return selectable
 
 
+def keyset_condition(
+    query: Selectable,
+    cursor: str,
+    tiebreak: Optional[str],
+    value: Cursor,
+    operation: str,
+):
+    """compares (cursor, tiebreak) row values when given a keyset cursor,
+    only the cursor column for plain datetime cursors
+    """
+    cursor_column = get_column(query, cursor)
+    if tiebreak and isinstance(value, KeysetCursor):
+        tiebreak_column = get_column(query, tiebreak)
+        tiebreak_value: Any = value.id
+        if getattr(tiebreak_column.type, "as_uuid", False):
+            tiebreak_value = UUID(value.id)
+        return OPERATORS[operation](
+            sa.tuple_(cursor_column, tiebreak_column),
+            (value.value, tiebreak_value),
+        )
+    if isinstance(value, KeysetCursor):
+        value = value.value
+    return OPERATORS[operation](cursor_column, value)
+
+
 def query_builder(
-    query: Selectable, params: PaginationParams, cursor: str = "created_on"
+    query: Selectable,
+    params: PaginationParams,
+    cursor: str = "created_on",
+    tiebreak: Optional[str] = None,
 ) -> Selectable:
     first, after, after_with = params.first, params.after, params.after_with
     before, before_with = params.before, params.before_with
@@ -255,19 +285,29 @@ def query_builder(
     alias = query.alias("query")
     selectable = sa.select([alias])
 
-    cursor_column = get_column(alias, cursor)
-    if first or after:
-        selectable = selectable.order_by(cursor_column.desc())
+    order_columns = [get_column(alias, cursor)]
+    if tiebreak:
+        order_columns.append(get_column(alias, tiebreak))
+    if first or after or after_with:
+        selectable = selectable.order_by(*[c.desc() for c in order_columns])
         if after:
-            selectable = selectable.where(cursor_column < after)
+            selectable = selectable.where(
+                keyset_condition(alias, cursor, tiebreak, after, "lt")
+            )
         elif after_with:
-            selectable = selectable.where(cursor_column <= after_with)
+            selectable = selectable.where(
+                keyset_condition(alias, cursor, tiebreak, after_with, "lte")
+            )
     else:
-        selectable = selectable.order_by(cursor_column)
+        selectable = selectable.order_by(*order_columns)
         if before:
-            selectable = selectable.where(cursor_column > before)
+            selectable = selectable.where(
+                keyset_condition(alias, cursor, tiebreak, before, "gt")
+            )
         elif before_with:
-            selectable = selectable.where(cursor_column >= before_with)
+            selectable = selectable.where(
+                keyset_condition(alias, cursor, tiebreak, before_with, "gte")
+            )
     return selectable
 
 
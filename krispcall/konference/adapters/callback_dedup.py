@@ -0,0 +1,65 @@
+"""
+Deduplication of retried twilio callbacks.
+
+The first delivery of a callback claims its key with SET NX, a retry or a
+duplicate delivery finds the key taken and is answered without processing.
+Keys claimed in this process are mirrored in a bounded LRU so repeats that
+land on the process that took the first delivery don't reach redis. A callback that failed releases
+its key so the twilio retry is processed.
+"""
+from __future__ import annotations
+
+import typing
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+
+DEDUP_TTL_SECONDS = 3600
+LOCAL_DEDUP_SIZE = 10_000
+
+_seen: "OrderedDict[str, None]" = OrderedDict()
+
+
+def callback_key(form: typing.Mapping[str, typing.Any]) -> typing.Optional[str]:
+    """Identity of a twilio callback, None for callbacks without one"""
+    if form.get("ConferenceSid") and form.get("StatusCallbackEvent"):
+        if form.get("SequenceNumber") is None:
+            return None
+        return (
+            f"conference:{form['ConferenceSid']}:{form['SequenceNumber']}"
+            f":{form['StatusCallbackEvent']}"
+        )
+    if form.get("RecordingSid") and form.get("RecordingStatus"):
+        return f"recording:{form['RecordingSid']}:{form['RecordingStatus']}"
+    if form.get("CallSid") and form.get("CallStatus"):
+        return f"call:{form['CallSid']}:{form['CallStatus']}"
+    return None
+
+
+class CallbackDedup:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    @staticmethod
+    def dedup_key(key: str) -> str:
+        return f"callback_dedup:{key}"
+
+    async def claim(self, key: str) -> bool:
+        """True for the first delivery of the callback"""
+        if key in _seen:
+            _seen.move_to_end(key)
+            return False
+        claimed = await self.cache.set(
+            self.dedup_key(key), 1, nx=True, ex=DEDUP_TTL_SECONDS
+        )
+        if not claimed:
+            # not mirrored, the owner may still release it
+            return False
+        _seen[key] = None
+        while len(_seen) > LOCAL_DEDUP_SIZE:
+            _seen.popitem(last=False)
+        return True
+
+    async def release(self, key: str) -> None:
+        _seen.pop(key, None)
+        await self.cache.delete(self.dedup_key(key))
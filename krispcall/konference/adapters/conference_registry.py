@@ -0,0 +1,168 @@
+"""
+Registry of campaign conference state fed by the twilio conference callbacks.
+
+The start / end / join / leave callbacks of a campaign conference record its
+sid, status, start and end time and participant count in a redis hash, so
+billing and end of call processing read the state instead of polling the
+twilio REST api. Ended conferences no longer change and are mirrored in
+process. Readers fall back to the REST api when a conference is unknown.
+"""
+from __future__ import annotations
+
+import time
+import typing
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from redis.asyncio import Redis
+
+CONFERENCE_STATE_TTL = 24 * 60 * 60
+# friendly names of the conferences in progress scored by start time
+ACTIVE_CONFERENCES_KEY = "conference_state:active"
+ENDED_MIRROR_SIZE = 4096
+
+CONFERENCE_IN_PROGRESS = "in-progress"
+CONFERENCE_COMPLETED = "completed"
+
+# a late callback never moves an ended conference back to in progress
+RECORD_SCRIPT = """
+local key = KEYS[1]
+if ARGV[1] ~= '' then
+    redis.call('HSET', key, 'sid', ARGV[1])
+end
+if ARGV[2] ~= '' and redis.call('HGET', key, 'status') ~= 'completed' then
+    redis.call('HSET', key, 'status', ARGV[2])
+    if ARGV[2] == 'completed' then
+        redis.call('ZREM', KEYS[2], ARGV[7])
+    else
+        redis.call('ZADD', KEYS[2], 'NX', ARGV[8], ARGV[7])
+    end
+end
+if ARGV[3] ~= '' then
+    redis.call('HSETNX', key, 'started_at', ARGV[3])
+end
+if ARGV[4] ~= '' then
+    redis.call('HSET', key, 'ended_at', ARGV[4])
+end
+if ARGV[5] ~= '0' then
+    redis.call('HINCRBY', key, 'participants', ARGV[5])
+end
+redis.call('EXPIRE', key, ARGV[6])
+return 1
+"""
+
+_ended: "OrderedDict[str, ConferenceState]" = OrderedDict()
+
+
+def _decode(value: typing.Union[bytes, str]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+@dataclass
+class ConferenceState:
+    sid: typing.Optional[str] = None
+    status: typing.Optional[str] = None
+    started_at: typing.Optional[float] = None
+    ended_at: typing.Optional[float] = None
+    participants: int = 0
+
+    @property
+    def duration(self) -> typing.Optional[int]:
+        if self.started_at is None or self.ended_at is None:
+            return None
+        return max(int(self.ended_at - self.started_at), 0)
+
+
+class ConferenceRegistry:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    @staticmethod
+    def conference_key(friendly_name: str) -> str:
+        return f"conference_state:{friendly_name}"
+
+    async def record(
+        self,
+        friendly_name: str,
+        sid: typing.Optional[str] = None,
+        status: typing.Optional[str] = None,
+        started_at: typing.Optional[float] = None,
+        ended_at: typing.Optional[float] = None,
+        participants_delta: int = 0,
+    ) -> None:
+        await self.cache.eval(
+            RECORD_SCRIPT,
+            2,
+            self.conference_key(friendly_name),
+            ACTIVE_CONFERENCES_KEY,
+            sid or "",
+            status or "",
+            "" if started_at is None else started_at,
+            "" if ended_at is None else ended_at,
+            participants_delta,
+            CONFERENCE_STATE_TTL,
+            friendly_name,
+            time.time(),
+        )
+
+    async def active_count(self) -> int:
+        """Conferences in progress, the ones never ended expire with their state"""
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(
+                ACTIVE_CONFERENCES_KEY, "-inf", time.time() - CONFERENCE_STATE_TTL
+            )
+            pipe.zcard(ACTIVE_CONFERENCES_KEY)
+            _, count = await pipe.execute()
+        return count
+
+    async def get(self, friendly_name: str) -> typing.Optional[ConferenceState]:
+        """Returns the recorded state, None when no callback was recorded"""
+        state = _ended.get(friendly_name)
+        if state is not None:
+            _ended.move_to_end(friendly_name)
+            return state
+        raw = await self.cache.hgetall(self.conference_key(friendly_name))
+        return self._state(friendly_name, raw)
+
+    async def get_many(
+        self, friendly_names: typing.List[str]
+    ) -> typing.Dict[str, typing.Optional[ConferenceState]]:
+        """get() of every conference in one round trip"""
+        states: typing.Dict[str, typing.Optional[ConferenceState]] = {}
+        missing = []
+        for friendly_name in friendly_names:
+            state = _ended.get(friendly_name)
+            if state is None:
+                missing.append(friendly_name)
+            else:
+                states[friendly_name] = state
+        if missing:
+            async with self.cache.pipeline(transaction=False) as pipe:
+                for friendly_name in missing:
+                    pipe.hgetall(self.conference_key(friendly_name))
+                raws = await pipe.execute()
+            for friendly_name, raw in zip(missing, raws):
+                states[friendly_name] = self._state(friendly_name, raw)
+        return states
+
+    @staticmethod
+    def _state(
+        friendly_name: str, raw: typing.Dict
+    ) -> typing.Optional[ConferenceState]:
+        if not raw:
+            return None
+        fields = {_decode(k): _decode(v) for k, v in raw.items()}
+        state = ConferenceState(
+            sid=fields.get("sid"),
+            status=fields.get("status"),
+            started_at=float(fields["started_at"])
+            if "started_at" in fields
+            else None,
+            ended_at=float(fields["ended_at"]) if "ended_at" in fields else None,
+            participants=int(fields.get("participants", 0)),
+        )
+        if state.status == CONFERENCE_COMPLETED:
+            _ended[friendly_name] = state
+            while len(_ended) > ENDED_MIRROR_SIZE:
+                _ended.popitem(last=False)
+        return state
@@ -0,0 +1,71 @@
+"""
+Redis staging area of the agent dials a running campaign is about to place.
+
+While a conference is live the worker prepares the next conversations of the
+campaign, the conference twiml, encoded callback data, client params and the
+id of the agent participant row, and keeps them in a per campaign hash keyed
+by conversation id. The dial that follows the conference only pops its entry
+and posts it to twilio.
+"""
+from __future__ import annotations
+
+import pickle
+import typing
+from dataclasses import dataclass
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+DIAL_STAGE_TTL_SECONDS = 900
+
+
+@dataclass
+class StagedDial:
+    conversation_id: UUID
+    call_to: str
+    call_from: str
+    callback_data: str
+    twiml: str
+    params: typing.Dict[str, typing.Any]
+    participant_call_id: str
+
+
+class DialStage:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    @staticmethod
+    def stage_key(campaign_id: str) -> str:
+        return f"dial_stage:{campaign_id}"
+
+    async def put(self, campaign_id: UUID, dials: typing.List[StagedDial]) -> None:
+        if not dials:
+            return
+        key = self.stage_key(str(campaign_id))
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={str(dial.conversation_id): pickle.dumps(dial) for dial in dials},
+            )
+            pipe.expire(key, DIAL_STAGE_TTL_SECONDS)
+            await pipe.execute()
+
+    async def has(self, campaign_id: UUID, conversation_id: UUID) -> bool:
+        return bool(
+            await self.cache.hexists(
+                self.stage_key(str(campaign_id)), str(conversation_id)
+            )
+        )
+
+    async def pop(
+        self, campaign_id: UUID, conversation_id: UUID
+    ) -> typing.Optional[StagedDial]:
+        key = self.stage_key(str(campaign_id))
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hget(key, str(conversation_id))
+            pipe.hdel(key, str(conversation_id))
+            payload, _ = await pipe.execute()
+        return None if payload is None else pickle.loads(payload)
+
+    async def clear(self, campaign_id: UUID) -> None:
+        await self.cache.delete(self.stage_key(str(campaign_id)))
@@ -0,0 +1,191 @@
+"""
+Redis sorted set scheduler of the next dial of every running campaign.
+
+A campaign has at most one pending dial, the set is scored by the time it is
+due and its job arguments are kept in a hash. The worker timer loop claims
+due dials atomically, so any number of workers can poll the set and every
+dial fires once. A claim leases the dial instead of removing it: the entry
+is pushed DIAL_LEASE_SECONDS ahead and removed when the dial succeeded, so a
+worker dying mid dial leaves it to be claimed again. Failed dials are
+retried up to DIAL_MAX_ATTEMPTS. Pending dials can be brought forward (skip
+cooldown) or cancelled (campaign paused / ended).
+"""
+from __future__ import annotations
+
+import pickle
+import time
+import typing
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+DIAL_TIMER_DUE_KEY = "dial_timer:due"
+DIAL_TIMER_DIALS_KEY = "dial_timer:dials"
+# claim token and attempts of the dials in flight
+DIAL_TIMER_LEASES_KEY = "dial_timer:leases"
+DIAL_TIMER_ATTEMPTS_KEY = "dial_timer:attempts"
+DIAL_CLAIM_BATCH_SIZE = 100
+# longer than a dial takes, a dial still leased after it is claimed again
+DIAL_LEASE_SECONDS = 60
+DIAL_RETRY_SECONDS = 5
+DIAL_MAX_ATTEMPTS = 3
+
+# leases the due dials, returns a flat member, payload, attempts list
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local claimed = {}
+for _, member in ipairs(due) do
+    local payload = redis.call('HGET', KEYS[2], member)
+    if payload then
+        redis.call('ZADD', KEYS[1], ARGV[1] + ARGV[3], member)
+        redis.call('HSET', KEYS[3], member, ARGV[4])
+        local attempts = redis.call('HINCRBY', KEYS[4], member, 1)
+        table.insert(claimed, member)
+        table.insert(claimed, payload)
+        table.insert(claimed, attempts)
+    else
+        redis.call('ZREM', KEYS[1], member)
+    end
+end
+return claimed
+"""
+
+# drops the dial when it is still the one claimed with the token
+COMPLETE_SCRIPT = """
+if redis.call('HGET', KEYS[3], ARGV[1]) == ARGV[2] then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    redis.call('HDEL', KEYS[4], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# releases the lease of a failed dial and makes it due again later
+RETRY_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) == ARGV[2] then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# brings a pending dial forward, not one already being dialed
+FIRE_NOW_SCRIPT = """
+if redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then
+    return 0
+end
+return redis.call('ZADD', KEYS[1], 'XX', 'CH', 0, ARGV[1])
+"""
+
+
+def _decode(value: typing.Union[bytes, str]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class DialTimer:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    async def schedule(
+        self,
+        campaign_id: UUID,
+        args: typing.List[typing.Any],
+        delay: float,
+    ) -> None:
+        """Replaces the pending dial of the campaign"""
+        member = str(campaign_id)
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hset(DIAL_TIMER_DIALS_KEY, member, pickle.dumps(args))
+            pipe.hdel(DIAL_TIMER_LEASES_KEY, member)
+            pipe.hdel(DIAL_TIMER_ATTEMPTS_KEY, member)
+            pipe.zadd(DIAL_TIMER_DUE_KEY, {member: time.time() + delay})
+            await pipe.execute()
+
+    async def fire_now(self, campaign_id: UUID) -> bool:
+        """Makes the pending dial of the campaign due, False without one or
+        while it is being dialed
+        """
+        changed = await self.cache.eval(
+            FIRE_NOW_SCRIPT,
+            2,
+            DIAL_TIMER_DUE_KEY,
+            DIAL_TIMER_LEASES_KEY,
+            str(campaign_id),
+        )
+        return bool(changed)
+
+    async def cancel(self, campaign_id: UUID) -> None:
+        member = str(campaign_id)
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.zrem(DIAL_TIMER_DUE_KEY, member)
+            pipe.hdel(DIAL_TIMER_DIALS_KEY, member)
+            pipe.hdel(DIAL_TIMER_LEASES_KEY, member)
+            pipe.hdel(DIAL_TIMER_ATTEMPTS_KEY, member)
+            await pipe.execute()
+
+    async def claim_due(
+        self, token: str
+    ) -> typing.List[typing.Tuple[str, typing.List[typing.Any], int]]:
+        """Leases the due dials to token, returns (campaign id, job
+        arguments, attempt) of each
+        """
+        claimed = await self.cache.eval(
+            CLAIM_SCRIPT,
+            4,
+            DIAL_TIMER_DUE_KEY,
+            DIAL_TIMER_DIALS_KEY,
+            DIAL_TIMER_LEASES_KEY,
+            DIAL_TIMER_ATTEMPTS_KEY,
+            time.time(),
+            DIAL_CLAIM_BATCH_SIZE,
+            DIAL_LEASE_SECONDS,
+            token,
+        )
+        return [
+            (_decode(claimed[i]), pickle.loads(claimed[i + 1]), int(claimed[i + 2]))
+            for i in range(0, len(claimed), 3)
+        ]
+
+    async def complete(self, campaign_id: str, token: str) -> bool:
+        """Removes a dial claimed with token, kept when it was rescheduled"""
+        return bool(
+            await self.cache.eval(
+                COMPLETE_SCRIPT,
+                4,
+                DIAL_TIMER_DUE_KEY,
+                DIAL_TIMER_DIALS_KEY,
+                DIAL_TIMER_LEASES_KEY,
+                DIAL_TIMER_ATTEMPTS_KEY,
+                campaign_id,
+                token,
+            )
+        )
+
+    async def retry(self, campaign_id: str, token: str, attempt: int) -> bool:
+        """Makes a failed dial due again, removes it after DIAL_MAX_ATTEMPTS"""
+        if attempt >= DIAL_MAX_ATTEMPTS:
+            await self.complete(campaign_id, token)
+            return False
+        return bool(
+            await self.cache.eval(
+                RETRY_SCRIPT,
+                2,
+                DIAL_TIMER_DUE_KEY,
+                DIAL_TIMER_LEASES_KEY,
+                campaign_id,
+                token,
+                time.time() + DIAL_RETRY_SECONDS,
+            )
+        )
+
+    async def seconds_until_next(self) -> typing.Optional[float]:
+        """Seconds until the earliest pending dial, None without any"""
+        earliest = await self.cache.zrange(
+            DIAL_TIMER_DUE_KEY, 0, 0, withscores=True
+        )
+        if not earliest:
+            return None
+        return max(earliest[0][1] - time.time(), 0)
@@ -51,6 +51,8 @@ campaign_conversation = sa.Table(
     sa.Column("contact_number", sa.String(255), nullable=False),
     sa.Column("skipped", sa.Boolean(), nullable=False, default=False),
     sa.Column("skip_cooldown", sa.Boolean(), nullable=False, default=False),
+    # SequenceNumber of the buffered callback that last set the status
+    sa.Column("status_sequence", sa.Integer(), nullable=True),
     sa.Column(
         "created_at",
         sa.TIMESTAMP(timezone=True),
@@ -85,6 +87,7 @@ participant_calls = sa.Table(
         nullable=False,
         default=TwilioCallStatus.queued.value,
     ),
+    sa.Column("status_sequence", sa.Integer(), nullable=True),
     sa.Column("created_by", postgresql.UUID(as_uuid=False)),
     sa.Column("recording_duration", sa.Integer, nullable=True, default=0),
     sa.Column("call_duration", sa.Integer, nullable=True, default=0),
@@ -102,3 +105,36 @@ participant_calls = sa.Table(
     ),
     sa.ForeignKeyConstraint(["conversation_id"], ["campaign_conversation.id"]),
 )
+
+# lookup indexes, created by revision b3c5e1f07a92
+sa.Index(
+    "ix_campaign_conversation_campaign_id_active_status",
+    campaign_conversation.c.campaign_id,
+    campaign_conversation.c.status,
+    postgresql_where=campaign_conversation.c.status.in_(
+        ["in_progress", "in_queue", "pending", "on_hold"]
+    ),
+)
+sa.Index(
+    "ix_campaign_conversation_campaign_id_initial_call_sequence",
+    campaign_conversation.c.campaign_id,
+    campaign_conversation.c.initial_call,
+    campaign_conversation.c.sequence_number,
+)
+sa.Index(
+    "uq_campaign_conversation_campaign_id_initial_sequence",
+    campaign_conversation.c.campaign_id,
+    campaign_conversation.c.sequence_number,
+    unique=True,
+    postgresql_where=campaign_conversation.c.initial_call,
+)
+sa.Index(
+    "ix_campaign_conversation_campaign_id_contact_number",
+    campaign_conversation.c.campaign_id,
+    campaign_conversation.c.contact_number,
+)
+sa.Index("ix_campaign_conversation_twi_sid", campaign_conversation.c.twi_sid)
+sa.Index(
+    "ix_participant_calls_conversation_id", participant_calls.c.conversation_id
+)
+sa.Index("ix_participant_calls_twi_sid", participant_calls.c.twi_sid)
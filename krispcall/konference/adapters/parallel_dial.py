@@ -0,0 +1,170 @@
+"""
+Redis side state of parallel dialing.
+
+An agent conference of a parallel dialing campaign rings several contacts at
+once. The legs of a conference live in one hash and the first leg answered by
+a human claims the conference with HSETNX, every other leg is dropped.
+
+Dialed, answered and abandoned counts of every campaign are kept in a hash
+that is halved once it grows past DIAL_RATIO_WINDOW dialed legs, so the ratio
+follows the recent answer rate, and are turned into the number of lines to
+ring for the next agent conference.
+"""
+from __future__ import annotations
+
+import math
+import typing
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+PARALLEL_DIAL_TTL_SECONDS = 3600
+DIAL_RATIO_TTL_SECONDS = 7 * 24 * 3600
+# dialed legs after which the campaign counters are halved
+DIAL_RATIO_WINDOW = 200
+# share of human answered legs that may be dropped for lack of an agent
+ABANDON_RATE_TARGET = 0.03
+# AnsweredBy values of twilio machine detection bridged to the agent
+HUMAN_ANSWERED_BY = ("human", "unknown", None)
+
+# adds the counts and halves all of them once dialed passes the window
+RECORD_SCRIPT = """
+redis.call('HINCRBY', KEYS[1], 'dialed', ARGV[1])
+redis.call('HINCRBY', KEYS[1], 'answered', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'abandoned', ARGV[3])
+local dialed = tonumber(redis.call('HGET', KEYS[1], 'dialed'))
+if dialed > tonumber(ARGV[4]) then
+    for _, field in ipairs({'dialed', 'answered', 'abandoned'}) do
+        local value = tonumber(redis.call('HGET', KEYS[1], field) or '0')
+        redis.call('HSET', KEYS[1], field, math.floor(value / 2))
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return dialed
+"""
+
+
+def _decode(value: typing.Union[bytes, str]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def dial_lines(
+    dialed: int,
+    answered: int,
+    abandoned: int,
+    max_lines: int,
+    abandon_target: float = ABANDON_RATE_TARGET,
+) -> int:
+    """Lines to ring so one human answers per agent conference on average,
+    scaled down while the abandon rate is over the target
+    """
+    # smoothed so a campaign without history starts at two lines
+    answer_rate = (answered + 1) / (dialed + 2)
+    lines = 1 / answer_rate
+    abandon_rate = abandoned / answered if answered else 0
+    if abandon_rate > abandon_target:
+        lines *= abandon_target / abandon_rate
+    return max(1, min(max_lines, math.floor(lines)))
+
+
+class ParallelDial:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    @staticmethod
+    def legs_key(conference: str) -> str:
+        return f"parallel_dial:{conference}"
+
+    @staticmethod
+    def stats_key(campaign_id: str) -> str:
+        return f"parallel_dial:stats:{campaign_id}"
+
+    async def start(
+        self,
+        conference: str,
+        agent_call_sid: str,
+        legs: typing.Dict[str, str],
+    ) -> None:
+        """Saves the legs (call sid -> conversation id) rung for the conference"""
+        key = self.legs_key(conference)
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={
+                    "agent": agent_call_sid,
+                    **{f"leg:{sid}": conversation for sid, conversation in legs.items()},
+                },
+            )
+            # a leg may have ended before the legs were saved
+            pipe.hincrby(key, "pending", len(legs))
+            pipe.expire(key, PARALLEL_DIAL_TTL_SECONDS)
+            await pipe.execute()
+
+    async def is_parallel(self, conference: str) -> bool:
+        return bool(await self.cache.exists(self.legs_key(conference)))
+
+    async def agent_call(self, conference: str) -> typing.Optional[str]:
+        value = await self.cache.hget(self.legs_key(conference), "agent")
+        return None if value is None else _decode(value)
+
+    async def legs(self, conference: str) -> typing.Dict[str, str]:
+        values = await self.cache.hgetall(self.legs_key(conference))
+        return {
+            _decode(field)[len("leg:") :]: _decode(value)
+            for field, value in values.items()
+            if _decode(field).startswith("leg:")
+        }
+
+    async def claim(self, conference: str, conversation: str) -> bool:
+        """True for the first answered leg only"""
+        return bool(
+            await self.cache.hsetnx(self.legs_key(conference), "winner", conversation)
+        )
+
+    async def winner(self, conference: str) -> typing.Optional[str]:
+        value = await self.cache.hget(self.legs_key(conference), "winner")
+        return None if value is None else _decode(value)
+
+    async def drop(self, conference: str, call_sid: str, status: str) -> None:
+        """Remembers the conversation status of a leg hung up on answer"""
+        await self.cache.hset(self.legs_key(conference), f"dropped:{call_sid}", status)
+
+    async def dropped_status(
+        self, conference: str, call_sid: str
+    ) -> typing.Optional[str]:
+        value = await self.cache.hget(
+            self.legs_key(conference), f"dropped:{call_sid}"
+        )
+        return None if value is None else _decode(value)
+
+    async def leg_ended(self, conference: str) -> int:
+        """Returns the number of legs still ringing or talking"""
+        return await self.cache.hincrby(self.legs_key(conference), "pending", -1)
+
+    async def record(
+        self,
+        campaign_id: typing.Union[UUID, str],
+        dialed: int = 0,
+        answered: int = 0,
+        abandoned: int = 0,
+    ) -> None:
+        await self.cache.eval(
+            RECORD_SCRIPT,
+            1,
+            self.stats_key(str(campaign_id)),
+            dialed,
+            answered,
+            abandoned,
+            DIAL_RATIO_WINDOW,
+            DIAL_RATIO_TTL_SECONDS,
+        )
+
+    async def lines(self, campaign_id: typing.Union[UUID, str], max_lines: int) -> int:
+        values = await self.cache.hgetall(self.stats_key(str(campaign_id)))
+        counts = {_decode(field): int(value) for field, value in values.items()}
+        return dial_lines(
+            dialed=counts.get("dialed", 0),
+            answered=counts.get("answered", 0),
+            abandoned=counts.get("abandoned", 0),
+            max_lines=max_lines,
+        )
@@ -11,7 +11,10 @@ from krispcall.konference.adapters.protobufs import (
     outbound_call_pb2_grpc,
 )
 from krispcall.common.utils.shortid import ShortId
+from krispcall.providers.cache import MISSING, TTLCache
+from krispcall.providers.grpc.channels import RPC_TIMEOUT_SECONDS, get_channel
 from krispcall.providers.rpcaddress import get_billing_rpc_address, get_foundation_rpc_address
+from krispcall.twilio.twilio_requests import on_auth_error
 
 
 BILLING_RPC_LOCAL_ADDRESS = "[::]:8005"
@@ -20,6 +23,9 @@ BILLING_RPC_REMOTE_ADDRESS = "krispcall-billinggrpc-service:8005"
 FOUNDATION_RPC_LOCAL_ADDRESS = "[::]:8003"
 FOUNDATION_RPC_REMOTE_ADDRESS = "krispcall-grpc-service:8003"
 
+PROVIDER_DETAILS_CACHE_TTL = 300
+PROVIDER_DETAILS_CACHE_SIZE = 1024
+
 
 @dataclass
 class PlanSubscriptionResponse:
@@ -36,7 +42,7 @@ class FoundationRPCStub(object):
         """Constructor.
 
         Args:
-            channel: A grpc.Channel.
+            channel: A grpc.aio.Channel.
         """
         self.GetProviderDetails = channel.unary_unary(
             "/foundation.FoundationRPC/GetProviderDetails",
@@ -55,7 +61,42 @@ class FoundationRPCStub(object):
         )
 
 
+provider_details_cache = TTLCache(
+    name="provider_details",
+    maxsize=PROVIDER_DETAILS_CACHE_SIZE,
+    ttl=PROVIDER_DETAILS_CACHE_TTL,
+    dumps=lambda details: details.SerializeToString(),
+    loads=foundation__pb2.ProviderDetails.FromString,
+)
+
+
 async def get_provider_details(workspace_id: ShortId):
+    """Returns the provider details of the workspace,
+    served from provider_details_cache when possible
+    """
+    details = await provider_details_cache.get(str(workspace_id))
+    if details is MISSING:
+        details = await fetch_provider_details(workspace_id)
+        await provider_details_cache.set(str(workspace_id), details)
+    return details
+
+
+async def invalidate_provider_details(workspace_id: ShortId) -> None:
+    """Call when the workspace provider credentials are rotated"""
+    await provider_details_cache.invalidate(str(workspace_id))
+
+
+@on_auth_error
+async def invalidate_rejected_provider_details(account_sid: str) -> None:
+    """Drops the cached provider details twilio rejected, the next lookup
+    reads the rotated credentials from foundation
+    """
+    await provider_details_cache.invalidate_where(
+        lambda details: details.auth_id == account_sid
+    )
+
+
+async def fetch_provider_details(workspace_id: ShortId):
     """Sends requests via the grpc channel to foundation
     and fetches the provider details
     @returns
@@ -68,16 +109,14 @@ async def get_provider_details(workspace_id: ShortId):
 
     """
 
-    address = get_foundation_rpc_address()
-
-    with grpc.insecure_channel(address) as channel:
-        stub = FoundationRPCStub(channel)
-        response = stub.GetProviderDetails(
-            foundation__pb2.WorkspaceDetails(
-                workspace_id=workspace_id,
-                provider_type="twilio",
-            )
-        )
+    stub = FoundationRPCStub(get_channel(get_foundation_rpc_address()))
+    response = await stub.GetProviderDetails(
+        foundation__pb2.WorkspaceDetails(
+            workspace_id=workspace_id,
+            provider_type="twilio",
+        ),
+        timeout=RPC_TIMEOUT_SECONDS,
+    )
     return response
 
 
@@ -94,15 +133,13 @@ async def get_plan_subscription(
     success
     """
 
-    address = get_foundation_rpc_address()
-
-    with grpc.insecure_channel(address) as channel:
-        stub = FoundationRPCStub(channel)
-        response = stub.GetPlanSubscription(
-            foundation__pb2.PlanSubscriptionRequest(
-                workspace_id=workspace_id,
-            )
-        )
+    stub = FoundationRPCStub(get_channel(get_foundation_rpc_address()))
+    response = await stub.GetPlanSubscription(
+        foundation__pb2.PlanSubscriptionRequest(
+            workspace_id=workspace_id,
+        ),
+        timeout=RPC_TIMEOUT_SECONDS,
+    )
     return response
 
 
@@ -114,15 +151,13 @@ async def get_workspace_credit(workspace_id: ShortId) -> float:
     float: workspace_credit
     """
 
-    address = get_billing_rpc_address()
-
-    with grpc.insecure_channel(address) as channel:
-        stub = workspace_credit_pb2_grpc.WorkspaceCreditStub(channel)
-        response = stub.GetWorkspaceCredit(
-            workspace_credit_pb2.WorkspaceCreditRequest(
-                workspace_id=workspace_id
-            )
-        )
+    stub = workspace_credit_pb2_grpc.WorkspaceCreditStub(
+        get_channel(get_billing_rpc_address())
+    )
+    response = await stub.GetWorkspaceCredit(
+        workspace_credit_pb2.WorkspaceCreditRequest(workspace_id=workspace_id),
+        timeout=RPC_TIMEOUT_SECONDS,
+    )
     return float(response.workspace_credit)
 
 
@@ -130,28 +165,26 @@ async def call_charge_transaction(data: CampaignOutboundCallRequest):
     """Sends requests via the grpc channel to execute charge transaction"""
 
     try:
-        address = get_billing_rpc_address()
-
-        with grpc.insecure_channel(address) as channel:
-            stub = outbound_call_pb2_grpc.CampaignOutboundCallChargeStub(
-                channel
-            )
+        stub = outbound_call_pb2_grpc.CampaignOutboundCallChargeStub(
+            get_channel(get_billing_rpc_address())
+        )
 
-            response: outbound_call_pb2.GrpcResponse = (
-                stub.ExecutePaymentTransaction(
-                    outbound_call_pb2.CampiagnOutboundCallRequest(
-                        workspace_id=str(data.workspace_id),
-                        call_sid=str(data.call_sid),
-                        child_call_sid=str(data.child_call_sid),
-                        conference_sid=str(data.conference_sid),
-                        from_=data.from_,
-                        to=data.to,
-                        total_participants=data.total_participants,
-                        billing_types=list(set(data.billing_types)),
-                        remarks=data.remarks,
-                    )
-                )
+        response: outbound_call_pb2.GrpcResponse = (
+            await stub.ExecutePaymentTransaction(
+                outbound_call_pb2.CampiagnOutboundCallRequest(
+                    workspace_id=str(data.workspace_id),
+                    call_sid=str(data.call_sid),
+                    child_call_sid=str(data.child_call_sid),
+                    conference_sid=str(data.conference_sid),
+                    from_=data.from_,
+                    to=data.to,
+                    total_participants=data.total_participants,
+                    billing_types=list(set(data.billing_types)),
+                    remarks=data.remarks,
+                ),
+                timeout=RPC_TIMEOUT_SECONDS,
             )
+        )
         return response
     except Exception as e:
         print("Exception on grpc", e)
@@ -3,9 +3,10 @@ import datetime
 import asyncio
 import typing
 from uuid import UUID
-from sqlalchemy.dialects import postgresql
 from krispcall.konference.domain import models
 from krispcall.konference.adapters import orm
+from krispcall.konference.adapters.status_buffer import FINAL_STATUS_SEQUENCE
+from krispcall.common.database.bulk import copy_records
 from krispcall.common.database.connection import DbConnection
 
 
@@ -38,8 +39,7 @@ class CampaignConversationRepository:
             }
             for model in data
         ]
-        query = postgresql.insert(orm.campaign_conversation).values(records)
-        await self.db.execute(query=query)
+        await copy_records(self.db, orm.campaign_conversation, records)
 
     async def bulk_complete(self, campaign_id: UUID, st: typing.List[str]):
         query = f"""
@@ -149,15 +149,66 @@ class CampaignConversationRepository:
             reason_code=record["reason_code"],
         )  # type: ignore
 
-    async def update_conversation_status(self, model: models.CampaignConversation):
-        """Updates the conversation status according to twilio conference status"""
+    async def update_conversation_status(
+        self,
+        model: models.CampaignConversation,
+        status_sequence: typing.Optional[int] = None,
+    ):
+        """Updates the conversation status according to twilio conference status,
+        status_sequence is stored when given so buffered callbacks can't
+        overwrite it
+        """
+        values: typing.Dict[str, typing.Any] = {"status": model.status}
+        if status_sequence is not None:
+            values["status_sequence"] = status_sequence
         await self.db.execute(
             query=orm.campaign_conversation.update().where(
                 orm.campaign_conversation.c.id == model.id_
             ),
-            values={"status": model.status},
+            values=values,
         )
 
+    async def bulk_update_status(
+        self, statuses: typing.Dict[str, typing.Tuple[str, typing.Optional[int]]]
+    ):
+        """Sets the status of many conversations with one statement,
+        statuses maps conversation id to conference status and the twilio
+        SequenceNumber it was reported with, rows already written from a
+        later callback are left alone
+        """
+        if not statuses:
+            return
+        rows = []
+        values: typing.Dict[str, typing.Any] = {}
+        for index, (conversation_id, (status, sequence)) in enumerate(
+            statuses.items()
+        ):
+            rows.append(
+                f"(CAST(:id_{index} AS uuid), :status_{index}, "
+                f"CAST(:sequence_{index} AS integer))"
+            )
+            values[f"id_{index}"] = str(conversation_id)
+            values[f"status_{index}"] = status
+            values[f"sequence_{index}"] = sequence
+        query = f"""
+            UPDATE campaign_conversation AS cc
+            SET status = CAST(v.status AS conference_status_enum),
+                status_sequence = COALESCE(v.sequence, cc.status_sequence)
+            FROM (VALUES {", ".join(rows)}) AS v(id, status, sequence)
+            WHERE cc.id = v.id
+            AND (
+                cc.status_sequence < v.sequence
+                OR (cc.status_sequence IS NULL AND v.sequence IS NOT NULL)
+                OR (
+                    v.sequence IS NULL
+                    AND cc.status <> CAST(v.status AS conference_status_enum)
+                    AND cc.status_sequence IS DISTINCT FROM :final_sequence
+                )
+            );
+            """
+        values["final_sequence"] = FINAL_STATUS_SEQUENCE
+        await self.db.execute(query=query, values=values)
+
     async def update_conversation_status_with_reason(
         self, model: models.CampaignConversation
     ):
@@ -287,6 +338,45 @@ class ParticipantCallRepository:
             values={"status": status},
         )
 
+    async def bulk_update_status_by_twi_sid(
+        self, statuses: typing.Dict[str, typing.Tuple[str, typing.Optional[int]]]
+    ):
+        """Sets the status of many participant calls with one statement,
+        statuses maps twilio call sid to call status and the SequenceNumber
+        it was reported with, rows already written from a later callback
+        are left alone
+        """
+        if not statuses:
+            return
+        rows = []
+        values: typing.Dict[str, typing.Any] = {}
+        for index, (twi_sid, (status, sequence)) in enumerate(statuses.items()):
+            rows.append(
+                f"(:twi_sid_{index}, :status_{index}, "
+                f"CAST(:sequence_{index} AS integer))"
+            )
+            values[f"twi_sid_{index}"] = twi_sid
+            values[f"status_{index}"] = status
+            values[f"sequence_{index}"] = sequence
+        query = f"""
+            UPDATE participant_calls AS pc
+            SET status = CAST(v.status AS twilio_call_status_enum),
+                status_sequence = COALESCE(v.sequence, pc.status_sequence)
+            FROM (VALUES {", ".join(rows)}) AS v(twi_sid, status, sequence)
+            WHERE pc.twi_sid = v.twi_sid
+            AND (
+                pc.status_sequence < v.sequence
+                OR (pc.status_sequence IS NULL AND v.sequence IS NOT NULL)
+                OR (
+                    v.sequence IS NULL
+                    AND pc.status <> CAST(v.status AS twilio_call_status_enum)
+                    AND pc.status_sequence IS DISTINCT FROM :final_sequence
+                )
+            );
+            """
+        values["final_sequence"] = FINAL_STATUS_SEQUENCE
+        await self.db.execute(query=query, values=values)
+
     async def update_recording_url(self, model: models.ParticipantCall):
         """Updates recording url as call recording url"""
         await self.db.execute(
@@ -0,0 +1,176 @@
+"""
+Redis backed live state of a running campaign loop.
+
+Scalar campaign fields live in one hash, conversations live in a hash keyed by
+sequence number with secondary indexes on conference twi_sid and contact
+number, so every webhook only touches the fields it needs.
+"""
+from __future__ import annotations
+
+import json
+import typing
+
+from redis.asyncio import Redis
+
+CONVERSATION_WRITE_CHUNK = 1000
+# a paused or ended campaign keeps its state this long, so callbacks of the
+# calls still in flight see the terminal status and stop the loop
+STOPPED_STATE_TTL_SECONDS = 24 * 60 * 60
+
+
+def _decode(value: typing.Union[bytes, str]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class CampaignStateStore:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    @staticmethod
+    def campaign_key(campaign_id: str) -> str:
+        return f"campaign:{campaign_id}"
+
+    @staticmethod
+    def conversations_key(campaign_id: str) -> str:
+        return f"campaign:{campaign_id}:conversations"
+
+    @staticmethod
+    def twi_sid_index_key(campaign_id: str) -> str:
+        return f"campaign:{campaign_id}:twi_sid"
+
+    @staticmethod
+    def number_index_key(campaign_id: str) -> str:
+        return f"campaign:{campaign_id}:contact_number"
+
+    def _keys(self, campaign_id: str) -> typing.List[str]:
+        return [
+            self.campaign_key(campaign_id),
+            self.conversations_key(campaign_id),
+            self.twi_sid_index_key(campaign_id),
+            self.number_index_key(campaign_id),
+        ]
+
+    async def save(
+        self,
+        campaign_id: str,
+        state: typing.Dict[str, typing.Any],
+        conversations: typing.List[typing.Dict[str, typing.Any]],
+    ) -> None:
+        """Replaces the whole campaign state, used when a loop (re)starts"""
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.delete(*self._keys(campaign_id))
+            pipe.hset(
+                self.campaign_key(campaign_id),
+                mapping={k: json.dumps(v) for k, v in state.items()},
+            )
+            for start in range(0, len(conversations), CONVERSATION_WRITE_CHUNK):
+                chunk = conversations[start : start + CONVERSATION_WRITE_CHUNK]
+                pipe.hset(
+                    self.conversations_key(campaign_id),
+                    mapping={
+                        str(item["sequence_number"]): json.dumps(item)
+                        for item in chunk
+                    },
+                )
+                pipe.hset(
+                    self.twi_sid_index_key(campaign_id),
+                    mapping={
+                        str(item["twi_sid"]): item["sequence_number"]
+                        for item in chunk
+                    },
+                )
+            # keep the first conversation of a number, as a sequential scan would
+            for item in conversations:
+                if not item.get("contact_number"):
+                    continue
+                pipe.hsetnx(
+                    self.number_index_key(campaign_id),
+                    item["contact_number"],
+                    item["sequence_number"],
+                )
+            await pipe.execute()
+
+    async def get(self, campaign_id: str) -> typing.Dict[str, typing.Any]:
+        """Returns the scalar campaign fields, empty dict if not running"""
+        values = await self.cache.hgetall(self.campaign_key(campaign_id))
+        return {_decode(k): json.loads(v) for k, v in values.items()}
+
+    async def get_field(self, campaign_id: str, field: str) -> typing.Any:
+        value = await self.cache.hget(self.campaign_key(campaign_id), field)
+        return None if value is None else json.loads(value)
+
+    async def update(
+        self, campaign_id: str, fields: typing.Dict[str, typing.Any]
+    ) -> None:
+        """Updates only the given scalar fields of the campaign"""
+        await self.cache.hset(
+            self.campaign_key(campaign_id),
+            mapping={k: json.dumps(v) for k, v in fields.items()},
+        )
+
+    @staticmethod
+    def skip_cooldown_field(conversation_id: str) -> str:
+        return f"skip_cooldown:{conversation_id}"
+
+    async def skip_cooldown(self, campaign_id: str, conversation_id: str) -> None:
+        """Marks the conversation so the dial after it skips the cool off"""
+        await self.update(
+            campaign_id, {self.skip_cooldown_field(conversation_id): True}
+        )
+
+    async def skips_cooldown(
+        self, campaign_id: str, conversation_ids: typing.List[str]
+    ) -> bool:
+        """True when any of the conversations was marked to skip the cool off"""
+        values = await self.cache.hmget(
+            self.campaign_key(campaign_id),
+            [self.skip_cooldown_field(id_) for id_ in conversation_ids],
+        )
+        return any(value is not None and json.loads(value) for value in values)
+
+    async def delete(self, campaign_id: str) -> None:
+        await self.cache.delete(*self._keys(campaign_id))
+
+    async def expire(
+        self, campaign_id: str, seconds: int = STOPPED_STATE_TTL_SECONDS
+    ) -> None:
+        """Drops the state after seconds, a restart saves it again"""
+        async with self.cache.pipeline(transaction=True) as pipe:
+            for key in self._keys(campaign_id):
+                pipe.expire(key, seconds)
+            await pipe.execute()
+
+    async def get_conversation_by_sequence(
+        self, campaign_id: str, sequence_number: int
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        value = await self.cache.hget(
+            self.conversations_key(campaign_id), str(sequence_number)
+        )
+        return None if value is None else json.loads(value)
+
+    async def _get_conversation_by_index(
+        self, campaign_id: str, index_key: str, field: str
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        sequence_number = await self.cache.hget(index_key, field)
+        if sequence_number is None:
+            return None
+        return await self.get_conversation_by_sequence(
+            campaign_id, int(sequence_number)
+        )
+
+    async def get_conversation_by_twi_sid(
+        self, campaign_id: str, twi_sid: str
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        return await self._get_conversation_by_index(
+            campaign_id, self.twi_sid_index_key(campaign_id), twi_sid
+        )
+
+    async def get_conversation_by_number(
+        self, campaign_id: str, contact_number: str
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        return await self._get_conversation_by_index(
+            campaign_id, self.number_index_key(campaign_id), contact_number
+        )
+
+    async def has_conversations(self, campaign_id: str) -> bool:
+        return bool(await self.cache.exists(self.conversations_key(campaign_id)))
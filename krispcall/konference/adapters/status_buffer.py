@@ -0,0 +1,220 @@
+"""
+Write-behind buffer for call status transitions reported by twilio callbacks.
+
+Webhooks append transitions to a redis stream and return right away, the
+worker reads them in batches through a consumer group and writes each batch
+with one multi-row UPDATE per table. Entries are acknowledged and deleted
+only once the batch is written, a batch that failed or whose worker died
+stays pending and is claimed again after STATUS_CLAIM_IDLE_MS. Only the
+latest transition of every call / conversation in a batch is written,
+picked by twilio SequenceNumber and then arrival order. The UPDATEs store
+that SequenceNumber and skip rows already written from a later callback,
+so a late callback flushed in a later batch never overwrites a newer status.
+Statuses settled by the conversation end job are stored with
+FINAL_STATUS_SEQUENCE and are never overwritten by a flush.
+"""
+from __future__ import annotations
+
+import json
+import typing
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+STATUS_STREAM_KEY = "konference:call_status_stream"
+STATUS_CONSUMER_GROUP = "call_status_writers"
+STATUS_FLUSH_BATCH_SIZE = 500
+# pending entries idle this long belong to a failed flush or a dead worker
+STATUS_CLAIM_IDLE_MS = 30_000
+# list of the buffer before it became a stream, drained into the stream
+LEGACY_BUFFER_KEY = "konference:call_status_writes"
+# status_sequence of a status set by the conversation end job, above any
+# twilio SequenceNumber
+FINAL_STATUS_SEQUENCE = 2_147_483_647
+
+MIGRATE_LEGACY_SCRIPT = """
+local entries = redis.call('LRANGE', KEYS[1], 0, -1)
+for _, entry in ipairs(entries) do
+    redis.call('XADD', KEYS[2], '*', 'event', entry)
+end
+redis.call('DEL', KEYS[1])
+return #entries
+"""
+
+
+def _decode(value: typing.Union[bytes, str]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class StatusEntry(typing.NamedTuple):
+    entry_id: str
+    event: typing.Dict[str, typing.Any]
+
+
+class CallStatusBuffer:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    async def push(
+        self,
+        call_sid: str,
+        call_status: typing.Optional[str],
+        sequence_number: typing.Optional[int] = None,
+        conversation_id: typing.Optional[str] = None,
+        conversation_status: typing.Optional[str] = None,
+    ) -> None:
+        await self.cache.xadd(
+            STATUS_STREAM_KEY,
+            {
+                "event": json.dumps(
+                    {
+                        "call_sid": call_sid,
+                        "call_status": call_status,
+                        "sequence_number": sequence_number,
+                        "conversation_id": conversation_id,
+                        "conversation_status": conversation_status,
+                    }
+                )
+            },
+        )
+
+    async def create_group(self) -> None:
+        try:
+            await self.cache.xgroup_create(
+                STATUS_STREAM_KEY, STATUS_CONSUMER_GROUP, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        await self.cache.eval(
+            MIGRATE_LEGACY_SCRIPT, 2, LEGACY_BUFFER_KEY, STATUS_STREAM_KEY
+        )
+
+    async def read_batch(
+        self, consumer: str, size: int = STATUS_FLUSH_BATCH_SIZE
+    ) -> typing.List[StatusEntry]:
+        """Entries left pending by a failed flush first, then new ones"""
+        claimed = await self.cache.xautoclaim(
+            STATUS_STREAM_KEY,
+            STATUS_CONSUMER_GROUP,
+            consumer,
+            min_idle_time=STATUS_CLAIM_IDLE_MS,
+            start_id="0-0",
+            count=size,
+        )
+        entries = self._entries(claimed[1])
+        if entries:
+            return entries
+        response = await self.cache.xreadgroup(
+            STATUS_CONSUMER_GROUP,
+            consumer,
+            {STATUS_STREAM_KEY: ">"},
+            count=size,
+        )
+        for _, stream_entries in response or []:
+            entries.extend(self._entries(stream_entries))
+        return entries
+
+    async def pending_updates(
+        self,
+        call_sids: typing.Iterable[str],
+        conversation_ids: typing.Iterable[str],
+    ) -> typing.Tuple[
+        typing.Dict[str, "StatusUpdate"], typing.Dict[str, "StatusUpdate"]
+    ]:
+        """Latest transitions of the given calls and conversations that are
+        buffered but not written yet, pending entries of any consumer included
+        """
+        call_sids = set(call_sids)
+        conversation_ids = set(conversation_ids)
+        matching: typing.List[StatusEntry] = []
+        start = "-"
+        while True:
+            raw_entries = await self.cache.xrange(
+                STATUS_STREAM_KEY, min=start, count=STATUS_FLUSH_BATCH_SIZE
+            )
+            for entry in self._entries(raw_entries):
+                if (
+                    entry.event.get("call_sid") in call_sids
+                    or entry.event.get("conversation_id") in conversation_ids
+                ):
+                    matching.append(entry)
+            if len(raw_entries) < STATUS_FLUSH_BATCH_SIZE:
+                break
+            start = "(" + _decode(raw_entries[-1][0])
+        call_statuses, conversation_statuses = latest_status_updates(matching)
+        return (
+            {k: v for k, v in call_statuses.items() if k in call_sids},
+            {
+                k: v
+                for k, v in conversation_statuses.items()
+                if k in conversation_ids
+            },
+        )
+
+    async def ack(self, entries: typing.List[StatusEntry]) -> None:
+        """Drops entries whose transitions are written"""
+        if not entries:
+            return
+        entry_ids = [entry.entry_id for entry in entries]
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.xack(STATUS_STREAM_KEY, STATUS_CONSUMER_GROUP, *entry_ids)
+            pipe.xdel(STATUS_STREAM_KEY, *entry_ids)
+            await pipe.execute()
+
+    @staticmethod
+    def _entries(raw_entries) -> typing.List[StatusEntry]:
+        entries = []
+        for entry_id, fields in raw_entries:
+            # deleted entries come back without fields
+            if not fields:
+                continue
+            fields = {_decode(k): v for k, v in fields.items()}
+            entries.append(
+                StatusEntry(_decode(entry_id), json.loads(fields["event"]))
+            )
+        return entries
+
+
+# status and SequenceNumber, None for callbacks without one
+StatusUpdate = typing.Tuple[str, typing.Optional[int]]
+
+
+def latest_status_updates(
+    entries: typing.List[StatusEntry],
+) -> typing.Tuple[typing.Dict[str, StatusUpdate], typing.Dict[str, StatusUpdate]]:
+    """Collapses a batch to the latest call status per call sid and the
+    latest conversation status per conversation id
+    """
+    ordered = sorted(
+        enumerate(entry.event for entry in entries),
+        key=lambda item: (item[1].get("sequence_number") or 0, item[0]),
+    )
+    call_statuses: typing.Dict[str, StatusUpdate] = {}
+    conversation_statuses: typing.Dict[str, StatusUpdate] = {}
+    for _, event in ordered:
+        sequence_number = event.get("sequence_number")
+        if event.get("call_status"):
+            call_statuses[event["call_sid"]] = (
+                event["call_status"],
+                sequence_number,
+            )
+        if event.get("conversation_id") and event.get("conversation_status"):
+            conversation_statuses[event["conversation_id"]] = (
+                event["conversation_status"],
+                sequence_number,
+            )
+    return call_statuses, conversation_statuses
+
+
+def is_newer_status(
+    sequence: typing.Optional[int], stored_sequence: typing.Optional[int]
+) -> bool:
+    """Whether a buffered transition replaces the stored status, the same
+    rule as the guard of the bulk UPDATEs
+    """
+    if stored_sequence == FINAL_STATUS_SEQUENCE:
+        return False
+    if sequence is None or stored_sequence is None:
+        return True
+    return sequence > stored_sequence
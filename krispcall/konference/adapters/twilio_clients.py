@@ -0,0 +1,84 @@
+"""
+Twilio sub account clients of the running campaigns, built from the
+credentials kept in the campaign state.
+"""
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from krispcall.common.utils.shortid import ShortId
+from krispcall.twilio.models import ConferenceResource, AccountCredential
+from krispcall.twilio.twilio_client import TwilioClient
+from krispcall.twilio.utils import sub_client
+from krispcall.konference.adapters.state_store import CampaignStateStore
+from krispcall.konference.adapters.conference_registry import ConferenceRegistry
+
+
+async def get_call_details(
+    twilio_client: TwilioClient,
+    cache: Redis,
+    campaign_id: UUID,
+    call_sid: UUID,
+):
+    twilio_sub_client = await build_twilio_subaccount_client(
+        twilio_client, cache, campaign_id
+    )
+    call_info = await twilio_sub_client.call_resource.get_call_details(
+        call_sid=ShortId.with_uuid(call_sid)
+    )
+
+    return call_info
+
+
+async def get_conference_resource(
+    twilio_client: TwilioClient,
+    cache: Redis,
+    conference_friendly_name: UUID,
+    campaign_id: UUID,
+) -> ConferenceResource:
+    """Reads the conference from the callback fed registry, the REST api is
+    only asked for conferences without recorded callbacks
+    """
+    state = await ConferenceRegistry(cache).get(
+        ShortId.with_uuid(conference_friendly_name)
+    )
+    if state is not None and state.sid and state.status:
+        return ConferenceResource(
+            conference_id=state.sid, conference_status=state.status
+        )
+
+    twilio_sub_client = await build_twilio_subaccount_client(
+        twilio_client, cache, campaign_id
+    )
+
+    try:
+        result = await twilio_sub_client.conference_resource.fetch_conference(
+            friendly_name=ShortId.with_uuid(conference_friendly_name)
+        )
+        conference_resource = ConferenceResource(
+            conference_id=result["conferences"][0]["sid"],
+            conference_status=result["conferences"][0]["status"],
+        )
+
+        return conference_resource
+    except Exception as e:
+        print(e)
+        raise Exception(str(e))
+
+
+async def get_subaccount_credential_from_cache(cache: Redis, campaign_id: UUID):
+    credentials: AccountCredential = await CampaignStateStore(cache).get_field(
+        ShortId.with_uuid(campaign_id), "cpass_user"
+    )
+    return credentials
+
+
+async def build_twilio_subaccount_client(
+    twilio_client: TwilioClient, cache: Redis, campaign_id: UUID
+) -> TwilioClient:
+    credentials = await get_subaccount_credential_from_cache(cache, campaign_id)
+    client: TwilioClient = sub_client(
+        obj=twilio_client,
+        details=credentials,
+    )
+    return client
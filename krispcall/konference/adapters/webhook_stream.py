@@ -0,0 +1,253 @@
+"""
+Redis streams the campaign webhooks are appended to when stream ingestion is
+enabled, so the http handler returns to twilio without waiting on redis
+state, database writes or twilio REST calls.
+
+Events are spread over a fixed number of partition streams by conference
+friendly name. A partition is consumed by one worker at a time, the worker
+holding its lease, so the events of a conference are processed in the order
+twilio sent them while the partitions are shared by every running worker.
+Consumers heartbeat into a sorted set and take at most their fair share of
+the partitions. The lease is renewed before every event and a consumer
+that lost it stops, so a slow batch never overlaps the next owner. Entries
+a crashed owner left unacknowledged are claimed by the next owner of the
+partition before any new entry is read. Events whose processing failed are
+moved to a dead letter stream.
+"""
+from __future__ import annotations
+
+import json
+import math
+import time
+import typing
+import zlib
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+STREAM_PREFIX = "webhook_stream"
+CONSUMER_GROUP = "campaign_webhooks"
+# entries kept per partition, older ones are trimmed
+STREAM_MAXLEN = 100_000
+LEASE_TTL_SECONDS = 30
+HEARTBEAT_TTL_SECONDS = 15
+READ_COUNT = 100
+DEAD_LETTER_KEY = f"{STREAM_PREFIX}:dead"
+DEAD_LETTER_MAXLEN = 10_000
+
+# renews the lease only while the consumer still holds it
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _decode(value: typing.Union[bytes, str]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class WebhookEvent(typing.NamedTuple):
+    partition: int
+    entry_id: str
+    kind: str
+    # decoded callback data of the webhook url
+    callback_data: typing.List[str]
+    form: typing.Dict[str, str]
+
+
+class WebhookStream:
+    def __init__(self, cache: Redis, partitions: int = 16):
+        self.cache = cache
+        self.partitions = partitions
+
+    @staticmethod
+    def stream_key(partition: int) -> str:
+        return f"{STREAM_PREFIX}:{partition}"
+
+    @staticmethod
+    def lease_key(partition: int) -> str:
+        return f"{STREAM_PREFIX}:lease:{partition}"
+
+    @staticmethod
+    def consumers_key() -> str:
+        return f"{STREAM_PREFIX}:consumers"
+
+    def partition_of(self, conference: str) -> int:
+        # stable across processes, unlike hash()
+        return zlib.crc32(conference.encode()) % self.partitions
+
+    async def append(
+        self,
+        kind: str,
+        conference: str,
+        callback_data: typing.List[str],
+        form: typing.Dict[str, str],
+    ) -> str:
+        """Appends a webhook to the partition of its conference"""
+        entry_id = await self.cache.xadd(
+            self.stream_key(self.partition_of(conference)),
+            {
+                "kind": kind,
+                "callback_data": json.dumps(callback_data),
+                "form": json.dumps(form),
+            },
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+        return _decode(entry_id)
+
+    async def create_groups(self) -> None:
+        for partition in range(self.partitions):
+            try:
+                await self.cache.xgroup_create(
+                    self.stream_key(partition), CONSUMER_GROUP, id="0", mkstream=True
+                )
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def acquire(
+        self, consumer: str, owned: typing.Set[int]
+    ) -> typing.Tuple[typing.Set[int], typing.Set[int]]:
+        """Renews the leases of owned partitions and takes free ones up to the
+        fair share of consumer, returns (owned, newly acquired) partitions
+        """
+        now = time.time()
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.consumers_key(), {consumer: now})
+            pipe.zremrangebyscore(
+                self.consumers_key(), "-inf", now - HEARTBEAT_TTL_SECONDS
+            )
+            pipe.zcard(self.consumers_key())
+            _, _, consumers = await pipe.execute()
+        share = math.ceil(self.partitions / max(consumers, 1))
+
+        kept = set()
+        for partition in sorted(owned):
+            if len(kept) < share and await self.renew(consumer, partition):
+                kept.add(partition)
+            else:
+                await self.release(consumer, partition)
+
+        acquired = set()
+        for partition in range(self.partitions):
+            if len(kept) + len(acquired) >= share:
+                break
+            if partition in kept:
+                continue
+            if await self.cache.set(
+                self.lease_key(partition), consumer, nx=True, ex=LEASE_TTL_SECONDS
+            ):
+                acquired.add(partition)
+        return kept | acquired, acquired
+
+    async def renew(self, consumer: str, partition: int) -> bool:
+        """Extends the lease of the partition, False once another consumer
+        holds it
+        """
+        return bool(
+            await self.cache.eval(
+                RENEW_SCRIPT, 1, self.lease_key(partition), consumer, LEASE_TTL_SECONDS
+            )
+        )
+
+    async def release(self, consumer: str, partition: int) -> None:
+        await self.cache.eval(RELEASE_SCRIPT, 1, self.lease_key(partition), consumer)
+
+    async def leave(self, consumer: str, owned: typing.Set[int]) -> None:
+        for partition in owned:
+            await self.release(consumer, partition)
+        await self.cache.zrem(self.consumers_key(), consumer)
+
+    async def claim_pending(
+        self, consumer: str, partition: int
+    ) -> typing.List[WebhookEvent]:
+        """Entries of the partition left unacknowledged by earlier owners"""
+        events: typing.List[WebhookEvent] = []
+        start = "0-0"
+        while True:
+            result = await self.cache.xautoclaim(
+                self.stream_key(partition),
+                CONSUMER_GROUP,
+                consumer,
+                min_idle_time=0,
+                start_id=start,
+                count=READ_COUNT,
+            )
+            start = _decode(result[0])
+            events.extend(self._events(partition, result[1]))
+            if start == "0-0":
+                return events
+
+    async def read(
+        self, consumer: str, partitions: typing.Set[int], block_ms: int = 1000
+    ) -> typing.List[WebhookEvent]:
+        """New entries of the partitions, oldest first within a partition"""
+        if not partitions:
+            return []
+        response = await self.cache.xreadgroup(
+            CONSUMER_GROUP,
+            consumer,
+            {self.stream_key(partition): ">" for partition in partitions},
+            count=READ_COUNT,
+            block=block_ms,
+        )
+        events: typing.List[WebhookEvent] = []
+        for stream, entries in response or []:
+            partition = int(_decode(stream).rsplit(":", 1)[1])
+            events.extend(self._events(partition, entries))
+        return events
+
+    async def ack(self, event: WebhookEvent) -> None:
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.xack(self.stream_key(event.partition), CONSUMER_GROUP, event.entry_id)
+            pipe.xdel(self.stream_key(event.partition), event.entry_id)
+            await pipe.execute()
+
+    async def dead_letter(self, event: WebhookEvent, error: str) -> None:
+        """Moves an event that failed processing out of its partition"""
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                DEAD_LETTER_KEY,
+                {
+                    "partition": event.partition,
+                    "entry_id": event.entry_id,
+                    "kind": event.kind,
+                    "callback_data": json.dumps(event.callback_data),
+                    "form": json.dumps(event.form),
+                    "error": error,
+                },
+                maxlen=DEAD_LETTER_MAXLEN,
+                approximate=True,
+            )
+            pipe.xack(self.stream_key(event.partition), CONSUMER_GROUP, event.entry_id)
+            pipe.xdel(self.stream_key(event.partition), event.entry_id)
+            await pipe.execute()
+
+    @staticmethod
+    def _events(partition: int, entries) -> typing.List[WebhookEvent]:
+        events = []
+        for entry_id, fields in entries:
+            # trimmed entries come back without fields
+            if not fields:
+                continue
+            fields = {_decode(k): _decode(v) for k, v in fields.items()}
+            events.append(
+                WebhookEvent(
+                    partition=partition,
+                    entry_id=_decode(entry_id),
+                    kind=fields["kind"],
+                    callback_data=json.loads(fields["callback_data"]),
+                    form=json.loads(fields["form"]),
+                )
+            )
+        return events
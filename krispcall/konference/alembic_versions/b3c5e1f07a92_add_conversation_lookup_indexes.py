@@ -0,0 +1,106 @@
+"""Add conversation lookup indexes
+
+Revision ID: b3c5e1f07a92
+Revises: 4ab47c80a082
+Create Date: 2026-10-18 10:12:40.318204
+
+"""
+# pylint: disable=invalid-name, no-member, missing-function-docstring
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b3c5e1f07a92"
+down_revision = "4ab47c80a082"
+branch_labels = None
+depends_on = None
+
+ACTIVE_CONFERENCE_STATUSES = "'in_progress', 'in_queue', 'pending', 'on_hold'"
+
+
+def upgrade():
+    # built concurrently so live campaigns keep writing while indexes build
+    with op.get_context().autocommit_block():
+        # campaign loop lookups of the conversations still in flight
+        op.create_index(
+            "ix_campaign_conversation_campaign_id_active_status",
+            "campaign_conversation",
+            ["campaign_id", "status"],
+            postgresql_where=sa.text(
+                f"status IN ({ACTIVE_CONFERENCE_STATUSES})"
+            ),
+            postgresql_concurrently=True,
+        )
+        # campaign conversation listing and final sequence number lookups
+        op.create_index(
+            "ix_campaign_conversation_campaign_id_initial_call_sequence",
+            "campaign_conversation",
+            ["campaign_id", "initial_call", "sequence_number"],
+            postgresql_concurrently=True,
+        )
+        # reattempt runs restart numbering after the initial calls, so only
+        # the initial calls have a unique sequence number within a campaign
+        op.create_index(
+            "uq_campaign_conversation_campaign_id_initial_sequence",
+            "campaign_conversation",
+            ["campaign_id", "sequence_number"],
+            unique=True,
+            postgresql_where=sa.text("initial_call"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_campaign_conversation_campaign_id_contact_number",
+            "campaign_conversation",
+            ["campaign_id", "contact_number"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_campaign_conversation_twi_sid",
+            "campaign_conversation",
+            ["twi_sid"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_participant_calls_conversation_id",
+            "participant_calls",
+            ["conversation_id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_participant_calls_twi_sid",
+            "participant_calls",
+            ["twi_sid"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index_name, table_name in [
+            ("ix_participant_calls_twi_sid", "participant_calls"),
+            ("ix_participant_calls_conversation_id", "participant_calls"),
+            ("ix_campaign_conversation_twi_sid", "campaign_conversation"),
+            (
+                "ix_campaign_conversation_campaign_id_contact_number",
+                "campaign_conversation",
+            ),
+            (
+                "uq_campaign_conversation_campaign_id_initial_sequence",
+                "campaign_conversation",
+            ),
+            (
+                "ix_campaign_conversation_campaign_id_initial_call_sequence",
+                "campaign_conversation",
+            ),
+            (
+                "ix_campaign_conversation_campaign_id_active_status",
+                "campaign_conversation",
+            ),
+        ]:
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,35 @@
+"""Add status sequence
+
+Revision ID: c7e2a94d1f36
+Revises: b3c5e1f07a92
+Create Date: 2026-10-18 16:05:12.508231
+
+"""
+# pylint: disable=invalid-name, no-member, missing-function-docstring
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c7e2a94d1f36"
+down_revision = "b3c5e1f07a92"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # twilio SequenceNumber of the callback the status was last written from
+    op.add_column(
+        "participant_calls",
+        sa.Column("status_sequence", sa.Integer, nullable=True),
+    )
+    op.add_column(
+        "campaign_conversation",
+        sa.Column("status_sequence", sa.Integer, nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("campaign_conversation", "status_sequence")
+    op.drop_column("participant_calls", "status_sequence")
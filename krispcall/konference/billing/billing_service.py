@@ -1,26 +1,26 @@
+from redis.asyncio import Redis
 from krispcall.konference.billing import constant as BillingConstant
-from krispcall.common.utils.shortid import ShortId
 
 from krispcall.konference.billing.models import (
     BillingResponse,
     CampaignOutboundCallRequest,
 )
-from krispcall.konference.adapters.provider import (
-    call_charge_transaction,
-    get_workspace_credit,
-)
+from krispcall.konference.adapters.provider import call_charge_transaction
+from krispcall.konference.billing.ledger import CreditLedger
 
 
 class BillingService:
     async def execute_campaign_call_transaction(
         data: CampaignOutboundCallRequest,
+        cache: Redis,
     ) -> BillingResponse:
         try:
-            workspace_credit = await get_workspace_credit(
-                ShortId.with_uuid(data.workspace_id)
-            )
-
-            if not BillingService.is_sufficient_credit(workspace_credit):
+            ledger = CreditLedger(cache)
+            # reserves the next minute of the call and charges this one
+            # from the local ledger instead of reading the credit over rpc
+            if not await ledger.reserve(
+                data.workspace_id, data.conversation_id
+            ) or not await ledger.charge(data.workspace_id, data.conversation_id):
                 return BillingResponse(is_sufficient_credit=False, success=False)
 
             billing_response = await call_charge_transaction(data)
@@ -1,15 +1,36 @@
+import asyncio
+import logging
+import time
+import typing
+from collections import defaultdict
 from uuid import UUID
-from datetime import datetime, timedelta
-from redis import Redis
+from redis.asyncio import Redis
 from krispcall.common.database.connection import DbConnection
-from krispcall.providers.queue_service.job_queue import JobQueue
+from krispcall.common.utils.shortid import ShortId
 
 from krispcall.twilio.enums import ActiveStatusEnum, NotActiveStatusEnum
 from krispcall.twilio.twilio_client import TwilioClient
-from krispcall.twilio.utils import get_conference_resource
+from krispcall.konference.adapters.twilio_clients import (
+    build_twilio_subaccount_client,
+    get_conference_resource,
+)
+from krispcall.konference.adapters.provider import call_charge_transaction
+from krispcall.konference.adapters.conference_registry import (
+    CONFERENCE_IN_PROGRESS,
+    ConferenceRegistry,
+)
 from krispcall.konference.billing.enums import BillingTypeEnum
+from krispcall.konference.billing.ledger import CreditLedger
+from krispcall.konference.billing.registry import BillingRegistry
 from krispcall.konference.domain import models
-from krispcall.konference.billing.constant import CHARGE_CALL_BACK_TIME
+from krispcall.konference.billing.constant import (
+    BILLING_CHARGE_CONCURRENCY,
+    BILLING_RETRY_SECONDS,
+    BILLING_WORKSPACE_CONCURRENCY,
+    CHARGE_CALL_BACK_TIME,
+    CREDIT_RECONCILE_CONCURRENCY,
+    THRESHOLD_CALL_PER_MINUTE,
+)
 from krispcall.konference.service_layer import commands
 from krispcall.konference.service_layer import handlers
 from krispcall.konference.service_layer import unit_of_work
@@ -19,21 +40,24 @@ from krispcall.konference.billing.models import (
 )
 from krispcall.konference.billing.billing_service import BillingService
 
+LOGGER = logging.getLogger(__name__)
+
 
 async def task_campaign_call_charge(
     ctx,
     campaign_call_params: CampaignOutboundCallRequest,
 ):
+    """Charges a call scheduled as its own deferred job, only jobs enqueued
+    before the billing ticker still arrive here, later minutes are billed
+    by bill_active_calls
+    """
     try:
-        settings = ctx["settings"]
-        queue: JobQueue = ctx["queue"]
         db_conn: DbConnection = ctx["db"]
         twilio_client: TwilioClient = ctx["twilio"]
-
-        cache = Redis.from_url(settings.redis_settings)
+        cache: Redis = ctx["cache"]
 
         billing_response = await process_billing_transaction(
-            campaign_call_params, cache, queue, twilio_client
+            campaign_call_params, cache, twilio_client
         )
 
         if billing_response.is_sufficient_credit:
@@ -49,7 +73,6 @@ async def task_campaign_call_charge(
 async def process_billing_transaction(
     campaign_call_params: CampaignOutboundCallRequest,
     cache: Redis,
-    queue: JobQueue,
     twilio_client: TwilioClient,
     charge_call_back_time: int = CHARGE_CALL_BACK_TIME,
     charge_for_first_minute: bool = False,
@@ -87,17 +110,22 @@ async def process_billing_transaction(
 
     if call_status in active_statuses:
         is_call_inprogress = True
-        await queue.enqueue_job(
-            "task_campaign_call_charge",
-            data=[campaign_call_params],
-            queue_name="arq:pd_queue",
-            defer_until=datetime.now() + timedelta(seconds=charge_call_back_time),
+        # the following minutes are charged by the billing ticker
+        await BillingRegistry(cache).register(
+            campaign_call_params, due_at=time.time() + charge_call_back_time
         )
 
     billing_response: BillingResponse = (
-        await BillingService.execute_campaign_call_transaction(data=campaign_call_params)
+        await BillingService.execute_campaign_call_transaction(
+            data=campaign_call_params, cache=cache
+        )
     )
     billing_response.is_call_inprogress = is_call_inprogress
+    if not is_call_inprogress:
+        await CreditLedger(cache).release(
+            campaign_call_params.workspace_id,
+            campaign_call_params.conversation_id,
+        )
 
     return billing_response
 
@@ -119,3 +147,195 @@ async def update_campaign_conversation_status(
         )
         await uow.repository.update_conversation_status(campaign_conversation)
         return campaign_conversation
+
+
+async def bill_active_calls(ctx):
+    """Billing ticker, charges every registered call whose minute is due
+    in one pass, one workspace credit lookup per workspace
+    """
+    cache: Redis = ctx["cache"]
+    twilio_client: TwilioClient = ctx["twilio"]
+    db_conn: DbConnection = ctx["db"]
+    registry = BillingRegistry(cache)
+
+    due_calls = await registry.claim_due()
+    if not due_calls:
+        return
+
+    calls_by_workspace: typing.Dict[
+        str, typing.List[CampaignOutboundCallRequest]
+    ] = defaultdict(list)
+    for call in due_calls:
+        calls_by_workspace[str(call.workspace_id)].append(call)
+
+    workspace_semaphore = asyncio.Semaphore(BILLING_WORKSPACE_CONCURRENCY)
+    charge_semaphore = asyncio.Semaphore(BILLING_CHARGE_CONCURRENCY)
+
+    async def bill(calls: typing.List[CampaignOutboundCallRequest]):
+        async with workspace_semaphore:
+            try:
+                await bill_workspace_calls(
+                    calls,
+                    registry,
+                    cache,
+                    twilio_client,
+                    db_conn,
+                    charge_semaphore,
+                )
+            except Exception as e:
+                LOGGER.exception(
+                    "Billing failed for workspace %s", calls[0].workspace_id
+                )
+                await registry.reschedule(
+                    calls, due_at=time.time() + BILLING_RETRY_SECONDS
+                )
+
+    await asyncio.gather(*[bill(calls) for calls in calls_by_workspace.values()])
+
+
+async def bill_workspace_calls(
+    calls: typing.List[CampaignOutboundCallRequest],
+    registry: BillingRegistry,
+    cache: Redis,
+    twilio_client: TwilioClient,
+    db_conn: DbConnection,
+    charge_semaphore: asyncio.Semaphore,
+):
+    active_conferences = await fetch_active_conferences(
+        calls, cache, twilio_client
+    )
+    live_calls, ended_calls = [], []
+    for call in calls:
+        if ShortId.with_uuid(call.conference_friendly_name) in active_conferences:
+            live_calls.append(call)
+        else:
+            ended_calls.append(call)
+    # conferences that ended since the last minute are not charged again
+    ledger = CreditLedger(cache)
+    await registry.remove(ended_calls)
+    for call in ended_calls:
+        await ledger.release(call.workspace_id, call.conversation_id)
+    if not live_calls:
+        return
+
+    chargeable = []
+    for call in live_calls:
+        if await ledger.charge(call.workspace_id, call.conversation_id):
+            chargeable.append(call)
+        else:
+            await terminate_unfunded_call(call, registry, cache, twilio_client, db_conn)
+
+    async def charge(call: CampaignOutboundCallRequest):
+        call.total_participants = 1
+        call.billing_types = [
+            BillingTypeEnum.SIP_CHARGE,
+            BillingTypeEnum.CONFERENCE_CHARGE,
+            BillingTypeEnum.CALL_CHARGE,
+        ]
+        async with charge_semaphore:
+            response = await call_charge_transaction(call)
+        if response is None or not response.success:
+            # the minute was not billed, give the credit back and bill it
+            # again on the next tick
+            LOGGER.warning(
+                "Call charge failed for conversation %s, retrying",
+                call.conversation_id,
+            )
+            await ledger.refund(call.workspace_id)
+            await registry.reschedule(
+                [call], due_at=time.time() + BILLING_RETRY_SECONDS
+            )
+
+    await asyncio.gather(*[charge(call) for call in chargeable])
+
+
+async def fetch_active_conferences(
+    calls: typing.List[CampaignOutboundCallRequest],
+    cache: Redis,
+    twilio_client: TwilioClient,
+) -> typing.Set[str]:
+    """Friendly names of the in-progress conferences of the calls, read from
+    the conference registry, campaigns with unrecorded conferences are
+    listed from twilio with one request per campaign subaccount
+    """
+    registry = ConferenceRegistry(cache)
+    active_conferences: typing.Set[str] = set()
+    unknown_campaigns: typing.Set[UUID] = set()
+    for call in calls:
+        friendly_name = ShortId.with_uuid(call.conference_friendly_name)
+        state = await registry.get(friendly_name)
+        if state is None or not state.status:
+            unknown_campaigns.add(call.campaign_id)
+        elif state.status == CONFERENCE_IN_PROGRESS:
+            active_conferences.add(friendly_name)
+    for campaign_id in unknown_campaigns:
+        sub_client = await build_twilio_subaccount_client(
+            twilio_client=twilio_client, cache=cache, campaign_id=campaign_id
+        )
+        response = await sub_client.conference_resource.fetch_all_active(
+            page_size=1000
+        )
+        for conference in response.get("conferences") or []:
+            active_conferences.add(conference["friendly_name"])
+    return active_conferences
+
+
+async def terminate_unfunded_call(
+    call: CampaignOutboundCallRequest,
+    registry: BillingRegistry,
+    cache: Redis,
+    twilio_client: TwilioClient,
+    db_conn: DbConnection,
+):
+    sub_client = await build_twilio_subaccount_client(
+        twilio_client=twilio_client, cache=cache, campaign_id=call.campaign_id
+    )
+    await sub_client.conference_resource.terminate_by_id(call.conference_sid)
+    await update_campaign_conversation_status(
+        status=models.ConferenceStatus.completed,
+        conversation_id=call.conversation_id,
+        db_conn=db_conn,
+    )
+    await registry.remove([call])
+    await CreditLedger(cache).release(call.workspace_id, call.conversation_id)
+
+
+async def reconcile_credit_ledger(ctx):
+    """Re-reads the credit of the workspaces with live calls from the
+    billing service, cuts calls while the credit does not cover their
+    reservations
+    """
+    cache: Redis = ctx["cache"]
+    twilio_client: TwilioClient = ctx["twilio"]
+    db_conn: DbConnection = ctx["db"]
+    ledger = CreditLedger(cache)
+    registry = BillingRegistry(cache)
+    semaphore = asyncio.Semaphore(CREDIT_RECONCILE_CONCURRENCY)
+
+    async def reconcile(workspace_id: UUID):
+        async with semaphore:
+            try:
+                conversation_ids = await ledger.live_calls(workspace_id)
+                if not conversation_ids:
+                    await ledger.forget(workspace_id)
+                    return
+                await ledger.refresh(workspace_id)
+                available = await ledger.available(workspace_id)
+                if available >= 0:
+                    return
+                calls = await registry.fetch(conversation_ids)
+                for call in calls:
+                    if available >= 0:
+                        break
+                    await terminate_unfunded_call(
+                        call, registry, cache, twilio_client, db_conn
+                    )
+                    available += THRESHOLD_CALL_PER_MINUTE
+            except Exception as e:
+                LOGGER.exception(
+                    "Credit reconcile failed for workspace %s", workspace_id
+                )
+
+    await asyncio.gather(
+        *[reconcile(workspace_id) for workspace_id in await ledger.workspaces()]
+    )
@@ -3,4 +3,16 @@ CHARGE_START_CALL_TIME = 50
 
 
 # Threshold call price per minute
-THRESHOLD_CALL_PER_MINUTE = 0.5
\ No newline at end of file
+THRESHOLD_CALL_PER_MINUTE = 0.5
+
+# Billing ticker
+BILLING_TICK_SECONDS = 5
+# failed workspace passes are retried after this delay
+BILLING_RETRY_SECONDS = 10
+BILLING_WORKSPACE_CONCURRENCY = 10
+BILLING_CHARGE_CONCURRENCY = 20
+# Credit ledger
+# workspaces without live calls fall back to the billing service after this
+CREDIT_LEDGER_TTL_SECONDS = 300
+CREDIT_RECONCILE_SECONDS = 30
+CREDIT_RECONCILE_CONCURRENCY = 10
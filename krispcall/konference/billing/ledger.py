@@ -0,0 +1,203 @@
+"""
+Redis credit ledger of the workspaces with live campaign calls.
+
+The ledger keeps the last credit read from the billing service minus the
+minutes charged since, and reserves one minute of credit for every live
+call. Call start and the billing ticker decide sufficiency from the ledger,
+the reconciler re-reads the credit of the workspaces with live calls in
+batches and replaces the local balance, which corrects any drift.
+"""
+from __future__ import annotations
+
+import time
+import typing
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from krispcall.common.utils.shortid import ShortId
+from krispcall.konference.adapters.provider import get_workspace_credit
+from krispcall.konference.billing.constant import (
+    CREDIT_LEDGER_TTL_SECONDS,
+    THRESHOLD_CALL_PER_MINUTE,
+)
+
+LEDGER_WORKSPACES_KEY = "billing:credit:workspaces"
+
+# returns -1 when the workspace has no ledger, 0 when the credit left after
+# the reservations does not cover the amount and 1 once reserved
+RESERVE_SCRIPT = """
+local balance = redis.call('HGET', KEYS[1], 'balance')
+if not balance then
+    return -1
+end
+if redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then
+    return 1
+end
+local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved') or '0')
+if tonumber(balance) - reserved < tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HINCRBYFLOAT', KEYS[1], 'reserved', ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+-- the calls hash expires with the ledger, sync extends both
+local ttl = redis.call('TTL', KEYS[1])
+if ttl > 0 then
+    redis.call('EXPIRE', KEYS[2], ttl)
+end
+return 1
+"""
+
+RELEASE_SCRIPT = """
+local amount = redis.call('HGET', KEYS[2], ARGV[1])
+if amount then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('HINCRBYFLOAT', KEYS[1], 'reserved', -tonumber(amount))
+end
+return amount
+"""
+
+# a call may spend its own reservation and the unreserved credit but not
+# the reservations of the other live calls, same replies as RESERVE_SCRIPT
+CHARGE_SCRIPT = """
+local balance = redis.call('HGET', KEYS[1], 'balance')
+if not balance then
+    return -1
+end
+local reserved = tonumber(redis.call('HGET', KEYS[1], 'reserved') or '0')
+local own = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+if tonumber(balance) - (reserved - own) < tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HINCRBYFLOAT', KEYS[1], 'balance', -tonumber(ARGV[2]))
+return 1
+"""
+
+# gives back a local charge whose billing transaction failed, a missing
+# ledger is left missing, the next sync reads the real credit
+REFUND_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HINCRBYFLOAT', KEYS[1], 'balance', ARGV[1])
+return 1
+"""
+
+
+class CreditLedger:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    @staticmethod
+    def ledger_key(workspace_id: UUID) -> str:
+        return f"billing:credit:{workspace_id}"
+
+    @staticmethod
+    def calls_key(workspace_id: UUID) -> str:
+        return f"billing:credit:{workspace_id}:calls"
+
+    def _keys(self, workspace_id: UUID) -> typing.List[str]:
+        return [self.ledger_key(workspace_id), self.calls_key(workspace_id)]
+
+    async def sync(self, workspace_id: UUID, credit: float) -> None:
+        """Replaces the local balance with the credit of the billing service"""
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self.ledger_key(workspace_id),
+                mapping={"balance": credit, "synced_at": time.time()},
+            )
+            pipe.expire(self.ledger_key(workspace_id), CREDIT_LEDGER_TTL_SECONDS)
+            pipe.expire(self.calls_key(workspace_id), CREDIT_LEDGER_TTL_SECONDS)
+            pipe.sadd(LEDGER_WORKSPACES_KEY, str(workspace_id))
+            await pipe.execute()
+
+    async def refresh(self, workspace_id: UUID) -> float:
+        credit = await get_workspace_credit(ShortId.with_uuid(workspace_id))
+        await self.sync(workspace_id, credit)
+        return credit
+
+    async def available(self, workspace_id: UUID) -> float:
+        """Credit left after the reservations of the live calls"""
+        balance, reserved = await self.cache.hmget(
+            self.ledger_key(workspace_id), ["balance", "reserved"]
+        )
+        if balance is None:
+            balance = await self.refresh(workspace_id)
+        return float(balance) - float(reserved or 0)
+
+    async def _run(
+        self,
+        script: str,
+        workspace_id: UUID,
+        conversation_id: UUID,
+        amount: float,
+    ) -> bool:
+        """Runs a reserve / charge script, the billing service is only
+        asked when the ledger is missing or says insufficient, in case the
+        workspace was topped up since
+        """
+        args = [str(conversation_id), amount]
+        result = await self.cache.eval(
+            script, 2, *self._keys(workspace_id), *args
+        )
+        if result != 1:
+            await self.refresh(workspace_id)
+            result = await self.cache.eval(
+                script, 2, *self._keys(workspace_id), *args
+            )
+        return result == 1
+
+    async def reserve(
+        self,
+        workspace_id: UUID,
+        conversation_id: UUID,
+        amount: float = THRESHOLD_CALL_PER_MINUTE,
+    ) -> bool:
+        """Reserves a minute of credit for a live call"""
+        return await self._run(
+            RESERVE_SCRIPT, workspace_id, conversation_id, amount
+        )
+
+    async def charge(
+        self,
+        workspace_id: UUID,
+        conversation_id: UUID,
+        amount: float = THRESHOLD_CALL_PER_MINUTE,
+    ) -> bool:
+        """Charges a minute of a live call locally, False when the credit
+        no longer covers it
+        """
+        return await self._run(
+            CHARGE_SCRIPT, workspace_id, conversation_id, amount
+        )
+
+    async def refund(
+        self, workspace_id: UUID, amount: float = THRESHOLD_CALL_PER_MINUTE
+    ) -> None:
+        """Undoes a charge the billing service did not take"""
+        await self.cache.eval(
+            REFUND_SCRIPT, 1, self.ledger_key(workspace_id), amount
+        )
+
+    async def release(self, workspace_id: UUID, conversation_id: UUID) -> None:
+        await self.cache.eval(
+            RELEASE_SCRIPT, 2, *self._keys(workspace_id), str(conversation_id)
+        )
+
+    async def live_calls(self, workspace_id: UUID) -> typing.List[str]:
+        conversation_ids = await self.cache.hkeys(self.calls_key(workspace_id))
+        return [
+            c.decode() if isinstance(c, bytes) else c for c in conversation_ids
+        ]
+
+    async def workspaces(self) -> typing.List[UUID]:
+        members = await self.cache.smembers(LEDGER_WORKSPACES_KEY)
+        return [
+            UUID(m.decode() if isinstance(m, bytes) else m) for m in members
+        ]
+
+    async def forget(self, workspace_id: UUID) -> None:
+        """Stops reconciling a workspace without live calls, its ledger
+        expires on its own
+        """
+        await self.cache.srem(LEDGER_WORKSPACES_KEY, str(workspace_id))
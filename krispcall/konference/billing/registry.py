@@ -0,0 +1,121 @@
+"""
+Redis registry of the conferences that are billed every minute.
+
+Every live billable call is a member of a sorted set scored by the time of
+its next charge, its charge parameters are kept in a hash. The billing
+ticker claims the due calls by moving their score a minute ahead, so a
+crashed pass bills them again on the next minute instead of never.
+"""
+from __future__ import annotations
+
+import json
+import time
+import typing
+from dataclasses import asdict
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from krispcall.konference.billing.constant import CHARGE_CALL_BACK_TIME
+from krispcall.konference.billing.enums import BillingTypeEnum
+from krispcall.konference.billing.models import CampaignOutboundCallRequest
+
+BILLING_DUE_KEY = "billing:due"
+BILLING_CALLS_KEY = "billing:calls"
+
+# moves the due calls a minute ahead and returns their charge parameters in
+# one step, so overlapping ticks never claim the same charge
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local calls = {}
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[2], member)
+    local call = redis.call('HGET', KEYS[2], member)
+    if call then
+        table.insert(calls, call)
+    end
+end
+return calls
+"""
+
+# ids the billing and twilio helpers expect as UUID
+_UUID_FIELDS = (
+    "workspace_id",
+    "campaign_id",
+    "conference_friendly_name",
+    "conversation_id",
+)
+
+
+def dump_call(params: CampaignOutboundCallRequest) -> str:
+    return json.dumps(asdict(params), default=str)
+
+
+def load_call(raw: typing.Union[bytes, str]) -> CampaignOutboundCallRequest:
+    data = json.loads(raw)
+    for field in _UUID_FIELDS:
+        if data.get(field):
+            data[field] = UUID(str(data[field]))
+    data["billing_types"] = [
+        BillingTypeEnum(billing_type)
+        for billing_type in data.get("billing_types") or []
+    ]
+    return CampaignOutboundCallRequest(**data)
+
+
+class BillingRegistry:
+    def __init__(self, cache: Redis):
+        self.cache = cache
+
+    async def register(
+        self, params: CampaignOutboundCallRequest, due_at: float
+    ) -> None:
+        member = str(params.conversation_id)
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hset(BILLING_CALLS_KEY, member, dump_call(params))
+            pipe.zadd(BILLING_DUE_KEY, {member: due_at})
+            await pipe.execute()
+
+    async def claim_due(
+        self, now: typing.Optional[float] = None
+    ) -> typing.List[CampaignOutboundCallRequest]:
+        """Returns the calls due for a charge and moves their next charge
+        a minute ahead
+        """
+        now = time.time() if now is None else now
+        calls = await self.cache.eval(
+            CLAIM_SCRIPT,
+            2,
+            BILLING_DUE_KEY,
+            BILLING_CALLS_KEY,
+            now,
+            now + CHARGE_CALL_BACK_TIME,
+        )
+        return [load_call(raw) for raw in calls]
+
+    async def fetch(
+        self, conversation_ids: typing.List[str]
+    ) -> typing.List[CampaignOutboundCallRequest]:
+        if not conversation_ids:
+            return []
+        calls = await self.cache.hmget(BILLING_CALLS_KEY, conversation_ids)
+        return [load_call(raw) for raw in calls if raw is not None]
+
+    async def reschedule(
+        self, calls: typing.List[CampaignOutboundCallRequest], due_at: float
+    ) -> None:
+        if calls:
+            await self.cache.zadd(
+                BILLING_DUE_KEY,
+                {str(call.conversation_id): due_at for call in calls},
+                xx=True,
+            )
+
+    async def remove(self, calls: typing.List[CampaignOutboundCallRequest]) -> None:
+        if not calls:
+            return
+        members = [str(call.conversation_id) for call in calls]
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.zrem(BILLING_DUE_KEY, *members)
+            pipe.hdel(BILLING_CALLS_KEY, *members)
+            await pipe.execute()
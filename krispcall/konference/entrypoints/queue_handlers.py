@@ -1,13 +1,20 @@
-import json
+import asyncio
+import os
+import socket
 import typing
 from krispcall.campaigns.domain import models as campaign_models
 from krispcall.providers.queue_service.job_queue import JobQueue
 from krispcall.twilio.utils import sub_client
 from krispcall.konference import services
 from krispcall.konference.adapters.provider import get_provider_details
+import uuid
 from uuid import UUID
 import dateutil
 from krispcall.common.utils.shortid import ShortId
+from krispcall.common.database.instrumented import (
+    end_query_scope,
+    start_query_scope,
+)
 from krispcall.konference.domain.models import (
     AgentReference,
     ConferenceStatus,
@@ -15,10 +22,23 @@ from krispcall.konference.domain.models import (
 )
 from krispcall.twilio.utils import TwilioClient
 from krispcall.konference.service_layer import views, abstracts
+from krispcall.konference.adapters.state_store import CampaignStateStore
+from krispcall.konference.adapters.status_buffer import (
+    CallStatusBuffer,
+    is_newer_status,
+)
+from krispcall.konference.adapters.dial_timer import DialTimer
+from krispcall.konference.adapters.dial_stage import DialStage
+from krispcall.konference.adapters.conference_registry import ConferenceRegistry
+from krispcall.konference.adapters.webhook_stream import WebhookEvent, WebhookStream
+from krispcall.konference.entrypoints.route_handlers import (
+    conference_handler,
+    event_handler,
+)
+from krispcall.konference.entrypoints.route_handlers.ingestion import worker_request
 from krispcall.konference.service_layer.event_handlers import call_handlers
-from krispcall.campaigns.service_layer import views as campaign_views
 from krispcall.campaigns import services as camp_services
-from redis import Redis
+from redis.asyncio import Redis
 
 
 def get_conversation_status(participants):
@@ -40,6 +60,88 @@ def get_conversation_status(participants):
     return ConferenceStatus.cancelled
 
 
+async def with_pending_statuses(
+    cache: Redis,
+    participants,
+    campaign_conversation,
+):
+    """Participants and campaign conversation with the call statuses still
+    in the CallStatusBuffer applied, the flush_call_status cron may not have
+    written them yet
+    """
+    participants = [dict(participant) for participant in participants]
+    campaign_conversation = dict(campaign_conversation)
+    conversation_id = str(campaign_conversation["id"])
+    call_statuses, conversation_statuses = await CallStatusBuffer(
+        cache
+    ).pending_updates(
+        call_sids=[p["twi_sid"] for p in participants if p.get("twi_sid")],
+        conversation_ids=[conversation_id],
+    )
+    for participant in participants:
+        pending = call_statuses.get(participant.get("twi_sid"))
+        if pending and is_newer_status(
+            pending[1], participant.get("status_sequence")
+        ):
+            participant["status"], participant["status_sequence"] = pending
+    pending = conversation_statuses.get(conversation_id)
+    if pending and is_newer_status(
+        pending[1], campaign_conversation.get("status_sequence")
+    ):
+        (
+            campaign_conversation["status"],
+            campaign_conversation["status_sequence"],
+        ) = pending
+    return participants, campaign_conversation
+
+
+async def get_conference_duration(
+    twilio_client_: TwilioClient,
+    cache: Redis,
+    workspace: UUID,
+    conference_friendly_name: UUID,
+) -> int:
+    """Duration in seconds from the conference registry, from the twilio
+    conference resource when the start or end callback was not recorded
+    """
+    state = await ConferenceRegistry(cache).get(
+        ShortId.with_uuid(conference_friendly_name)
+    )
+    if state is not None and state.duration is not None:
+        return state.duration
+
+    details = await get_provider_details(
+        workspace_id=ShortId.with_uuid(workspace),
+    )
+
+    sub_client_: TwilioClient = sub_client(
+        obj=twilio_client_,
+        details={
+            "string_id": details.auth_id,
+            "auth_token": details.auth_token,
+            "api_key": details.api_key,
+            "api_secret": details.api_secret,
+        },
+    )
+    conference_resource = (
+        await sub_client_.conference_resource.fetch_conference(
+            friendly_name=ShortId.with_uuid(conference_friendly_name)
+        )
+    )
+    if not "conferences" in conference_resource:
+        raise Exception("Conferences not found for the given twi sid.")
+
+    if not conference_resource.get("conferences"):
+        raise Exception("Conference resource not found for the given id.")
+
+    conference_duration = dateutil.parser.parse(  # type: ignore
+        conference_resource.get("conferences")[0].get("date_updated")
+    ) - dateutil.parser.parse(  # type: ignore
+        conference_resource.get("conferences")[0].get("date_created")
+    )
+    return conference_duration.seconds
+
+
 async def handle_campaign_conversation_end(
     ctx,
     conversation: UUID,
@@ -47,20 +149,34 @@ async def handle_campaign_conversation_end(
     conference_friendly_name: UUID,
     campaign_id: UUID,
     is_reattempt: bool,
+    agent_conversation: typing.Optional[UUID] = None,
 ):
     db_conn = ctx["db"]
     twilio_client_ = ctx["twilio"]
     queue: JobQueue = ctx["queue"]
-    settings = ctx["settings"]
-    cache = Redis.from_url(settings.redis_settings)
+    cache: Redis = ctx["cache"]
 
     participants = await views.get_conversation_participants(
         conversation=conversation, db_conn=db_conn
     )
+    if agent_conversation:
+        # a parallel dialing contact joined the conference of another
+        # conversation, the agent leg is recorded there
+        agent_participants = await views.get_conversation_participants(
+            conversation=agent_conversation, db_conn=db_conn
+        )
+        participants = list(participants) + [
+            participant
+            for participant in agent_participants
+            if participant.get("participant_type") == ParticipantType.agent
+        ]
 
     campaign_conversation = await views.get_camaign_conversation(
         conversation_id=conversation, db_conn=db_conn
     )
+    participants, campaign_conversation = await with_pending_statuses(
+        cache, participants, campaign_conversation
+    )
 
     participants_stat = get_conversation_status(participants)
 
@@ -77,6 +193,7 @@ async def handle_campaign_conversation_end(
             status=participants_stat,
             conversation_id=conversation,
             db_conn=db_conn,
+            final=True,
         )
 
     if participants_stat in [
@@ -94,51 +211,20 @@ async def handle_campaign_conversation_end(
         )
         return
 
-    # TODO : These details can be fetched from cache
-    details = await get_provider_details(
-        workspace_id=ShortId.with_uuid(workspace),
-    )
-
-    sub_client_: TwilioClient = sub_client(
-        obj=twilio_client_,
-        details={
-            "string_id": details.auth_id,
-            "auth_token": details.auth_token,
-            "api_key": details.api_key,
-            "api_secret": details.api_secret,
-        },
-    )
-    conference_resource = (
-        await sub_client_.conference_resource.fetch_conference(
-            friendly_name=ShortId.with_uuid(conference_friendly_name)
-        )
-    )
-    if not "conferences" in conference_resource:
-        raise Exception("Conferences not found for the given twi sid.")
-
-    if not conference_resource.get("conferences"):
-        raise Exception("Conference resource not found for the given id.")
-
-    conference_duration = dateutil.parser.parse(  # type: ignore
-        conference_resource.get("conferences")[0].get("date_updated")
-    ) - dateutil.parser.parse(  # type: ignore
-        conference_resource.get("conferences")[0].get("date_created")
+    conference_duration = await get_conference_duration(
+        twilio_client_, cache, workspace, conference_friendly_name
     )
 
     failed_statuses = [ConferenceStatus.failed.value]
     campaign_status = campaign_conversation.get("status")
     is_not_failed_status = campaign_status not in failed_statuses
 
-    conference_duration_in_seconds = (
-        conference_duration.seconds
-        if conference_duration and conference_duration.seconds is not None
-        else 0
-    )
+    conference_duration_in_seconds = conference_duration or 0
     is_answered = is_not_failed_status
 
     await services.update_conversation_duration(
         conversation_id=conversation,
-        duration=conference_duration.seconds,
+        duration=conference_duration,
         recording=False,
         db_conn=db_conn,
     )
@@ -156,7 +242,7 @@ async def handle_campaign_conversation_end(
         defer_by_seconds=1,
     )
     # clear the conversation data from cache
-    cache.delete(ShortId.with_uuid(conversation))
+    await cache.delete(ShortId.with_uuid(conversation))
 
 
 async def hold_conversation_by_id(
@@ -193,39 +279,49 @@ async def add_agent_to_conversation(
     db_conn = ctx["db"]
     settings = ctx["settings"]
     queue = ctx["queue"]
-    cache = Redis.from_url(settings.redis_settings)
+    cache: Redis = ctx["cache"]
     twilio_client_: TwilioClient = ctx["twilio"]
-    campaign = await campaign_views.get_campaign_by_id(
-        campaign_id=queue_data.get("campaign_id"),
-        db_conn=db_conn,
-    )
+    campaign_id = queue_data.get("campaign_id")
+    # the campaign state carries the status, credentials and reattempt flag,
+    # pause / end write their status there too
+    camp_obj = await CampaignStateStore(cache).get(ShortId.with_uuid(campaign_id))
 
-    if campaign.get("campaign_status") in ["paused", "ended"]:
+    if camp_obj.get("status") in ["paused", "ended"]:
         print("Paused campaign didn't add agent")
         return
 
     workspace: UUID = queue_data.get("workspace")
 
-    details = await get_provider_details(
-        workspace_id=ShortId.with_uuid(workspace),
-    )
+    details = camp_obj.get("cpass_user")
+    if not details:
+        provider_details = await get_provider_details(
+            workspace_id=ShortId.with_uuid(workspace),
+        )
+        details = {
+            "string_id": provider_details.auth_id,
+            "auth_token": provider_details.auth_token,
+            "api_key": provider_details.api_key,
+            "api_secret": provider_details.api_secret,
+        }
 
     sub_client_: TwilioClient = sub_client(
         obj=twilio_client_,
-        details={
-            "string_id": details.auth_id,
-            "auth_token": details.auth_token,
-            "api_key": details.api_key,
-            "api_secret": details.api_secret,
-        },
-    )
-    camp_obj = (
-        cache.get(ShortId.with_uuid(queue_data.get("campaign_id"))) or "{}"
-    )
-    camp_obj = json.loads(camp_obj)
-    is_reattempt = (
-        True if camp_obj.get("is_reattempt", "False") == str(True) else False
+        details=details,
     )
+
+    staged = await DialStage(cache).pop(campaign_id, conversation_data.id_)
+    if staged:
+        await call_handlers.place_agent_dial(
+            staged=staged,
+            twilio_=sub_client_,
+            member=queue_data.get("member"),
+            campaign_id=campaign_id,
+            queue=queue,
+            cache=cache,
+        )
+        return
+
+    is_reattempt = camp_obj.get("is_reattempt") == str(True)
     await call_handlers.add_agent(
         conversation_data=conversation_data,
         db_conn=db_conn,
@@ -241,17 +337,26 @@ async def add_agent_to_conversation(
         next_conversation_id=queue_data.get("next_conversation_id"),
         member=queue_data.get("member"),
         call_script_id=queue_data.get("call_script_id"),
-        campaign_id=queue_data.get("campaign_id"),
+        campaign_id=campaign_id,
         settings=settings,
         queue=queue,
+        cache=cache,
         recording_enabled=queue_data.get("recording_enabled"),
         is_reattempt=is_reattempt,
     )
 
-    # await camp_services.update_campaign_dialed_contacts(
-    #     campaign_id=queue_data.get("campaign_id"),
-    #     db_conn=db_conn,
-    # )
+
+async def stage_next_dials(
+    ctx, campaign_id: UUID, workspace: UUID, from_sequence: int
+):
+    await services.stage_next_dials(
+        campaign_id=campaign_id,
+        workspace=workspace,
+        from_sequence=from_sequence,
+        twilio_client=ctx["twilio"],
+        settings=ctx["settings"],
+        cache=ctx["cache"],
+    )
 
 
 async def queue_conversation(
@@ -296,7 +401,176 @@ async def add_participant_call(
     await services.add_participant_call(validated_data=data, db_conn=db_conn)
 
 
+async def flush_call_status(ctx):
+    """Flushes call status transitions buffered by the twilio callbacks"""
+    await services.flush_call_status_updates(
+        cache=ctx["cache"],
+        db_conn=ctx["db"],
+        consumer=f"{socket.gethostname()}:{os.getpid()}",
+    )
+
+
 async def expire_cache(ctx, key: str):
+    cache: Redis = ctx["cache"]
+    await cache.delete(key)
+
+
+async def handle_parallel_answer(
+    ctx, campaign_id: UUID, conference: str, conversation: str, call_sid: str
+):
+    await services.handle_parallel_answer(
+        campaign_id=campaign_id,
+        conference=conference,
+        conversation=conversation,
+        call_sid=call_sid,
+        twilio_client=ctx["twilio"],
+        cache=ctx["cache"],
+    )
+
+
+# longest sleep of the dial timer, bounds how late a dial scheduled or
+# cancelled while it sleeps is noticed
+DIAL_TIMER_MAX_SLEEP_SECONDS = 1.0
+
+
+async def run_dial_timer(ctx):
+    """Worker loop of the dial timer, sleeps until the earliest pending dial
+    is due, at most DIAL_TIMER_MAX_SLEEP_SECONDS, and fires the due ones
+    """
+    timer = DialTimer(ctx["cache"])
+    # awaited by the worker shutdown so deploys don't cut dials short
+    dials: typing.Set[asyncio.Task] = ctx.setdefault("dial_tasks", set())
+    while True:
+        try:
+            token = uuid.uuid4().hex
+            for campaign_id, args, attempt in await timer.claim_due(token):
+                dial = asyncio.create_task(
+                    fire_dial(ctx, timer, token, campaign_id, args, attempt)
+                )
+                dials.add(dial)
+                dial.add_done_callback(dials.discard)
+            wait = await timer.seconds_until_next()
+            await asyncio.sleep(
+                DIAL_TIMER_MAX_SLEEP_SECONDS
+                if wait is None
+                else min(wait, DIAL_TIMER_MAX_SLEEP_SECONDS)
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("Dial timer failed", e)
+            await asyncio.sleep(1)
+
+
+async def fire_dial(
+    ctx,
+    timer: DialTimer,
+    token: str,
+    campaign_id: str,
+    args: typing.List[typing.Any],
+    attempt: int,
+):
+    """Dials a claimed dial, removed from the timer once it succeeded and
+    retried when it failed
+    """
+    try:
+        await add_agent_to_conversation(ctx, *args)
+    except Exception as e:
+        print("Dial failed for campaign", campaign_id, "attempt", attempt, e)
+        await timer.retry(campaign_id, token, attempt)
+        return
+    await timer.complete(campaign_id, token)
+
+
+WEBHOOK_PROCESSORS = {
+    "conference": conference_handler.process_conference_event,
+    "client": event_handler.process_client_event,
+    "agent": event_handler.process_agent_event,
+}
+
+
+async def run_webhook_consumer(ctx):
+    """Worker loop processing the streamed campaign webhooks of the
+    partitions leased to this worker, in order within every partition
+    """
     settings = ctx["settings"]
-    cache = Redis.from_url(settings.redis_settings)
-    cache.delete(key)
+    stream = WebhookStream(
+        ctx["cache"], partitions=settings.webhook_stream_partitions
+    )
+    consumer = f"{socket.gethostname()}:{os.getpid()}"
+    request = worker_request(ctx)
+    owned: typing.Set[int] = set()
+    await stream.create_groups()
+    try:
+        while True:
+            try:
+                owned, acquired = await stream.acquire(consumer, owned)
+                # entries a previous owner didn't finish go first
+                for partition in sorted(acquired):
+                    await process_webhooks(
+                        stream,
+                        request,
+                        consumer,
+                        await stream.claim_pending(consumer, partition),
+                    )
+                if not owned:
+                    await asyncio.sleep(1)
+                    continue
+                await process_webhooks(
+                    stream, request, consumer, await stream.read(consumer, owned)
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("Webhook consumer failed", e)
+                await asyncio.sleep(1)
+    finally:
+        await stream.leave(consumer, owned)
+
+
+async def process_webhooks(
+    stream: WebhookStream,
+    request,
+    consumer: str,
+    events: typing.List[WebhookEvent],
+):
+    """Partitions run concurrently, the events of a partition one by one"""
+    partitions: typing.Dict[int, typing.List[WebhookEvent]] = {}
+    for event in events:
+        partitions.setdefault(event.partition, []).append(event)
+    await asyncio.gather(
+        *[
+            process_partition(stream, request, consumer, partition_events)
+            for partition_events in partitions.values()
+        ]
+    )
+
+
+async def process_partition(
+    stream: WebhookStream,
+    request,
+    consumer: str,
+    events: typing.List[WebhookEvent],
+):
+    for event in events:
+        # a batch may outlast the lease, the events left stay pending and
+        # are claimed by the new owner of the partition
+        if not await stream.renew(consumer, event.partition):
+            print("Webhook partition lease lost", event.partition)
+            return
+        stats = start_query_scope(
+            f"webhook {event.kind} {event.entry_id}",
+            request.app.state.settings.pg_n_plus_one_threshold,
+        )
+        try:
+            await WEBHOOK_PROCESSORS[event.kind](
+                event.form, event.callback_data, request
+            )
+        except Exception as e:
+            # twilio doesn't retry a streamed webhook, kept for inspection
+            print("Webhook processing failed", event.kind, event.entry_id, e)
+            await stream.dead_letter(event, repr(e))
+            continue
+        finally:
+            end_query_scope(stats)
+        await stream.ack(event)
@@ -1,6 +1,6 @@
 # Handles the event for the conference
-import json
-from redis import Redis
+import typing
+
 from starlette.endpoints import HTTPEndpoint
 from starlette.responses import Response
 from starlette.requests import Request
@@ -8,43 +8,62 @@ from starlette.requests import Request
 from krispcall.common.error_handler.exceptions import InsufficientBalanceException
 from krispcall.common.utils.shortid import ShortId
 from krispcall.common.utils.helpers import url_safe_decode
+from krispcall.common.configs.request_helpers import get_cache
 from krispcall.common.services.helper import convert_dict_to_snake_case
 from krispcall.common.services.status import HTTP_200_OK, HTTP_400_INVALID, HTTP_500_INTERNAL_SERVER_ERROR
 from krispcall.konference.service_layer import abstracts
+from krispcall.konference.adapters.state_store import CampaignStateStore
+from krispcall.konference.adapters.parallel_dial import ParallelDial
 from krispcall.konference import services
+from krispcall.konference.entrypoints.route_handlers.dedup import deduplicate_callback
+from krispcall.konference.entrypoints.route_handlers.ingestion import ingest_webhook
+
+
+async def process_conference_event(
+    form: typing.Dict[str, str], callback_data: typing.List[str], request: Request
+) -> None:
+    workspace = callback_data[0]
+    campaign_id = callback_data[1]
+    conference_friendly_name = callback_data[2]
+    conversation = callback_data[3]
+    is_reattempt = True if int(callback_data[4]) else False
+    validated_data = abstracts.ConferenceParticipantEvent(
+        **(convert_dict_to_snake_case(form))
+    )
+    cache = get_cache(request)
+    camp_obj = await CampaignStateStore(cache).get(campaign_id)
+    await services.handle_conference_event(
+        validated_data=validated_data,
+        request=request,
+        workspace=ShortId(workspace).uuid(),
+        campaign_id=ShortId(campaign_id).uuid(),
+        conference_friendly_name=ShortId(conference_friendly_name).uuid(),
+        conversation=ShortId(conversation).uuid(),
+        is_reattempt=is_reattempt,
+        camp_obj=camp_obj,
+        cache=cache,
+    )
 
 
 class CampaignConferenceHandler(HTTPEndpoint):
     """Handles the conference event for the dialing campaign"""
 
+    @deduplicate_callback
     async def post(self, request: Request):
         try:
-            data = await request.form()
+            data = dict(await request.form())
             callback_data = request.path_params["callback_data"]
             decoded_data = url_safe_decode(callback_data).split(",")
-            workspace = decoded_data[0]
-            campaign_id = decoded_data[1]
-            conference_friendly_name = decoded_data[2]
-            conversation = decoded_data[3]
-            is_reattempt = True if int(decoded_data[4]) else False
-            validated_data = abstracts.ConferenceParticipantEvent(
-                **(convert_dict_to_snake_case(dict(data)))
-            )
-            settings = request.app.state.settings
-            cache = Redis.from_url(settings.redis_settings)
-            values = cache.get(campaign_id) or "{}"
-            camp_obj = json.loads(values)
-            await services.handle_conference_event(
-                validated_data=validated_data,
-                request=request,
-                workspace=ShortId(workspace).uuid(),
-                campaign_id=ShortId(campaign_id).uuid(),
-                conference_friendly_name=ShortId(conference_friendly_name).uuid(),
-                conversation=ShortId(conversation).uuid(),
-                is_reattempt=is_reattempt,
-                camp_obj=camp_obj,
-                cache=cache,
-            )
+            if request.app.state.settings.webhook_stream_ingestion:
+                # bad events are refused before twilio gets its 200
+                int(decoded_data[4])
+                abstracts.ConferenceParticipantEvent(
+                    **(convert_dict_to_snake_case(data))
+                )
+            if not await ingest_webhook(
+                request, "conference", decoded_data[2], decoded_data, data
+            ):
+                await process_conference_event(data, decoded_data, request)
             return Response(
                 status_code=HTTP_200_OK.status_code, media_type="application/xml"
             )
@@ -66,6 +85,7 @@ class CampaignConferenceHandler(HTTPEndpoint):
 class ConferenceRecordingHandler(HTTPEndpoint):
     """Handles the conference event for the dialing campaign"""
 
+    @deduplicate_callback
     async def post(self, request: Request):
         try:
             # parse data
@@ -83,6 +103,12 @@ class ConferenceRecordingHandler(HTTPEndpoint):
             ):
                 recording_url = data.get("recording_url", "")
                 recording_duration = data.get("recording_duration", 0)
+                # a parallel dialing conference records the contact that answered
+                winner = await ParallelDial(get_cache(request)).winner(
+                    conference_friendly_name
+                )
+                if winner:
+                    conversation = winner
 
                 await services.update_recording_info(
                     conversation=ShortId(conversation).uuid(),
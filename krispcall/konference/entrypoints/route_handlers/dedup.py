@@ -0,0 +1,33 @@
+import functools
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from krispcall.common.configs.request_helpers import get_cache
+from krispcall.konference.adapters.callback_dedup import CallbackDedup, callback_key
+
+
+def deduplicate_callback(post):
+    """Answers retried or duplicate twilio callbacks with 200 without running
+    the handler, the key is released again when the handler fails
+    """
+
+    @functools.wraps(post)
+    async def wrapper(self, request: Request):
+        key = callback_key(await request.form())
+        if key is None:
+            return await post(self, request)
+        dedup = CallbackDedup(get_cache(request))
+        if not await dedup.claim(key):
+            print("Duplicate callback", key)
+            return Response(status_code=200, media_type="application/xml")
+        try:
+            response = await post(self, request)
+        except Exception:
+            await dedup.release(key)
+            raise
+        if response.status_code >= 400:
+            await dedup.release(key)
+        return response
+
+    return wrapper
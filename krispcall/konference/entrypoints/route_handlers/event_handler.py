@@ -1,9 +1,8 @@
-import copy
-import json
+import typing
+
 from krispcall.common.utils.helpers import url_safe_decode
 from krispcall.konference.domain.models import ConferenceStatus
-from krispcall.common.configs.request_helpers import get_database
-from redis import Redis
+from krispcall.common.configs.request_helpers import get_cache, get_database
 from starlette.endpoints import HTTPEndpoint
 from starlette.requests import Request
 from starlette.responses import Response
@@ -13,27 +12,155 @@ from krispcall.konference.service_layer import (
 )
 from krispcall.common.services.helper import change_camel_case_to_snake
 from krispcall.konference import services
+from krispcall.konference.adapters.state_store import CampaignStateStore
 from krispcall.common.utils.shortid import ShortId
 from krispcall.providers.queue_service.job_queue import JobQueue
 from krispcall.twilio.utils import TwilioClient, sub_client
+from krispcall.konference.entrypoints.route_handlers.dedup import deduplicate_callback
+from krispcall.konference.entrypoints.route_handlers.ingestion import ingest_webhook
 
 
 def replace_from(string: str):
     return string.replace("From", "ChannelNumber")
 
 
+async def process_client_event(
+    form: typing.Dict[str, str], callback_data: typing.List[str], request: Request
+) -> None:
+    db_conn = get_database(request)
+    call_status = form.get("CallStatus")
+    data = {
+        change_camel_case_to_snake(replace_from(key)): value
+        for key, value in form.items()
+    }
+    validated_data = abstracts.TwilioPSTNCallback.construct(**data)
+    (
+        workspace,
+        campaign_id,
+        conference_friendly_name,
+        conversation,
+    ) = callback_data
+    if call_status.lower() in [
+        "in_progress",
+        "in-progress",
+    ]:
+        cache = get_cache(request)
+        details = await CampaignStateStore(cache).get_field(
+            campaign_id, "cpass_user"
+        )
+        _client: TwilioClient = sub_client(
+            obj=request.app.state.twilio,
+            details=details,
+        )
+        participants = await views.get_conversation_participants(
+            conversation=ShortId(conversation).uuid(), db_conn=db_conn
+        )
+        agent_call = [
+            p for p in participants if p.get("participant_type") == "agent"
+        ]
+        if agent_call:
+            agent_call = agent_call[0].get("twi_sid")
+        else:
+            agent_call = validated_data.call_sid
+
+        # send event to front end
+        await _client.call_resource.send_event_to_call(
+            call_sid=agent_call,
+            msg={
+                "conversationSid": conversation,
+                "status": "callConnected",
+            },
+        )
+
+    if call_status.lower() in [
+        "completed",
+        "busy",
+        "canceled",
+        "failed",
+        "no-answer",
+        "noanswer",
+    ]:
+        await request.app.state.queue.enqueue_job(
+            "expire_cache",
+            data=[validated_data.call_sid],
+            queue_name="arq:pd_queue",
+            defer_by_seconds=500,
+        )
+    # get the conversation id from the callback data to update
+    # the campaign conversation status
+    conversation_status = {
+        "completed": ConferenceStatus.completed,
+        "busy": ConferenceStatus.busy,
+        "canceled": ConferenceStatus.cancelled,
+        "failed": ConferenceStatus.failed,
+        "no-answer": ConferenceStatus.no_answer,
+        "noanswer": ConferenceStatus.no_answer,
+        "in_progress": ConferenceStatus.in_progress,
+    }.get(call_status, ConferenceStatus.in_progress)
+    await services.buffer_participant_event(
+        validated_data=validated_data,
+        cache=get_cache(request),
+        conversation_id=ShortId(conversation).uuid(),
+        conversation_status=conversation_status,
+    )
+
+
 class CampaignClientHandler(HTTPEndpoint):
     """Handles the conference event for the dialing campaign
     Will use this as final callback to update the campaign participant event for agent
     """
 
+    @deduplicate_callback
     async def post(self, request):
         # parse data
-        data = await request.form()
+        data = dict(await request.form())
         call_status = data.get("CallStatus")
         if call_status == "initiated":
             return Response(status_code=200, media_type="application/xml")
-        db_conn = get_database(request)
+        decoded_data = url_safe_decode(request.path_params["callback_data"]).split(
+            ","
+        )
+        if not await ingest_webhook(
+            request, "client", decoded_data[2], decoded_data, data
+        ):
+            await process_client_event(data, decoded_data, request)
+        return Response(status_code=200, media_type="application/xml")
+
+
+class ParallelLegAnswerHandler(HTTPEndpoint):
+    """Answer twiml of a parallel dialing leg, bridges the first human to the
+    agent conference and hangs up the rest
+    """
+
+    async def post(self, request: Request):
+        data = await request.form()
+        callback_data = request.path_params["callback_data"]
+        (
+            workspace,
+            campaign_id,
+            conference_friendly_name,
+            conversation,
+        ) = url_safe_decode(callback_data).split(",")
+        twiml = await services.answer_parallel_leg(
+            call_sid=str(data.get("CallSid")),
+            answered_by=data.get("AnsweredBy"),
+            campaign_id=ShortId(campaign_id).uuid(),
+            conference=conference_friendly_name,
+            conversation=conversation,
+            twilio_client=request.app.state.twilio,
+            queue=request.app.state.queue,
+            cache=get_cache(request),
+        )
+        return Response(content=twiml, status_code=200, media_type="application/xml")
+
+
+class ParallelLegStatusHandler(HTTPEndpoint):
+    """Final call status of a parallel dialing leg"""
+
+    @deduplicate_callback
+    async def post(self, request: Request):
+        data = await request.form()
+        call_status = str(data.get("CallStatus"))
         data = {
             change_camel_case_to_snake(replace_from(key)): value
             for key, value in data.items()
@@ -46,112 +173,68 @@ class CampaignClientHandler(HTTPEndpoint):
             conference_friendly_name,
             conversation,
         ) = url_safe_decode(callback_data).split(",")
-        if call_status.lower() in [
-            "in_progress",
-            "in-progress",
-        ]:
-            cache = Redis.from_url(request.app.state.settings.redis_settings)
-            values = cache.get(campaign_id) or {}
-            camp_obj = json.loads(values)
-            details = camp_obj.get("cpass_user")
-            _client: TwilioClient = sub_client(
-                obj=copy.copy(request.app.state.twilio),
-                details=details,
-            )
-            participants = await views.get_conversation_participants(
-                conversation=ShortId(conversation).uuid(), db_conn=db_conn
-            )
-            agent_call = [
-                p for p in participants if p.get("participant_type") == "agent"
-            ]
-            if agent_call:
-                agent_call = agent_call[0].get("twi_sid")
-            else:
-                agent_call = validated_data.call_sid
-
-            # send event to front end
-            await _client.call_resource.send_event_to_call(
-                call_sid=agent_call,
-                msg={
-                    "conversationSid": conversation,
-                    "status": "callConnected",
-                },
-            )
-
-        if call_status.lower() in [
-            "completed",
-            "busy",
-            "canceled",
-            "failed",
-            "no-answer",
-            "noanswer",
-        ]:
-            await request.app.state.queue.enqueue_job(
-                "expire_cache",
-                data=[validated_data.call_sid],
-                queue_name="arq:pd_queue",
-                defer_by_seconds=500,
-            )
-        # get the conversation id from the callback data to update
-        # the campaign conversation status
-        conversation_status = {
-            "completed": ConferenceStatus.completed,
-            "busy": ConferenceStatus.busy,
-            "canceled": ConferenceStatus.cancelled,
-            "failed": ConferenceStatus.failed,
-            "no-answer": ConferenceStatus.no_answer,
-            "noanswer": ConferenceStatus.no_answer,
-            "in_progress": ConferenceStatus.in_progress,
-        }.get(call_status, ConferenceStatus.in_progress)
-        await services.update_campaign_conversation_status(
-            status=conversation_status,
-            conversation_id=ShortId(conversation).uuid(),
-            db_conn=db_conn,
-        )
-        await services.handle_participant_event(
+        await services.handle_parallel_leg_status(
             validated_data=validated_data,
-            db_conn=db_conn,
+            call_status=call_status.lower(),
+            campaign_id=ShortId(campaign_id).uuid(),
+            conference=conference_friendly_name,
+            conversation=conversation,
+            request=request,
+            cache=get_cache(request),
         )
         return Response(status_code=200, media_type="application/xml")
 
 
+async def process_agent_event(
+    form: typing.Dict[str, str], callback_data: typing.List[str], request: Request
+) -> None:
+    call_status = form.get("CallStatus")
+    job_queue: JobQueue = request.app.state.queue
+    data = {
+        change_camel_case_to_snake(replace_from(key)): value
+        for key, value in form.items()
+    }
+    validated_data = abstracts.TwilioAgentCallback.construct(**data)
+
+    if call_status.lower() in [
+        "completed",
+        "busy",
+        "canceled",
+        "failed",
+        "no-answer",
+        "noanswer",
+    ]:
+        await job_queue.enqueue_job(
+            "expire_cache",
+            data=[validated_data.call_sid],
+            queue_name="arq:pd_queue",
+            defer_by_seconds=500,
+        )
+
+    await services.buffer_participant_event(
+        validated_data=validated_data,
+        cache=get_cache(request),
+    )
+
+
 class CampaignAgentHandler(HTTPEndpoint):
     """Handles the conference event for numbers added to campaign
     Will this as final callback to update the campaign participant event
     """
 
+    @deduplicate_callback
     async def post(self, request: Request):
         """Request object"""
-        data = await request.form()
+        data = dict(await request.form())
         call_status = data.get("CallStatus")
         if call_status == "initiated":
             return Response(status_code=200, media_type="application/xml")
-        db_conn = get_database(request)
-        job_queue: JobQueue = request.app.state.queue
-        data = {
-            change_camel_case_to_snake(replace_from(key)): value
-            for key, value in data.items()
-        }
-        validated_data = abstracts.TwilioAgentCallback.construct(**data)
-        callback_data = request.path_params["callback_data"]
-
-        if call_status.lower() in [
-            "completed",
-            "busy",
-            "canceled",
-            "failed",
-            "no-answer",
-            "noanswer",
-        ]:
-            await job_queue.enqueue_job(
-                "expire_cache",
-                data=[validated_data.call_sid],
-                queue_name="arq:pd_queue",
-                defer_by_seconds=500,
-            )
-
-        await services.handle_participant_event(
-            validated_data=validated_data,
-            db_conn=db_conn,
+        # workspace/campaign/conference
+        decoded_data = url_safe_decode(request.path_params["callback_data"]).split(
+            "/"
         )
+        if not await ingest_webhook(
+            request, "agent", decoded_data[-1], decoded_data, data
+        ):
+            await process_agent_event(data, decoded_data, request)
         return Response(status_code=200, media_type="application/xml")
@@ -0,0 +1,48 @@
+"""
+Stream ingestion of the campaign webhooks, see adapters/webhook_stream.py.
+
+With webhook_stream_ingestion enabled the webhook handlers only validate the
+callback and append it to the stream, the pd worker runs the same processing
+the handlers run inline otherwise.
+"""
+import typing
+from types import SimpleNamespace
+
+from starlette.datastructures import State
+from starlette.requests import Request
+
+from krispcall.common.configs.request_helpers import get_cache
+from krispcall.konference.adapters.webhook_stream import WebhookStream
+
+
+async def ingest_webhook(
+    request: Request,
+    kind: str,
+    conference: str,
+    callback_data: typing.List[str],
+    form: typing.Dict[str, str],
+) -> bool:
+    """Appends the webhook to the stream, False when ingestion is disabled"""
+    settings = request.app.state.settings
+    if not settings.webhook_stream_ingestion:
+        return False
+    await WebhookStream(
+        get_cache(request), partitions=settings.webhook_stream_partitions
+    ).append(kind, conference, callback_data, form)
+    return True
+
+
+def worker_request(ctx: typing.Dict) -> Request:
+    """Request of a webhook processed by the worker, processing only reads
+    request.app.state
+    """
+    state = State(
+        {
+            "settings": ctx["settings"],
+            "db": ctx["db"],
+            "twilio": ctx["twilio"],
+            "queue": ctx["queue"],
+            "cache": ctx["cache"],
+        }
+    )
+    return SimpleNamespace(app=SimpleNamespace(state=state))  # type: ignore
@@ -27,6 +27,16 @@ routes = [
         event_handler.CampaignClientHandler,
         methods=["POST"],
     ),
+    Route(
+        "/sales_callbacks/campaigns/parallel/answer/{callback_data:str}",
+        event_handler.ParallelLegAnswerHandler,
+        methods=["POST"],
+    ),
+    Route(
+        "/sales_callbacks/campaigns/parallel/status/{callback_data:str}",
+        event_handler.ParallelLegStatusHandler,
+        methods=["POST"],
+    ),
     Route(
         "/test",
         event_handler.CampaignAgentHandler,
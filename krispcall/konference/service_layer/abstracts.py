@@ -101,6 +101,7 @@ class AddParticipantCallMsg(DataModel):
 
 @unique
 class ConferenceEvent(str, Enum):
+    conference_start = "conference-start"
     participant_join = "participant-join"
     conference_end = "conference-end"
     participant_leave = "participant-leave"
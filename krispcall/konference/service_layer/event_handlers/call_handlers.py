@@ -6,6 +6,7 @@ import typing
 import uuid
 import time
 from krispcall.common.database.connection import DbConnection
+from krispcall.common.metrics import INTER_CALL_GAP_SECONDS
 from krispcall.common.services.status import HTTP_404_CONTACT_LIST_NOT_FOUND
 from krispcall.common.utils.shortid import ShortId
 from uuid import UUID, uuid4
@@ -15,12 +16,19 @@ from krispcall.konference.service_layer.exceptions import ContactNotFoundExcepti
 from krispcall.providers.queue_service.job_queue import JobQueue
 from krispcall.common.configs.app_settings import Settings
 from krispcall.konference.service_layer import abstracts, helpers, views
+from krispcall.konference.adapters.state_store import CampaignStateStore
+from krispcall.konference.adapters.dial_timer import DialTimer
+from krispcall.konference.adapters.dial_stage import DialStage, StagedDial
+from krispcall.konference.adapters.conference_registry import (
+    CONFERENCE_COMPLETED,
+    ConferenceRegistry,
+)
 from krispcall.konference import services
 from krispcall.konference.domain import models
 from krispcall.campaigns.domain import models as campaign_models
 from krispcall.campaigns.service_layer import views as campaign_views
 from krispcall.campaigns import services as camp_services
-from redis import Redis
+from redis.asyncio import Redis
 
 from krispcall.twilio.twilio_client import TwilioClient
 
@@ -37,6 +45,7 @@ async def add_agent(
     call_script_id: typing.Union[UUID, None],
     dialing_number_id: UUID,
     queue: JobQueue,
+    cache: Redis,
     cool_off_period_enabled: bool,
     cool_off_period: typing.Union[None, int],
     next_number_to_dial: typing.Union[str, None],
@@ -44,8 +53,51 @@ async def add_agent(
     is_reattempt: bool = False,
     recording_enabled: bool = False,
 ):
-    cache = Redis.from_url(settings.redis_settings)
+    staged = await prepare_agent_dial(
+        conversation_data=conversation_data,
+        twilio_=twilio_,
+        member=member,
+        workspace=workspace,
+        dialing_number=dialing_number,
+        campaign_id=campaign_id,
+        call_script_id=call_script_id,
+        dialing_number_id=dialing_number_id,
+        cool_off_period_enabled=cool_off_period_enabled,
+        cool_off_period=cool_off_period,
+        next_number_to_dial=next_number_to_dial,
+        next_conversation_id=next_conversation_id,
+        is_reattempt=is_reattempt,
+        recording_enabled=recording_enabled,
+    )
+    await place_agent_dial(
+        staged=staged,
+        twilio_=twilio_,
+        member=member,
+        campaign_id=campaign_id,
+        queue=queue,
+        cache=cache,
+    )
 
+
+async def prepare_agent_dial(
+    conversation_data: abstracts.AddCampaignConversation,
+    twilio_: TwilioClient,
+    member: UUID,
+    workspace: UUID,
+    dialing_number: str,
+    campaign_id: UUID,
+    call_script_id: typing.Union[UUID, None],
+    dialing_number_id: UUID,
+    cool_off_period_enabled: bool,
+    cool_off_period: typing.Union[None, int],
+    next_number_to_dial: typing.Union[str, None],
+    next_conversation_id: typing.Union[None, UUID],
+    is_reattempt: bool = False,
+    recording_enabled: bool = False,
+) -> StagedDial:
+    """Everything the agent call of a conversation needs before it is placed,
+    built ahead of time by stage_next_dials while the previous call is live
+    """
     (
         conversation_id,
         conference_sid,
@@ -82,11 +134,12 @@ async def add_agent(
 
     agent_callback_data = f"{workspace_sid}/{camp_sid}/{conf_sid}"
 
-    agent_call = await twilio_.call_resource.campaign_add_participant(
+    return StagedDial(
+        conversation_id=conversation_id,
         call_to=ShortId.with_uuid(member),
         call_from=dialing_number,
         callback_data=url_safe_encode(string=agent_callback_data),
-        twiml=str(campaign_conference),
+        twiml=campaign_conference,
         params={
             "isCampaignCall": True,
             "campaignId": ShortId.with_uuid(campaign_id),
@@ -108,6 +161,30 @@ async def add_agent(
             "isReattempt": is_reattempt,
             "recordingEnabled": recording_enabled,
         },
+        participant_call_id=ShortId.with_uuid(uuid4()),
+    )
+
+
+async def place_agent_dial(
+    staged: StagedDial,
+    twilio_: TwilioClient,
+    member: UUID,
+    campaign_id: UUID,
+    queue: JobQueue,
+    cache: Redis,
+):
+    """Calls the agent with a prepared dial"""
+    state_store = CampaignStateStore(cache)
+    campaign_sid = ShortId.with_uuid(campaign_id)
+    last_call_ended_at = await state_store.get_field(
+        campaign_sid, "last_call_ended_at"
+    )
+    agent_call = await twilio_.call_resource.campaign_add_participant(
+        call_to=staged.call_to,
+        call_from=staged.call_from,
+        callback_data=staged.callback_data,
+        twiml=staged.twiml,
+        params=staged.params,
     )
     # queue all the conversations
 
@@ -117,8 +194,11 @@ async def add_agent(
         raise Exception(
             "Agent couldn't be added to the call. Please contact support or check your campaign settings."
         )
+    if last_call_ended_at is not None:
+        INTER_CALL_GAP_SECONDS.observe(max(time.time() - last_call_ended_at, 0))
+        await state_store.update(campaign_sid, {"last_call_ended_at": None})
     participant_call = abstracts.AddParticipantCallMsg(
-        id_=ShortId.with_uuid(uuid4()),
+        id_=staged.participant_call_id,
         twi_sid=agent_call.get("sid"),
         status=models.TwilioCallStatus.queued.value,
         created_by=ShortId.with_uuid(member),
@@ -126,9 +206,9 @@ async def add_agent(
         recording_url=None,
         recording_duration=None,
         call_duration=None,
-        conversation_id=ShortId.with_uuid(conversation_data.id_),
+        conversation_id=ShortId.with_uuid(staged.conversation_id),
     )
-    cache.set(participant_call.twi_sid, json.dumps(dict(participant_call)))
+    await cache.set(participant_call.twi_sid, json.dumps(dict(participant_call)))
     await queue.enqueue_job(
         "add_participant_call",
         data=[participant_call],  # type: ignore
@@ -150,6 +230,7 @@ async def start_campaign_loop(
     settings: Settings,
     cpass_user: typing.Dict,
     queue: JobQueue,
+    cache: Redis,
 ):
     """
     @params
@@ -176,7 +257,6 @@ async def start_campaign_loop(
         member=member,
         campaign_id=campaign.id_,
     )
-    cache = Redis.from_url(settings.redis_settings)
 
     await queue.enqueue_job(
         "queue_conversation",
@@ -198,7 +278,6 @@ async def start_campaign_loop(
         "cpass_user": cpass_user,
         "next_number_to_dial": next_number_to_dial,
         "current_call_seq": conversation_data[0].sequence_number,
-        "conversation_data": [dict(data) for data in conversation_data],
         "assignee_id": ShortId.with_uuid(member),
         "dialing_number": campaign.dialing_number,
         "dialing_number_id": ShortId.with_uuid(campaign.dialing_number_id),
@@ -208,8 +287,13 @@ async def start_campaign_loop(
         if not campaign.call_script_id
         else ShortId.with_uuid(campaign.call_script_id),
         "recording_enabled": campaign.call_recording_enabled,
+        "lines_per_agent": campaign.lines_per_agent,
     }
-    cache.set(ShortId.with_uuid(campaign.id_), json.dumps(camp_obj))
+    await CampaignStateStore(cache).save(
+        ShortId.with_uuid(campaign.id_),
+        state=camp_obj,
+        conversations=[dict(data) for data in conversation_data],
+    )
 
     await add_agent(
         conversation_data=abstracts.AddCampaignConversation(
@@ -239,6 +323,7 @@ async def start_campaign_loop(
         cool_off_period=campaign.cool_off_period,
         settings=settings,
         queue=queue,
+        cache=cache,
         recording_enabled=campaign.call_recording_enabled,
     )
 
@@ -254,6 +339,7 @@ async def pause_campaign_loop(
     settings: Settings,
     cpass_user: typing.Dict,
     queue: JobQueue,
+    cache: Redis,
 ):
     # pausing campaign loop is same as ending campaign loop but instead of
     # ending all the active conversations inqcluding ones in the queue
@@ -268,6 +354,11 @@ async def pause_campaign_loop(
         settings=settings,
         cpass_user=cpass_user,
         queue=queue,
+        cache=cache,
+    )
+    await CampaignStateStore(cache).update(
+        ShortId.with_uuid(campaign.id_),
+        {"status": campaign_models.CampaignStatus.PAUSED.value},
     )
 
 
@@ -287,6 +378,7 @@ async def resume_campaign_loop(
     settings: Settings,
     cpass_user: typing.Dict,
     queue: JobQueue,
+    cache: Redis,
 ):
     # resuming campaign we don't need to do anything
     # special than starting campaign loop
@@ -297,7 +389,6 @@ async def resume_campaign_loop(
     # make more sensible and remove bad comments and duplication
     if not campaign.next_number_to_dial:
         raise Exception("No contact remaining to call")
-    cache = Redis.from_url(settings.redis_settings)
     callable_data = await views.get_callable_data(
         campaign_id=campaign.id_,
         db_conn=db_conn,
@@ -328,10 +419,6 @@ async def resume_campaign_loop(
         "cpass_user": cpass_user,
         "next_number_to_dial": next_number_to_dial,
         "current_call_seq": conversation_data.sequence_number,
-        "conversation_data": [
-            dict(abstracts.AddCampaignConversationMsg(**dict(data)))
-            for data in callable_data
-        ],
         "assignee_id": ShortId.with_uuid(member),
         "dialing_number": campaign.dialing_number,
         "dialing_number_id": ShortId.with_uuid(campaign.dialing_number_id),
@@ -341,9 +428,17 @@ async def resume_campaign_loop(
         if not campaign.call_script_id
         else ShortId.with_uuid(campaign.call_script_id),
         "recording_enabled": campaign.call_recording_enabled,
+        "lines_per_agent": campaign.lines_per_agent,
     }
 
-    cache.set(ShortId.with_uuid(campaign.id_), json.dumps(camp_obj))
+    await CampaignStateStore(cache).save(
+        ShortId.with_uuid(campaign.id_),
+        state=camp_obj,
+        conversations=[
+            dict(abstracts.AddCampaignConversationMsg(**dict(data)))
+            for data in callable_data
+        ],
+    )
 
     await add_agent(
         conversation_data=conversation_data,
@@ -361,6 +456,7 @@ async def resume_campaign_loop(
         campaign_id=campaign.id_,
         settings=settings,
         queue=queue,
+        cache=cache,
         recording_enabled=campaign.call_recording_enabled,
     )
 
@@ -374,6 +470,7 @@ async def reattempt_campaign_loop(
     workspace: UUID,
     cpass_user: typing.Dict,
     queue: JobQueue,
+    cache: Redis,
     st: typing.Union[typing.List[str], None] = None,
 ):
     # reattempt campaign loop is a special case of resume campaign loop
@@ -385,7 +482,6 @@ async def reattempt_campaign_loop(
     # afterwards.
     # but we set the initial_call to false
     # and current attempt to 1 instead of 0
-    cache = Redis.from_url(settings.redis_settings)
     contact_list = await views.get_reattempt_list(
         campaign_id=campaign.id_, db_conn=db_conn
     )
@@ -407,7 +503,6 @@ async def reattempt_campaign_loop(
         "cpass_user": cpass_user,
         "next_number_to_dial": campaign.next_number_to_dial,
         "current_call_seq": conversation_data[0].sequence_number,
-        "conversation_data": [dict(data) for data in conversation_data],
         "assignee_id": ShortId.with_uuid(member),
         "dialing_number": campaign.dialing_number,
         "dialing_number_id": ShortId.with_uuid(campaign.dialing_number_id),
@@ -417,8 +512,13 @@ async def reattempt_campaign_loop(
         if not campaign.call_script_id
         else ShortId.with_uuid(campaign.call_script_id),
         "recording_enabled": campaign.call_recording_enabled,
+        "lines_per_agent": campaign.lines_per_agent,
     }
-    cache.set(ShortId.with_uuid(campaign.id_), json.dumps(camp_obj))
+    await CampaignStateStore(cache).save(
+        ShortId.with_uuid(campaign.id_),
+        state=camp_obj,
+        conversations=[dict(data) for data in conversation_data],
+    )
 
     await queue.enqueue_job(
         "queue_conversation",
@@ -468,6 +568,7 @@ async def reattempt_campaign_loop(
         is_reattempt=True,
         settings=settings,
         queue=queue,
+        cache=cache,
         recording_enabled=campaign.call_recording_enabled,
     )
     return campaign.id_
@@ -482,8 +583,17 @@ async def end_campaign_loop(
     settings: Settings,
     cpass_user: typing.Dict,
     queue: JobQueue,
+    cache: Redis,
     st: typing.Union[None, typing.List[str]] = None,
 ):
+    # drop the next dial still waiting out its cool off
+    await DialTimer(cache).cancel(campaign.id_)
+    await DialStage(cache).clear(campaign.id_)
+    # webhooks of the calls still live stop the loop from dialing on
+    await CampaignStateStore(cache).update(
+        ShortId.with_uuid(campaign.id_),
+        {"status": campaign_models.CampaignStatus.ENDED.value},
+    )
     # get the active campagin conversations
     active_conversations = await views.get_active_campaign_conferences(
         st=st if st else ["in_progress"],
@@ -496,13 +606,22 @@ async def end_campaign_loop(
     # # all of the callbacks for the ongoing calls which ended will
     # # be handled by callback handlers
     # # end all of the conference calls
-    for conversation in active_conversations:
-        try:
-            await sub_client.conference_resource.terminate_by_name(
-                ShortId.with_uuid(conversation.get("twi_sid"))
-            )
-        except Exception as e:
-            print(e)
+    conferences = [
+        ShortId.with_uuid(conversation.get("twi_sid"))
+        for conversation in active_conversations
+    ]
+    # sids recorded by the conference callbacks skip the friendly name lookup
+    states = await ConferenceRegistry(cache).get_many(conferences)  # type: ignore
+    results = await sub_client.conference_resource.terminate_conferences(
+        {
+            name: state.sid if state else None
+            for name, state in states.items()
+            if state is None or state.status != CONFERENCE_COMPLETED
+        }
+    )
+    for name, result in results.items():
+        if not result["success"]:
+            print(f"Couldn't end conference {name}: {result}")
 
     # mark them complete in db
     return await services.complete_campaign_conversations(
@@ -33,6 +33,7 @@ async def get_conversation_participants(conversation: UUID, db_conn):
                 orm.participant_calls.c.status,
                 orm.participant_calls.c.participant_type,
                 orm.participant_calls.c.created_by,
+                orm.participant_calls.c.status_sequence,
             ]
         ).where(
             sa.and_(
@@ -98,6 +99,7 @@ async def get_camaign_conversation(
             [
                 orm.campaign_conversation.c.id,
                 orm.campaign_conversation.c.status,
+                orm.campaign_conversation.c.status_sequence,
             ]
         ).where(
             sa.and_(
@@ -165,6 +167,7 @@ async def get_campaign_conversations(
     campaign_id: UUID,
     db_conn: DbConnection,
     status_filter: str = "",
+    count_mode: typing.Optional[str] = None,
 ):
     if status_filter:
         filter = sa.and_(
@@ -204,7 +207,10 @@ async def get_campaign_conversations(
         ]
     ).where(sa.and_(filter))
     pagination = CursorPagination(
-        query=query, db_conn=db_conn, cursor_column="created_at"
+        query=query,
+        db_conn=db_conn,
+        cursor_column="created_at",
+        count_mode=count_mode,
     )
     return await pagination.page(pagination_params)
 
@@ -1,10 +1,12 @@
-import copy
+import asyncio
 import json
+import time
 import typing
+from email.utils import parsedate_to_datetime
 from krispcall.common.error_handler.exceptions import InsufficientBalanceException
 from krispcall.common.utils.helpers import url_safe_encode
 from krispcall.konference.billing.constant import CHARGE_START_CALL_TIME
-from redis import Redis
+from redis.asyncio import Redis
 from uuid import UUID, uuid4
 from typing import List, Literal, Union
 from starlette.requests import Request
@@ -26,10 +28,31 @@ from krispcall.konference.service_layer.abstracts import (
     TwilioAgentCallback,
 )
 
-from krispcall.twilio.utils import build_twilio_subaccount_client, sub_client
+from krispcall.twilio.utils import sub_client
+from krispcall.konference.adapters.twilio_clients import (
+    build_twilio_subaccount_client,
+)
+from krispcall.twilio import twiml_templates
 from krispcall.konference.adapters.provider import (
     get_provider_details,
 )
+from krispcall.konference.adapters.state_store import CampaignStateStore
+from krispcall.konference.adapters.dial_timer import DialTimer
+from krispcall.konference.adapters.dial_stage import DialStage
+from krispcall.konference.adapters.parallel_dial import (
+    HUMAN_ANSWERED_BY,
+    ParallelDial,
+)
+from krispcall.konference.adapters.conference_registry import (
+    CONFERENCE_COMPLETED,
+    CONFERENCE_IN_PROGRESS,
+    ConferenceRegistry,
+)
+from krispcall.konference.adapters.status_buffer import (
+    CallStatusBuffer,
+    FINAL_STATUS_SEQUENCE,
+    latest_status_updates,
+)
 from krispcall.konference.service_layer import abstracts
 from krispcall.konference.service_layer import unit_of_work
 from krispcall.konference.domain import models
@@ -42,7 +65,6 @@ from krispcall.twilio.twilio_client import TwilioClient
 from krispcall.konference.billing.enums import (
     ConferencParticipantEnum,
 )
-from redis import Redis
 from starlette.requests import Request
 from uuid import UUID
 
@@ -104,7 +126,11 @@ async def update_campaign_conversation_status(
     status: models.ConferenceStatus,
     conversation_id: UUID,
     db_conn: DbConnection,
+    final: bool = False,
 ):
+    """final marks the status as settled, buffered callbacks flushed later
+    don't overwrite it
+    """
     cmd = commands.UpdateCampaignConversationStatusCommand(
         id=conversation_id, status=status
     )
@@ -115,7 +141,10 @@ async def update_campaign_conversation_status(
         campaign_conversation = handlers.update_campaign_status(
             cmd, campaign_conversation
         )
-        await uow.repository.update_conversation_status(campaign_conversation)
+        await uow.repository.update_conversation_status(
+            campaign_conversation,
+            status_sequence=FINAL_STATUS_SEQUENCE if final else None,
+        )
         return campaign_conversation
 
 
@@ -198,6 +227,48 @@ async def add_participant_call(
     return participant_call
 
 
+def _event_time(validated_data: abstracts.ConferenceParticipantEvent) -> float:
+    try:
+        # twilio sends RFC 2822 dates, "Mon, 18 Oct 2026 10:00:00 +0000"
+        return parsedate_to_datetime(str(validated_data.timestamp)).timestamp()
+    except (TypeError, ValueError, OverflowError):
+        return time.time()
+
+
+async def record_conference_event(
+    validated_data: abstracts.ConferenceParticipantEvent, cache: Redis
+):
+    """Keeps the conference registry in step with the twilio callbacks"""
+    event = validated_data.status_callback_event
+    registry = ConferenceRegistry(cache)
+    friendly_name = validated_data.friendly_name
+    sid = validated_data.conference_sid
+    if event == abstracts.ConferenceEvent.conference_start:
+        await registry.record(
+            friendly_name,
+            sid=sid,
+            status=CONFERENCE_IN_PROGRESS,
+            started_at=_event_time(validated_data),
+        )
+    elif event == abstracts.ConferenceEvent.participant_join:
+        start_on_enter = str(validated_data.start_conference_on_enter).lower()
+        await registry.record(
+            friendly_name,
+            sid=sid,
+            status=CONFERENCE_IN_PROGRESS if start_on_enter == "true" else None,
+            participants_delta=1,
+        )
+    elif event == abstracts.ConferenceEvent.participant_leave:
+        await registry.record(friendly_name, sid=sid, participants_delta=-1)
+    elif event == abstracts.ConferenceEvent.conference_end:
+        await registry.record(
+            friendly_name,
+            sid=sid,
+            status=CONFERENCE_COMPLETED,
+            ended_at=_event_time(validated_data),
+        )
+
+
 async def handle_conference_event(
     validated_data: abstracts.ConferenceParticipantEvent,
     request: Request,
@@ -209,6 +280,7 @@ async def handle_conference_event(
     camp_obj: typing.Dict,
     cache: Redis,
 ):
+    await record_conference_event(validated_data, cache)
     # check if the event is participant join
     if (
         validated_data.status_callback_event
@@ -217,8 +289,15 @@ async def handle_conference_event(
         # Start charging to customer after participant join and sequence number 1
         if int(validated_data.sequence_number) == 1:
             db_conn: DbConnection = request.app.state.db
-            queue: JobQueue = request.app.state.queue
             twilio_client: TwilioClient = request.app.state.twilio
+            campaign_conversation = await CampaignStateStore(
+                cache
+            ).get_conversation_by_twi_sid(
+                ShortId.with_uuid(campaign_id),
+                ShortId.with_uuid(conference_friendly_name),
+            )
+            if not campaign_conversation:
+                raise Exception("Conversation not found!")
 
             campaign_call_params = CampaignOutboundCallRequest(
                 workspace_id=workspace,
@@ -227,9 +306,9 @@ async def handle_conference_event(
                 parent_call_sid=validated_data.call_sid,
                 conference_sid=validated_data.conference_sid,
                 from_=camp_obj.get("dialing_number"),
-                to=camp_obj.get("conversation_data")[0]["contact_number"],
+                to=campaign_conversation["contact_number"],
                 campaign_id=campaign_id,
-                conversation_id=ShortId(camp_obj.get("conversation_data")[0]["id_"]).uuid(),
+                conversation_id=ShortId(campaign_conversation["id_"]).uuid(),
                 conference_friendly_name=conference_friendly_name,
                 remarks="",
                 total_participants=ConferencParticipantEnum.DEFAULT_TOTAL_PARTICIPANTS,
@@ -239,7 +318,6 @@ async def handle_conference_event(
             billing_response = await process_billing_transaction(
                 campaign_call_params,
                 cache,
-                queue,
                 twilio_client,
                 charge_call_back_time=CHARGE_START_CALL_TIME,
                 charge_for_first_minute=True
@@ -251,7 +329,7 @@ async def handle_conference_event(
                 not billing_response.is_sufficient_credit
                 or not billing_response.is_call_inprogress
             ):
-                twilio_client = build_twilio_subaccount_client(
+                twilio_client = await build_twilio_subaccount_client(
                     cache=cache, twilio_client=twilio_client, campaign_id=campaign_id
                 )
                 await twilio_client.conference_resource.terminate_by_id(
@@ -293,6 +371,22 @@ async def handle_conference_event(
     elif (
         validated_data.status_callback_event == abstracts.ConferenceEvent.conference_end
     ):
+        # start of the inter call gap, see call_handlers.place_agent_dial
+        await CampaignStateStore(cache).update(
+            ShortId.with_uuid(campaign_id),
+            {"last_call_ended_at": _event_time(validated_data)},
+        )
+        agent_conversation = None
+        parallel = ParallelDial(cache)
+        conference = ShortId.with_uuid(conference_friendly_name)
+        if await parallel.is_parallel(conference):
+            # the contacts that did not talk to the agent were settled by
+            # their own leg callbacks
+            winner = await parallel.winner(conference)
+            if not winner:
+                return
+            agent_conversation = conversation
+            conversation = ShortId(winner).uuid()
         await request.app.state.queue.enqueue_job(
             "handle_campaign_conversation_end",
             [
@@ -301,12 +395,87 @@ async def handle_conference_event(
                 conference_friendly_name,
                 campaign_id,
                 is_reattempt,
+                agent_conversation,
             ],
             queue_name="arq:pd_queue",
             defer_by_seconds=1,
         )
 
 
+def pending_conversation(
+    contact: typing.Dict, campaign_id: UUID, camp_obj: typing.Dict
+) -> abstracts.AddCampaignConversation:
+    """Conversation of the campaign state about to be dialed"""
+    return abstracts.AddCampaignConversation(
+        id_=ShortId(contact.get("id_")).uuid(),
+        twi_sid=ShortId(contact.get("twi_sid")).uuid(),
+        campaign_id=campaign_id,
+        contact_number=contact.get("contact_number"),
+        sequence_number=contact.get("sequence_number"),
+        status=models.ConferenceStatus.pending.value,
+        contact_name=contact.get("contact_name"),
+        recording_url=contact.get("recording_url"),
+        recording_duration=contact.get("recording_duration"),
+        created_by=ShortId(camp_obj.get("assignee_id")).uuid(),  # type: ignore
+    )
+
+
+async def stage_next_dials(
+    campaign_id: UUID,
+    workspace: UUID,
+    from_sequence: int,
+    twilio_client: TwilioClient,
+    settings: Settings,
+    cache: Redis,
+):
+    """Prepares the agent dials of the conversations from from_sequence on,
+    so the dial that follows the live conference only posts to twilio
+    """
+    state_store = CampaignStateStore(cache)
+    campaign_sid = ShortId.with_uuid(campaign_id)
+    camp_obj = await state_store.get(campaign_sid)
+    if camp_obj.get("status") in ["paused", "ended"]:
+        return
+
+    stage = DialStage(cache)
+    dials = []
+    contact = await state_store.get_conversation_by_sequence(campaign_sid, from_sequence)
+    for sequence in range(from_sequence, from_sequence + settings.dial_lookahead):
+        if not contact:
+            break
+        next_contact = await state_store.get_conversation_by_sequence(
+            campaign_sid, sequence + 1
+        )
+        conversation_data = pending_conversation(contact, campaign_id, camp_obj)
+        if not await stage.has(campaign_id, conversation_data.id_):
+            dials.append(
+                await call_handlers.prepare_agent_dial(
+                    conversation_data=conversation_data,
+                    twilio_=twilio_client,
+                    member=ShortId(camp_obj.get("assignee_id")).uuid(),  # type: ignore
+                    workspace=workspace,
+                    dialing_number=camp_obj.get("dialing_number"),  # type: ignore
+                    campaign_id=campaign_id,
+                    call_script_id=None
+                    if not camp_obj.get("call_script_id")
+                    else ShortId(camp_obj.get("call_script_id")).uuid(),  # type: ignore
+                    dialing_number_id=ShortId(camp_obj.get("dialing_number_id")).uuid(),  # type: ignore
+                    cool_off_period_enabled=camp_obj.get("cooloff_period_enabled"),  # type: ignore
+                    cool_off_period=camp_obj.get("cool_off_period"),
+                    next_number_to_dial=None
+                    if not next_contact
+                    else next_contact.get("contact_number"),
+                    next_conversation_id=None
+                    if not next_contact
+                    else ShortId(next_contact.get("id_")).uuid(),
+                    is_reattempt=camp_obj.get("is_reattempt") == str(True),
+                    recording_enabled=camp_obj.get("recording_enabled", False),
+                )
+            )
+        contact = next_contact
+    await stage.put(campaign_id, dials)
+
+
 async def handle_participant_leave(
     validated_data: abstracts.ConferenceParticipantEvent,
     request: Request,
@@ -322,7 +491,7 @@ async def handle_participant_leave(
     # pdb.set_trace()
 
     queue = request.app.state.queue
-    participant_call_resource = cache.get(validated_data.call_sid)
+    participant_call_resource = await cache.get(validated_data.call_sid)
     if not participant_call_resource:
         raise Exception("Participant call not found in cache!")
     participant_call_resource = json.loads(participant_call_resource)  # type: ignore
@@ -336,7 +505,7 @@ async def handle_participant_leave(
     #     workspace_id=ShortId.with_uuid(workspace),
     # )
     sub_client_: TwilioClient = sub_client(
-        obj=copy.copy(request.app.state.twilio),
+        obj=request.app.state.twilio,
         details=details,
     )
     if participant_call_type != "agent":
@@ -349,17 +518,15 @@ async def handle_participant_leave(
             print(e)
             raise e
         return
-    conversations = camp_obj.get("conversation_data")
+    state_store = CampaignStateStore(cache)
+    campaign_sid = ShortId.with_uuid(campaign_id)
 
-    if not conversations:
+    if not await state_store.has_conversations(campaign_sid):
         raise Exception("Conversations not found in cache!")
 
-    campaign_conversation = (
-        item
-        for item in conversations
-        if item["twi_sid"] == ShortId.with_uuid(conversation_sid)
+    campaign_conversation = await state_store.get_conversation_by_twi_sid(
+        campaign_sid, ShortId.with_uuid(conversation_sid)
     )
-    campaign_conversation = next(campaign_conversation, None)
     if not campaign_conversation:
         raise Exception("Conversation not found!")
 
@@ -397,8 +564,7 @@ async def handle_participant_leave(
             print(e)
         # update campaign status in the cache to dialing_completed
         # print("Campaign Reached the end of dialing:: ->")
-        camp_obj.update({"status": "dialing_completed"})
-        cache.set(ShortId.with_uuid(campaign_id), json.dumps(camp_obj))
+        await state_store.update(campaign_sid, {"status": "dialing_completed"})
         await queue.enqueue_job(
             "end_campaign",
             data=[campaign_id],
@@ -409,22 +575,13 @@ async def handle_participant_leave(
         return
 
     # use the next number to dial to get the next_contact
-    dialing_contact = next(
-        (
-            item
-            for item in conversations
-            if item.get("contact_number") == next_number_to_dial
-        )
+    dialing_contact = await state_store.get_conversation_by_number(
+        campaign_sid, next_number_to_dial
     )
     if not dialing_contact:
         raise Exception("Current number to dial not found!")
-    next_contact = next(
-        (
-            item
-            for item in conversations
-            if item.get("sequence_number") == dialing_contact.get("sequence_number") + 1
-        ),
-        None,
+    next_contact = await state_store.get_conversation_by_sequence(
+        campaign_sid, dialing_contact.get("sequence_number") + 1
     )
     # get the provider details from the grpc adapter
     # mark the current conference as complete
@@ -441,18 +598,7 @@ async def handle_participant_leave(
 
     # Start the process for the next contact
 
-    conversation_data = abstracts.AddCampaignConversation(
-        id_=ShortId(dialing_contact.get("id_")).uuid(),
-        twi_sid=ShortId(dialing_contact.get("twi_sid")).uuid(),
-        campaign_id=campaign_id,
-        contact_number=dialing_contact.get("contact_number"),
-        sequence_number=dialing_contact.get("sequence_number"),
-        status=models.ConferenceStatus.pending.value,
-        contact_name=dialing_contact.get("contact_name"),
-        recording_url=dialing_contact.get("recording_url"),
-        recording_duration=dialing_contact.get("recording_duration"),
-        created_by=ShortId(camp_obj.get("assignee_id")).uuid(),  # type: ignore
-    )
+    conversation_data = pending_conversation(dialing_contact, campaign_id, camp_obj)
 
     queue_data: abstracts.QueueData = dict(
         workspace=workspace,
@@ -474,12 +620,52 @@ async def handle_participant_leave(
         is_reattempt=is_reattempt,
         recording_enabled=camp_obj.get("recording_enabled", False),
     )  # type: ignore
-    await queue.enqueue_job(
-        "add_agent_to_conversation",
+    # skipCampaignCooldown marks the ended call or the contact to dial next
+    skip_cooldown = await state_store.skips_cooldown(
+        campaign_sid,
+        [
+            id_
+            for id_ in (campaign_conversation.get("id_"), dialing_contact.get("id_"))
+            if id_
+        ],
+    )
+    await DialTimer(cache).schedule(
+        campaign_id,
         [conversation_data, queue_data],
-        defer_by_seconds=8,
-        queue_name="arq:pd_queue",
+        delay=next_dial_delay(camp_obj, skip_cooldown, request.app.state.settings),
+    )
+
+
+def next_dial_delay(
+    camp_obj: typing.Dict, skip_cooldown: bool, settings: Settings
+) -> float:
+    """Seconds to wait before dialing the contact, the campaign cool off
+    when enabled, none when the cool down is skipped
+    """
+    if skip_cooldown:
+        return 0
+    if camp_obj.get("cooloff_period_enabled") and camp_obj.get("cool_off_period"):
+        return float(camp_obj["cool_off_period"])
+    return settings.next_dial_delay_seconds
+
+
+async def skip_conversation_cooldown(
+    conversation_sid: UUID,
+    campaign_id: UUID,
+    db_conn: DbConnection,
+    cache: Redis,
+) -> bool:
+    """Marks the conversation to skip its cool down and dials the pending
+    call of the campaign right away. During the call no dial is pending yet,
+    False is returned and the flag in the campaign state makes the dial
+    after the call skip the cool off.
+    """
+    async with unit_of_work.CampaignConversationSqlUnitOfWork(db_conn) as uow:
+        await uow.repository.skip_cooldown(id=conversation_sid)
+    await CampaignStateStore(cache).skip_cooldown(
+        ShortId.with_uuid(campaign_id), ShortId.with_uuid(conversation_sid)
     )
+    return await DialTimer(cache).fire_now(campaign_id)
 
 
 async def handle_participant_join(
@@ -499,24 +685,19 @@ async def handle_participant_join(
     #     db_conn=request.app.state.db,
     # )
     db_conn = request.app.state.db
-    queue = JobQueue(redis_settings=request.app.state.settings.redis_settings)
-    await queue.connect()
+    queue: JobQueue = request.app.state.queue
     if camp_obj.get("status") in ["paused", "ended"]:
         print("CAMPAIGN IS EITHER ENDED OR PAUSED")
         return
 
-    conversations = camp_obj.get("conversation_data")
-    if not conversations:
+    state_store = CampaignStateStore(cache)
+    campaign_sid = ShortId.with_uuid(campaign_id)
+    if not await state_store.has_conversations(campaign_sid):
         raise Exception("Campaign doesn't have any data in memory!")
 
-    next_to_dial = camp_obj.get("next_to_dial")
-    campaign_conversation = (
-        item
-        for item in conversations
-        if item["twi_sid"] == ShortId.with_uuid(conversation_sid)
+    campaign_conversation = await state_store.get_conversation_by_twi_sid(
+        campaign_sid, ShortId.with_uuid(conversation_sid)
     )
-
-    campaign_conversation = next(campaign_conversation, None)
     if not campaign_conversation:
         raise Exception("Invalid campaign_conversation ID!")
 
@@ -524,13 +705,15 @@ async def handle_participant_join(
     #     conversation_sid, request.app.state.db
     # )
     campaign_sequence_number = camp_obj.get("current_call_seq", 0)
+    # parallel dialing moves next_number_to_dial past every contact it rings
+    parallel_dialing = camp_obj.get("lines_per_agent", 1) > 1
 
     current_contact = campaign_conversation.get("contact_number")
 
     # Create Twilio Sub client for the workspace
     details = camp_obj.get("cpass_user")
     sub_client_: TwilioClient = sub_client(
-        obj=copy.copy(request.app.state.twilio),
+        obj=request.app.state.twilio,
         details=details,
     )
 
@@ -543,20 +726,17 @@ async def handle_participant_join(
         )
         raise Exception("Current contact not found. Doing nothing!")
 
-    next_to_dial = (
-        item
-        for item in conversations
-        if item["sequence_number"] == campaign_conversation.get("sequence_number") + 1
+    next_to_dial = await state_store.get_conversation_by_sequence(
+        campaign_sid, campaign_conversation.get("sequence_number") + 1
     )
-    next_to_dial = next(next_to_dial, None)
-    if next_to_dial:
-        camp_obj.update(
+    if next_to_dial and not parallel_dialing:
+        await state_store.update(
+            campaign_sid,
             {
                 "next_number_to_dial": next_to_dial.get("contact_number"),
                 "current_call_seq": campaign_sequence_number + 1,
-            }
+            },
         )
-        cache.set(ShortId.with_uuid(campaign_id), json.dumps(camp_obj))
 
         await queue.enqueue_job(
             "update_next_number_to_dial",
@@ -567,7 +747,7 @@ async def handle_participant_join(
             queue_name="arq:pd_queue",
         )
 
-    participant_call_resource = cache.get(validated_data.call_sid)
+    participant_call_resource = await cache.get(validated_data.call_sid)
 
     if not participant_call_resource:
         await sub_client_.conference_resource.terminate_by_name(
@@ -589,6 +769,20 @@ async def handle_participant_join(
         # this call will send callback events to
         # event_handlers_client handler endpoint
         # which will handle the events
+        if parallel_dialing:
+            await dial_parallel_contacts(
+                validated_data=validated_data,
+                request=request,
+                workspace=workspace,
+                campaign_id=campaign_id,
+                conversation_sid=conversation_sid,
+                conversation_id=conversation_id,
+                campaign_conversation=campaign_conversation,
+                camp_obj=camp_obj,
+                cache=cache,
+                sub_client_=sub_client_,
+            )
+            return
         # client_callback_data = f"{}"
         client_callback_data = f"{ShortId.with_uuid(workspace)},{ShortId.with_uuid(campaign_id)},{ShortId.with_uuid(conversation_sid)},{participant_call_resource.get('conversation_id')}"
 
@@ -632,7 +826,7 @@ async def handle_participant_join(
                 "client": customer_call.get("call_sid"),
                 "client_status": "initiated",
             }
-            cache.set(campaign_conversation.get("id_"), json.dumps(conversation_obj))
+            await cache.set(campaign_conversation.get("id_"), json.dumps(conversation_obj))
             data = abstracts.AddParticipantCallMsg(
                 id_=ShortId.with_uuid(uuid4()),
                 twi_sid=customer_call.get("call_sid"),
@@ -645,27 +839,300 @@ async def handle_participant_join(
                 conversation_id=campaign_conversation.get("id_"),
             )
             # TODO : Fire a queue to save this to database
-            cache.set(data.twi_sid, json.dumps(dict(data)))
+            await cache.set(data.twi_sid, json.dumps(dict(data)))
             await queue.enqueue_job(
                 "add_participant_call",
                 data=[data],  # type: ignore
                 queue_name="arq:pd_queue",
             )
+            await queue.enqueue_job(
+                "stage_next_dials",
+                data=[
+                    campaign_id,
+                    workspace,
+                    campaign_conversation.get("sequence_number") + 1,
+                ],  # type: ignore
+                queue_name="arq:pd_queue",
+            )
     return
 
 
+async def dial_parallel_contacts(
+    validated_data: abstracts.ConferenceParticipantEvent,
+    request: Request,
+    workspace: UUID,
+    campaign_id: UUID,
+    conversation_sid: UUID,
+    conversation_id: UUID,
+    campaign_conversation: typing.Dict,
+    camp_obj: typing.Dict,
+    cache: Redis,
+    sub_client_: TwilioClient,
+):
+    """Rings the contact of the agent conference and the contacts after it
+    at once, the first leg answered by a human is bridged to the agent
+    """
+    db_conn = request.app.state.db
+    queue: JobQueue = request.app.state.queue
+    state_store = CampaignStateStore(cache)
+    parallel = ParallelDial(cache)
+    campaign_sid = ShortId.with_uuid(campaign_id)
+    conference = ShortId.with_uuid(conversation_sid)
+    sequence_number = campaign_conversation.get("sequence_number")
+
+    lines = await parallel.lines(campaign_id, camp_obj.get("lines_per_agent", 1))
+    contacts = [campaign_conversation]
+    for offset in range(1, lines):
+        contact = await state_store.get_conversation_by_sequence(
+            campaign_sid, sequence_number + offset
+        )
+        if not contact:
+            break
+        contacts.append(contact)
+
+    # the agent leaving the conference dials the contact after the rung ones
+    next_to_dial = await state_store.get_conversation_by_sequence(
+        campaign_sid, sequence_number + len(contacts)
+    )
+    await state_store.update(
+        campaign_sid,
+        {
+            "next_number_to_dial": None
+            if not next_to_dial
+            else next_to_dial.get("contact_number"),
+            "current_call_seq": camp_obj.get("current_call_seq", 0) + len(contacts),
+        },
+    )
+    if next_to_dial:
+        await queue.enqueue_job(
+            "update_next_number_to_dial",
+            data=[
+                campaign_id,
+                next_to_dial.get("contact_number"),
+            ],  # type: ignore
+            queue_name="arq:pd_queue",
+        )
+
+    workspace_sid = ShortId.with_uuid(workspace)
+    calls = await asyncio.gather(
+        *[
+            sub_client_.conference_resource.create_parallel_call(
+                number=contact.get("contact_number"),
+                from_=camp_obj.get("dialing_number"),  # type: ignore
+                callback_data=url_safe_encode(
+                    f"{workspace_sid},{campaign_sid},{conference},{contact.get('id_')}"
+                ),
+            )
+            for contact in contacts
+        ]
+    )
+
+    legs: typing.Dict[str, str] = {}
+    reason_message = None
+    for contact, call in zip(contacts, calls):
+        if not call.get("call_sid"):
+            reason_code = call.get("reason_code")
+            reason_message = handle_call_failed(int(reason_code or 0))
+            await update_campaign_conversation_status_with_reason(
+                status=models.TwilioCallStatus.failed,  # type: ignore
+                conversation_id=ShortId(contact.get("id_")).uuid(),
+                db_conn=db_conn,
+                reason_code=reason_code,  # type: ignore
+                reason_message=reason_message,  # type: ignore
+            )
+            await queue.enqueue_job(
+                "update_campaign_calls",
+                data=[campaign_id, False],  # type: ignore
+                queue_name="arq:pd_queue",
+            )
+            continue
+
+        legs[call["call_sid"]] = contact.get("id_")
+        data = abstracts.AddParticipantCallMsg(
+            id_=ShortId.with_uuid(uuid4()),
+            twi_sid=call.get("call_sid"),
+            status=models.TwilioCallStatus.queued.value,
+            created_by=camp_obj.get("assignee_id"),
+            participant_type=models.CallLegType.customer.value,
+            recording_url=None,
+            recording_duration=None,
+            call_duration=None,
+            conversation_id=contact.get("id_"),
+        )
+        await cache.set(data.twi_sid, json.dumps(dict(data)))
+        await queue.enqueue_job(
+            "add_participant_call",
+            data=[data],  # type: ignore
+            queue_name="arq:pd_queue",
+        )
+
+    if not legs:
+        await send_event_to_client(
+            call_sid=validated_data.call_sid,
+            campaign_id=campaign_id,  # type: ignore
+            conversation_id=conversation_id,  # type: ignore
+            cache=cache,
+            db_conn=db_conn,
+            twilio_client=request.app.state.twilio,
+            message=reason_message,  # type: ignore
+        )
+        await sub_client_.conference_resource.terminate_by_name(conference)
+        return
+
+    await parallel.start(conference, validated_data.call_sid, legs)
+    await parallel.record(campaign_id, dialed=len(legs))
+    await queue.enqueue_job(
+        "stage_next_dials",
+        data=[campaign_id, workspace, sequence_number + len(contacts)],  # type: ignore
+        queue_name="arq:pd_queue",
+    )
+
+
+async def answer_parallel_leg(
+    call_sid: str,
+    answered_by: typing.Optional[str],
+    campaign_id: UUID,
+    conference: str,
+    conversation: str,
+    twilio_client: TwilioClient,
+    queue: JobQueue,
+    cache: Redis,
+) -> str:
+    """Twiml for an answered parallel dialing leg, the first human joins
+    the agent conference and every other leg is hung up
+    """
+    parallel = ParallelDial(cache)
+    hangup = twiml_templates.HANGUP
+
+    if answered_by not in HUMAN_ANSWERED_BY:
+        await parallel.drop(conference, call_sid, models.ConferenceStatus.no_answer.value)
+        return hangup
+
+    # the agent may have left while the contacts were ringing
+    state = await ConferenceRegistry(cache).get(conference)
+    agent_waiting = state is None or state.status != CONFERENCE_COMPLETED
+    if not agent_waiting or not await parallel.claim(conference, conversation):
+        # abandoned, left as no answer so reattempts call the contact again
+        await parallel.drop(conference, call_sid, models.ConferenceStatus.no_answer.value)
+        await parallel.record(campaign_id, answered=1, abandoned=1)
+        return hangup
+
+    await parallel.record(campaign_id, answered=1)
+    await cache.set(
+        conversation,
+        json.dumps({"client": call_sid, "client_status": "in-progress"}),
+    )
+    await queue.enqueue_job(
+        "handle_parallel_answer",
+        data=[campaign_id, conference, conversation, call_sid],  # type: ignore
+        queue_name="arq:pd_queue",
+    )
+    return await twilio_client.conference_resource.join_campaign_conference(
+        conference  # type: ignore
+    )
+
+
+async def handle_parallel_answer(
+    campaign_id: UUID,
+    conference: str,
+    conversation: str,
+    call_sid: str,
+    twilio_client: TwilioClient,
+    cache: Redis,
+):
+    """Tells the agent which contact answered and hangs up the other legs"""
+    parallel = ParallelDial(cache)
+    sub_client_ = await build_twilio_subaccount_client(
+        cache=cache, twilio_client=twilio_client, campaign_id=campaign_id
+    )
+    agent_call = await parallel.agent_call(conference)
+    if agent_call:
+        await sub_client_.call_resource.send_event_to_call(
+            call_sid=agent_call,
+            msg={
+                "conversationSid": conversation,
+                "status": "callConnected",
+            },
+        )
+    legs = await parallel.legs(conference)
+    results = await sub_client_.call_resource.hangup_multiple_calls(
+        [leg for leg in legs if leg != call_sid]
+    )
+    for leg, result in results.items():
+        if not result["success"]:
+            print(f"parallel leg {leg} hangup failed: {result}")
+
+
+async def handle_parallel_leg_status(
+    validated_data: TwilioPSTNCallback,
+    call_status: str,
+    campaign_id: UUID,
+    conference: str,
+    conversation: str,
+    request: Request,
+    cache: Redis,
+):
+    """Final status of a parallel dialing leg, the agent conference is ended
+    once every leg ended without a human answering so the agent moves on
+    """
+    queue: JobQueue = request.app.state.queue
+    parallel = ParallelDial(cache)
+    winner = await parallel.winner(conference)
+
+    if conversation == winner:
+        conversation_status = models.ConferenceStatus.completed
+    else:
+        conversation_status = await parallel.dropped_status(
+            conference, validated_data.call_sid
+        ) or {
+            "busy": models.ConferenceStatus.busy,
+            "failed": models.ConferenceStatus.failed,
+        }.get(call_status, models.ConferenceStatus.no_answer)
+
+    await buffer_participant_event(
+        validated_data=validated_data,
+        cache=cache,
+        conversation_id=ShortId(conversation).uuid(),
+        conversation_status=conversation_status,  # type: ignore
+    )
+    await queue.enqueue_job(
+        "expire_cache",
+        data=[validated_data.call_sid],
+        queue_name="arq:pd_queue",
+        defer_by_seconds=500,
+    )
+    if conversation != winner:
+        # the bridged leg is counted when its conference ends
+        await queue.enqueue_job(
+            "update_campaign_calls",
+            data=[campaign_id, False],  # type: ignore
+            queue_name="arq:pd_queue",
+        )
+
+    if await parallel.leg_ended(conference) <= 0 and winner is None:
+        sub_client_ = await build_twilio_subaccount_client(
+            cache=cache,
+            twilio_client=request.app.state.twilio,
+            campaign_id=campaign_id,
+        )
+        try:
+            await sub_client_.conference_resource.terminate_by_name(conference)
+        except Exception as e:
+            print(e)
+
+
 async def send_event_to_client(
     call_sid: str,
     campaign_id: str,
     conversation_id: str,
     message: str,
     twilio_client: TwilioClient,
-    cache,
+    cache: Redis,
     db_conn,
 ):
-    values = cache.get(ShortId.with_uuid(campaign_id)) or {}  # type: ignore
-    camp_obj = json.loads(values)  # type: ignore
-    subaccount_credentials = camp_obj.get("cpass_user")
+    subaccount_credentials = await CampaignStateStore(cache).get_field(
+        ShortId.with_uuid(campaign_id), "cpass_user"  # type: ignore
+    )
 
     participants = await views.get_conversation_participants(
         conversation=conversation_id, db_conn=db_conn  # type: ignore
@@ -695,7 +1162,7 @@ async def fetch_provider_workspace_client(
     # TODO: Move Sub client mechanism into the krispcall_twilio
 
     return sub_client(
-        obj=copy.copy(provider_client),
+        obj=provider_client,
         details={
             "string_id": details.auth_id,
             "auth_token": details.auth_token,
@@ -787,6 +1254,7 @@ async def control_campaign_loop(
     workspace: UUID,
     settings: Settings,
     queue: JobQueue,
+    cache: Redis,
 ):
     details = await get_provider_details(workspace_id=ShortId.with_uuid(workspace))
 
@@ -804,7 +1272,7 @@ async def control_campaign_loop(
         "api_secret": details.api_secret,
     }
     sub_client_ = sub_client(
-        obj=copy.copy(provider_client),
+        obj=provider_client,
         details=cpass_user,
     )
     # end campaign if no command is found
@@ -819,6 +1287,7 @@ async def control_campaign_loop(
         settings=settings,
         cpass_user=cpass_user,
         queue=queue,
+        cache=cache,
     )
 
 
@@ -845,6 +1314,59 @@ async def handle_participant_event(
         )
 
 
+async def buffer_participant_event(
+    validated_data: Union[TwilioAgentCallback, TwilioPSTNCallback],
+    cache: Redis,
+    conversation_id: typing.Optional[UUID] = None,
+    conversation_status: typing.Optional[models.ConferenceStatus] = None,
+):
+    """Write-behind version of handle_participant_event (and of
+    update_campaign_conversation_status when a conversation is given),
+    the worker flushes it with flush_call_status_updates
+    """
+    sequence_number = getattr(validated_data, "sequence_number", None)
+    await CallStatusBuffer(cache).push(
+        call_sid=validated_data.call_sid,
+        call_status=status_map.get(validated_data.call_status),
+        sequence_number=int(sequence_number) if sequence_number else None,
+        conversation_id=str(conversation_id) if conversation_id else None,
+        conversation_status=(
+            models.ConferenceStatus(conversation_status).value
+            if conversation_status
+            else None
+        ),
+    )
+
+
+async def flush_call_status_updates(
+    cache: Redis, db_conn: DbConnection, consumer: str
+) -> int:
+    """Writes buffered call status transitions, returns the number of
+    transitions consumed
+    """
+    buffer = CallStatusBuffer(cache)
+    await buffer.create_group()
+    flushed = 0
+    while True:
+        entries = await buffer.read_batch(consumer)
+        if not entries:
+            return flushed
+        call_statuses, conversation_statuses = latest_status_updates(entries)
+        try:
+            async with unit_of_work.CampaignConversationSqlUnitOfWork(
+                db_conn
+            ) as uow:
+                await uow.repository.bulk_update_status(conversation_statuses)
+            async with unit_of_work.ParticipantCallSqlUnitOfWork(db_conn) as uow:
+                await uow.repository.bulk_update_status_by_twi_sid(call_statuses)
+        except Exception as e:
+            # left pending, claimed again after STATUS_CLAIM_IDLE_MS
+            print(f"call status flush failed: {e}")
+            return flushed
+        await buffer.ack(entries)
+        flushed += len(entries)
+
+
 async def drop_campaign_voicemail(
     provider_client: TwilioClient,  # needs to be sub client
     conversation: UUID,
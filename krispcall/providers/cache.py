@@ -0,0 +1,135 @@
+"""
+In-process LRU + TTL cache for values fetched from the foundation service.
+
+Provider credentials and workspace features rarely change but were fetched
+over RPC on every resolver and worker call. Each cache keeps recent values in
+process and can optionally share them through redis so app and worker
+processes warm each other up. Hit/miss counters are kept per cache and
+exported on /metrics.
+"""
+from __future__ import annotations
+
+import time
+import typing
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+
+MISSING = object()
+
+_REGISTRY: typing.Dict[str, "TTLCache"] = {}
+_shared_redis: typing.Optional[Redis] = None
+
+
+class TTLCache:
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: int,
+        dumps: typing.Callable[[typing.Any], typing.Union[bytes, str]],
+        loads: typing.Callable[[bytes], typing.Any],
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._dumps = dumps
+        self._loads = loads
+        self._items: "OrderedDict[str, typing.Tuple[float, typing.Any]]" = (
+            OrderedDict()
+        )
+        self.redis: typing.Optional[Redis] = _shared_redis
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        _REGISTRY[name] = self
+
+    def _redis_key(self, key: str) -> str:
+        return f"provider_cache:{self.name}:{key}"
+
+    def _get_local(self, key: str) -> typing.Any:
+        item = self._items.get(key)
+        if item is None:
+            return MISSING
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return MISSING
+        self._items.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: typing.Any) -> None:
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    async def get(self, key: str) -> typing.Any:
+        """Returns the cached value or MISSING"""
+        value = self._get_local(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self._redis_key(key))
+            except Exception as e:
+                print(f"provider cache {self.name} redis get failed: {e}")
+                raw = None
+            if raw is not None:
+                value = self._loads(raw)
+                self._set_local(key, value)
+                self.redis_hits += 1
+                return value
+        self.misses += 1
+        return MISSING
+
+    async def set(self, key: str, value: typing.Any) -> None:
+        self._set_local(key, value)
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    self._redis_key(key), self._dumps(value), ex=self.ttl
+                )
+            except Exception as e:
+                print(f"provider cache {self.name} redis set failed: {e}")
+
+    async def invalidate(self, key: str) -> None:
+        self._items.pop(key, None)
+        if self.redis is not None:
+            await self.redis.delete(self._redis_key(key))
+
+    async def invalidate_where(
+        self, predicate: typing.Callable[[typing.Any], bool]
+    ) -> int:
+        """Invalidates the values held in process that match, returns how
+        many were dropped
+        """
+        keys = [key for key, (_, value) in self._items.items() if predicate(value)]
+        for key in keys:
+            await self.invalidate(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drops the in-process values only"""
+        self._items.clear()
+
+    def stats(self) -> typing.Dict[str, int]:
+        return {
+            "size": len(self._items),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+        }
+
+
+def use_redis(cache: typing.Optional[Redis]) -> None:
+    """Shares every provider cache, current and later created, through redis"""
+    global _shared_redis
+    _shared_redis = cache
+    for ttl_cache in _REGISTRY.values():
+        ttl_cache.redis = cache
+
+
+def cache_stats() -> typing.Dict[str, typing.Dict[str, int]]:
+    return {name: ttl_cache.stats() for name, ttl_cache in _REGISTRY.items()}
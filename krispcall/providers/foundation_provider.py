@@ -1,28 +1,67 @@
+import json
 import os
 import grpc
 from google.protobuf.json_format import MessageToDict
 
 from krispcall.common.utils.shortid import ShortId
+from krispcall.providers.cache import MISSING, TTLCache
 from krispcall.providers.grpc import descriptors, stubs
+from krispcall.providers.grpc.channels import RPC_TIMEOUT_SECONDS, get_channel
 from krispcall.providers.rpcaddress import get_foundation_rpc_address
 
+WORKSPACE_FEATURE_CACHE_TTL = 60
+WORKSPACE_FEATURE_CACHE_SIZE = 4096
+
+workspace_feature_cache = TTLCache(
+    name="workspace_feature",
+    maxsize=WORKSPACE_FEATURE_CACHE_SIZE,
+    ttl=WORKSPACE_FEATURE_CACHE_TTL,
+    dumps=json.dumps,
+    loads=json.loads,
+)
+
+
+def _feature_key(workspace_id: ShortId, feature_name: str) -> str:
+    return f"{workspace_id}:{feature_name}"
+
 
 async def get_workspace_feature(workspace_id: ShortId, feature_name: str):
-    address = get_foundation_rpc_address()
-    with grpc.insecure_channel(address) as channel:
-        stub = stubs.foundation.FoundationRPCStub(channel)
-        try:
-            workspace_feature = stub.GetWorkspaceFeature(
-                descriptors.foundation.GetWorkspaceFeatureRequest(
-                    workspace_id=workspace_id, feature_name=feature_name
-                )
-            )
-            return MessageToDict(
-                workspace_feature,
-                preserving_proto_field_name=True,
-                including_default_value_fields=True,
-            )
-        except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.NOT_FOUND:  # type: ignore
-                return None
-            raise e
+    """Returns the workspace feature, None if the workspace doesn't have it.
+    Missing features are cached as well, callers that refuse on a missing or
+    disabled feature should invalidate_workspace_feature and check again.
+    """
+    key = _feature_key(workspace_id, feature_name)
+    feature = await workspace_feature_cache.get(key)
+    if feature is MISSING:
+        feature = await fetch_workspace_feature(workspace_id, feature_name)
+        await workspace_feature_cache.set(key, feature)
+    return feature
+
+
+async def invalidate_workspace_feature(
+    workspace_id: ShortId, feature_name: str
+) -> None:
+    """Call when a feature of the workspace is toggled"""
+    await workspace_feature_cache.invalidate(_feature_key(workspace_id, feature_name))
+
+
+async def fetch_workspace_feature(workspace_id: ShortId, feature_name: str):
+    stub = stubs.foundation.FoundationRPCStub(
+        get_channel(get_foundation_rpc_address())
+    )
+    try:
+        workspace_feature = await stub.GetWorkspaceFeature(
+            descriptors.foundation.GetWorkspaceFeatureRequest(
+                workspace_id=workspace_id, feature_name=feature_name
+            ),
+            timeout=RPC_TIMEOUT_SECONDS,
+        )
+        return MessageToDict(
+            workspace_feature,
+            preserving_proto_field_name=True,
+            including_default_value_fields=True,
+        )
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.NOT_FOUND:  # type: ignore
+            return None
+        raise e
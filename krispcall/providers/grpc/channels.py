@@ -0,0 +1,61 @@
+"""
+Process wide pool of grpc.aio channels, one per target address.
+
+Channels are created lazily inside the running event loop and kept open for
+the lifetime of the process, so every RPC reuses an established HTTP/2
+connection instead of dialing the service again.
+"""
+from __future__ import annotations
+
+import time
+import typing
+
+import grpc
+
+from krispcall.common.metrics import GRPC_REQUEST_SECONDS
+
+# deadline applied to every foundation/billing RPC
+RPC_TIMEOUT_SECONDS: float = 5
+
+_CHANNELS: typing.Dict[str, grpc.aio.Channel] = {}
+
+
+class MetricsInterceptor(grpc.aio.UnaryUnaryClientInterceptor):
+    """Times every unary RPC by method and status code"""
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        method = client_call_details.method
+        rpc = method.decode() if isinstance(method, bytes) else method
+        started = time.perf_counter()
+        call = await continuation(client_call_details, request)
+        try:
+            await call
+        finally:
+            code = await call.code()
+            GRPC_REQUEST_SECONDS.labels(rpc=rpc, code=code.name).observe(
+                time.perf_counter() - started
+            )
+        return call
+
+
+def get_channel(address: str) -> grpc.aio.Channel:
+    channel = _CHANNELS.get(address)
+    if channel is None:
+        channel = grpc.aio.insecure_channel(
+            address,
+            options=[
+                ("grpc.keepalive_time_ms", 30000),
+                ("grpc.keepalive_timeout_ms", 10000),
+                ("grpc.keepalive_permit_without_calls", 1),
+            ],
+            interceptors=[MetricsInterceptor()],
+        )
+        _CHANNELS[address] = channel
+    return channel
+
+
+async def close_channels() -> None:
+    channels = list(_CHANNELS.values())
+    _CHANNELS.clear()
+    for channel in channels:
+        await channel.close()
@@ -1,9 +1,9 @@
-from .twilio_requests import TwilioRequestResource
+from .twilio_requests import TwilioHttpSession, TwilioRequestResource
 from twilio.base.exceptions import TwilioRestException
 from krispcall.common.utils.shortid import ShortId
 from pydantic.types import SecretStr
 from pydantic import AnyHttpUrl
-from typing import Union
+from typing import Optional, Union
 
 
 class ApplicationResource:
@@ -13,13 +13,14 @@ class ApplicationResource:
         auth_token: Union[SecretStr, SecretStr],
         base_url: AnyHttpUrl,
         app_url: AnyHttpUrl,
+        session: Optional[TwilioHttpSession] = None,
     ):
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.base_url = base_url
         self.app_url = app_url
         self.client: TwilioRequestResource = TwilioRequestResource(
-            account_sid=account_sid, auth_token=auth_token
+            account_sid=account_sid, auth_token=auth_token, session=session
         )
 
     async def create(self, friendly_name: str, workspace_sid: ShortId) -> str:
@@ -1,14 +1,16 @@
 from loguru import logger
 import json
-from pydantic import parse_obj_as, AnyHttpUrl
+from pydantic import AnyHttpUrl
 from krispcall.common.utils.shortid import ShortId
 from twilio.jwt.access_token import AccessToken
 from twilio.twiml.voice_response import VoiceResponse, Dial
 from twilio.jwt.access_token.grants import VoiceGrant
 from typing import Dict, List
-from .twilio_requests import TwilioRequestResource
+from .twilio_requests import TwilioRequestResource, fan_out
 from twilio.base.exceptions import TwilioRestException
 from .conference_resource import ConferenceResource
+from . import twiml_templates
+from .twiml_templates import http_url
 from uuid import UUID
 import asyncio
 
@@ -29,6 +31,7 @@ class CallResource:
         android_push_key,
         ring_url,
         hold_url,
+        session=None,
     ):
         self.account_sid = account_sid
         self.auth_token = auth_token
@@ -42,6 +45,7 @@ class CallResource:
         self.client = TwilioRequestResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
+            session=session,
         )
         self.conference = ConferenceResource(
             account_sid=self.account_sid,
@@ -50,9 +54,10 @@ class CallResource:
             app_url=self.app_url,
             ring_url=ring_url,
             hold_url=hold_url,
+            session=session,
         )
-        self.campaign_agent_callback: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl, f"{self.app_url}/sales_callbacks/campaigns/agent"
+        self.campaign_agent_callback: AnyHttpUrl = http_url(
+            f"{self.app_url}/sales_callbacks/campaigns/agent"
         )
 
     async def generate_access_tokens(
@@ -459,25 +464,15 @@ class CallResource:
             f"{self.account_sid}/Calls/{callee_sid}.json"
         )
 
-        response = VoiceResponse()
-        dial = Dial(
-            method="POST",
+        twiml = twiml_templates.dial_client(
+            identity=identity,
             action=(
                 f"{self.app_url}/twilio_callbacks/terminations/incoming/"
                 f"{workspace_sid}/{channel_sid}"
             ),
-            ring_tone="none",
+            params=params,
         )
-        client = dial.client(
-            identity=identity,
-        )
-        if params is not {}:
-            [
-                client.parameter(name=k, value=v or "None") # type: ignore
-                for (k, v) in params.items()
-            ]
-        response = response.append(dial)
-        payload = {"Twiml": str(response)}
+        payload = {"Twiml": twiml}
 
         call_hold_off = await self.client.post(url=url, payload=payload)
         return [call_hold_off, hangup]
@@ -490,11 +485,11 @@ class CallResource:
         payload = {"Status": "completed"}
         return await self.client.post(url=url, payload=payload)
 
-    async def hangup_multiple_calls(self, call_sids: List[str]):
-        tasks = [
-            asyncio.gather(self.hangup_call(call_sid))
-            for call_sid in call_sids
-        ]
+    async def hangup_multiple_calls(self, call_sids: List[str]) -> Dict[str, Dict]:
+        """Hangs up the calls concurrently, returns the result of every call sid"""
+        return await fan_out(
+            {call_sid: self.hangup_call(call_sid) for call_sid in call_sids}
+        )
 
     async def hangup_active_child_call(self, call_sid):
         child_calls = await self.get_call_details_from_parent_call_sid(
@@ -520,9 +515,7 @@ class CallResource:
             f"https://api.twilio.com/2010-04-01/Accounts/"
             f"{self.account_sid}/Calls/{call_sid}.json"
         )
-        response = VoiceResponse()
-        response.play(url=voicemail_url)
-        payload = {"Twiml": str(response)}
+        payload = {"Twiml": twiml_templates.play(voicemail_url)}
         return await self.client.post(url=url, payload=payload)
 
     async def play_music(self, call_sid):
@@ -530,13 +523,5 @@ class CallResource:
             f"https://api.twilio.com/2010-04-01/Accounts/"
             f"{self.account_sid}/Calls/{call_sid}.json"
         )
-        response = VoiceResponse()
-        response.play(
-            url=(
-                "http://com.twilio.sounds.music.s3.amazonaws.com"
-                "/MARKOVICHAMP-Borghestral.mp3"
-            ),
-            loop=0,
-        )
-        payload = {"Twiml": str(response)}
+        payload = {"Twiml": twiml_templates.HOLD_MUSIC}
         return await self.client.post(url=url, payload=payload)
@@ -5,13 +5,13 @@ from typing import Dict, Any
 
 
 class CallerIdResource:
-    def __init__(self, account_sid, auth_token, base_url, app_url):
+    def __init__(self, account_sid, auth_token, base_url, app_url, session=None):
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.base_url = base_url
         self.app_url = app_url
         self.client = TwilioRequestResource(
-            account_sid=account_sid, auth_token=auth_token
+            account_sid=account_sid, auth_token=auth_token, session=session
         )
 
     async def create(
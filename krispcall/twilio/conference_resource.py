@@ -1,9 +1,11 @@
 import asyncio
 import logging
-from typing import Any, Dict, List
-from pydantic import AnyHttpUrl, parse_obj_as
+from typing import Any, Dict, List, Optional
+from pydantic import AnyHttpUrl
 
-from krispcall.twilio.twilio_requests import TwilioRequestResource
+from krispcall.twilio import twiml_templates
+from krispcall.twilio.twiml_templates import http_url
+from krispcall.twilio.twilio_requests import TwilioRequestResource, fan_out
 from krispcall.twilio.type import (
     AddClientsToConference,
     Client,
@@ -13,7 +15,6 @@ from krispcall.twilio.type import (
     OutboundParticipantPayload,
     CampaignOutboundParticipantPayload,
 )
-from twilio.twiml.voice_response import VoiceResponse, Dial
 from krispcall.common.utils.shortid import ShortId
 from krispcall.twilio.type import AddNumberToConference
 
@@ -22,56 +23,51 @@ logger = logging.getLogger("twilio")
 
 class ConferenceResource:
     def __init__(
-        self, account_sid, auth_token, base_url, app_url, ring_url, hold_url
+        self,
+        account_sid,
+        auth_token,
+        base_url,
+        app_url,
+        ring_url,
+        hold_url,
+        session=None,
     ):
         self.account_sid: str = account_sid
         self.auth_token: str = auth_token
         self.base_url: AnyHttpUrl = base_url
         self.app_url: AnyHttpUrl = app_url
         self.client: TwilioRequestResource = TwilioRequestResource(
-            account_sid=self.account_sid, auth_token=self.auth_token
+            account_sid=self.account_sid,
+            auth_token=self.auth_token,
+            session=session,
         )
-        self._participant_callback: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl, f"{app_url}/twilio_callbacks/events"
+        self._participant_callback: AnyHttpUrl = http_url(
+            f"{app_url}/twilio_callbacks/events"
         )
-        self._conference_url: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl,
+        self._conference_url: AnyHttpUrl = http_url(
             f"{base_url}/Accounts/{account_sid}/Conferences",
         )
-        self._transfer_callback: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl, f"{app_url}/twilio_callbacks/transfer"
-        )
-        self._hold_url: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl,
-            hold_url,
-        )
-        self.ring_url: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl,
-            ring_url,
+        self._transfer_callback: AnyHttpUrl = http_url(
+            f"{app_url}/twilio_callbacks/transfer"
         )
-        self.conf_callback: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl, f"{self.app_url}/twilio_callbacks/conference"
+        self._hold_url: AnyHttpUrl = http_url(hold_url)
+        self.ring_url: AnyHttpUrl = http_url(ring_url)
+        self.conf_callback: AnyHttpUrl = http_url(
+            f"{self.app_url}/twilio_callbacks/conference"
         )
-        self.campaign_callback: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl, f"{self.app_url}/sales_callbacks/campaigns"
+        self.campaign_callback: AnyHttpUrl = http_url(
+            f"{self.app_url}/sales_callbacks/campaigns"
         )
-        self.missed_callback: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl, f"{self.app_url}/twilio_callbacks/missed"
+        self.missed_callback: AnyHttpUrl = http_url(
+            f"{self.app_url}/twilio_callbacks/missed"
         )
-        self.campaign_number_callback: AnyHttpUrl = parse_obj_as(
-            AnyHttpUrl, f"{self.app_url}/sales_callbacks/campaigns/client"
+        self.campaign_number_callback: AnyHttpUrl = http_url(
+            f"{self.app_url}/sales_callbacks/campaigns/client"
         )
 
     async def connect_to_conference(self, friendly_name: str):
         """Returns TWIML to connect to existing conference"""
-        response = VoiceResponse()
-        dial = Dial()
-        dial.conference(
-            name=friendly_name,
-            start_conference_on_enter=True,
-        )
-        response.append(dial)
-        return response
+        return twiml_templates.connect_conference(friendly_name)
 
     async def new_conference(
         self,
@@ -87,53 +83,33 @@ class ConferenceResource:
         """
         Returns TWIML for new simple conference.
         """
-        response = VoiceResponse()
         callback = (
             f"{self.missed_callback}/"
             f"{workspace}/"
             f"{channel}/"
             f"{friendly_name}"
         )
-        dial = Dial(timeout=40)
-
-        if direction == "incoming":
-            dial = Dial(timeout=40, action=callback, method="POST")
-
-        dial.conference(
+        return twiml_templates.new_conference(
             name=friendly_name,
-            wait_url=wait_url or self.ring_url,
-            wait_method="GET",
-            start_conference_on_enter=True,
-            record="record-from-start" if auto_record else None,
-            trim="trim-silence" if auto_record else None,
-            muted=live,
-            end_conference_on_exit=end_on_exit,
-            status_callback_event="start end join leave",
             status_callback=f"{self.conf_callback}/{direction}/{workspace}/{friendly_name}",
+            wait_url=wait_url or self.ring_url,
+            end_on_exit=end_on_exit,
+            live=live,
+            auto_record=auto_record,
+            action=callback if direction == "incoming" else None,
         )
 
-        response.append(dial)
-        return response
-
     async def campaign_conference(
         self, conference_id: ShortId, callback_data: str, auto_record: bool
     ):
-        response = VoiceResponse()
         callback = f"{self.campaign_callback}/{callback_data}"
-        dial = Dial(timeout=40)
-        dial.conference(
+        return twiml_templates.campaign_conference(
             name=conference_id,
-            wait_url=self.ring_url,
-            wait_method="GET",
-            start_conference_on_enter=True,
-            record="record-from-start" if auto_record else None,
-            recording_status_callback=f"{self.campaign_callback}/record/{callback_data}",
-            # end_conference_on_exit=True,
-            status_callback_event="start end join leave",
             status_callback=callback,
+            recording_status_callback=f"{self.campaign_callback}/record/{callback_data}",
+            wait_url=self.ring_url,
+            auto_record=auto_record,
         )
-        response.append(dial)
-        return response
 
     async def add_agent(
         self,
@@ -234,6 +210,33 @@ class ConferenceResource:
             "status": response.get("status"),
         }
 
+    async def create_parallel_call(
+        self, number: str, from_: str, callback_data: str
+    ):
+        """Rings a contact of a parallel dialing campaign, twilio fetches the
+        answer twiml once the call is answered and machine detection is done
+        """
+        payload = {
+            "To": number,
+            "From": from_,
+            "Url": f"{self.campaign_callback}/parallel/answer/{callback_data}",
+            "StatusCallback": f"{self.campaign_callback}/parallel/status/{callback_data}",
+            "StatusCallbackMethod": "POST",
+            "MachineDetection": "Enable",
+        }
+        call_url = f"{self.base_url}/Accounts/{self.account_sid}/Calls.json"
+        response = await self.client.post(url=call_url, payload=payload)
+        return {
+            "participant": number,
+            "call_sid": response.get("sid"),
+            "status": response.get("status"),
+            "reason_code": response.get("code"),
+        }
+
+    async def join_campaign_conference(self, conference_id: ShortId):
+        """Twiml bridging an answered parallel dialing leg to the agent"""
+        return twiml_templates.join_campaign_conference(conference_id)
+
     async def add_campaign_external_number(
         self,
         conference_sid: str,
@@ -433,8 +436,8 @@ class ConferenceResource:
         response = await self.client.get(url=url)
         return response
 
-    async def fetch_all_active(self):
-        url = f"{self._conference_url}.json?Status=in-progress"
+    async def fetch_all_active(self, page_size: int = 50):
+        url = f"{self._conference_url}.json?Status=in-progress&PageSize={page_size}"
         response = await self.client.get(url=url)
         return response
 
@@ -541,6 +544,21 @@ class ConferenceResource:
         response = await self.terminate_by_id(sid)
         return response
 
+    async def terminate_conferences(
+        self, conferences: Dict[str, Optional[str]]
+    ) -> Dict[str, Dict]:
+        """Ends the conferences (friendly name -> sid) concurrently, the ones
+        with a known sid skip the friendly name lookup
+        """
+        return await fan_out(
+            {
+                name: self.terminate_by_id(sid)
+                if sid
+                else self.terminate_by_name(name)
+                for name, sid in conferences.items()
+            }
+        )
+
     async def active_participants_by_name(self, conference_name: str):
         """Get participants with active status"""
         url = f"{self._conference_url}/{conference_name}/Participants.json?Status=in-progress"
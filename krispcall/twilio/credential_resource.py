@@ -13,6 +13,7 @@ class CredentialsResource:
         ios_app_env,
         twilio_edge=None,
         twilio_region=None,
+        session=None,
     ):
         self.account_sid = account_sid
         self.auth_token = auth_token
@@ -22,7 +23,7 @@ class CredentialsResource:
             else "https://conversations.twilio.com/v1/Credentials"
         )
         self.client = TwilioRequestResource(
-            account_sid=account_sid, auth_token=auth_token
+            account_sid=account_sid, auth_token=auth_token, session=session
         )
         self.fcm_key = fcm_api_key
         self.ios_cert = ios_cert
@@ -1,4 +1,3 @@
-import copy
 import json
 from typing import Any
 from uuid import UUID
@@ -19,7 +18,7 @@ class TwilioEventHandler:
         message: str,
     ):
         _client: TwilioClient = sub_client(
-            obj=copy.copy(twilio_client),
+            obj=twilio_client,
             details=subaccount_credentials,
         )
         agent_call = [
@@ -1,9 +1,9 @@
-from .twilio_requests import TwilioRequestResource
+from .twilio_requests import TwilioHttpSession, TwilioRequestResource
 from twilio.base.exceptions import TwilioRestException
 from krispcall.common.utils.shortid import ShortId
 from pydantic.types import SecretStr
 from pydantic import AnyHttpUrl, parse_obj_as
-from typing import Union
+from typing import Optional, Union
 import json
 
 
@@ -14,6 +14,7 @@ class EventStreamsResource:
         auth_token: Union[SecretStr, SecretStr],
         base_url: AnyHttpUrl,
         app_url: AnyHttpUrl,
+        session: Optional[TwilioHttpSession] = None,
     ):
         self.account_sid = account_sid
         self.auth_token = auth_token
@@ -23,7 +24,7 @@ class EventStreamsResource:
             AnyHttpUrl, "https://events.twilio.com/v1/Sinks/"
         )
         self.client: TwilioRequestResource = TwilioRequestResource(
-            account_sid=account_sid, auth_token=auth_token
+            account_sid=account_sid, auth_token=auth_token, session=session
         )
 
     """"sink_configuration": {
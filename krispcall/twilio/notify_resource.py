@@ -15,6 +15,7 @@ class NotifyResource:
         app_url,
         twilio_edge=None,
         twilio_region=None,
+        session=None,
     ):
         self.account_sid = account_sid
         self.auth_token = auth_token
@@ -25,7 +26,7 @@ class NotifyResource:
             else "https://notify.twilio.com/v1/Services"
         )
         self.client = TwilioRequestResource(
-            account_sid=account_sid, auth_token=auth_token
+            account_sid=account_sid, auth_token=auth_token, session=session
         )
 
     async def create(self, friendly_name: str):
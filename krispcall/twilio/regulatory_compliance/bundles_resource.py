@@ -10,11 +10,11 @@ NUMBERS_URL = "https://numbers.twilio.com/v2"
 
 
 class BundlesResource:
-    def __init__(self, account_sid, auth_token):
+    def __init__(self, account_sid, auth_token, session=None):
         self.base_url = f"{NUMBERS_URL}/RegulatoryCompliance/Bundles"
         self.auth_token = auth_token
         self.account_sid = account_sid
-        self.request = TwilioRequestResource(account_sid, auth_token)
+        self.request = TwilioRequestResource(account_sid, auth_token, session=session)
 
     async def create(self, bundle):
         """create a new Bundle that will contain all the information required
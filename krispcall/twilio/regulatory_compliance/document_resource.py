@@ -12,13 +12,13 @@ NUMBERS_URL = "https://numbers.twilio.com/v2"
 
 
 class DocumentResource:
-    def __init__(self, account_sid, auth_token):
+    def __init__(self, account_sid, auth_token, session=None):
         self.base_url = (
             f"{NUMBERS_URL}/RegulatoryCompliance/SupportingDocuments"
         )
         self.auth_token = auth_token
         self.account_sid = account_sid
-        self.request = TwilioRequestResource(account_sid, auth_token)
+        self.request = TwilioRequestResource(account_sid, auth_token, session=session)
 
     async def create(self, document):
         """
@@ -8,11 +8,11 @@ NUMBERS_URL = "https://numbers.twilio.com/v2"
 
 
 class EndUserResource:
-    def __init__(self, account_sid, auth_token):
+    def __init__(self, account_sid, auth_token, session=None):
         self.base_url = f"{NUMBERS_URL}/RegulatoryCompliance/EndUsers"
         self.auth_token = auth_token
         self.account_sid = account_sid
-        self.request = TwilioRequestResource(account_sid, auth_token)
+        self.request = TwilioRequestResource(account_sid, auth_token, session=session)
 
     async def create(self, end_user):
         """create a new End-User of a phone number
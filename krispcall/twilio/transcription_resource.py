@@ -1,6 +1,6 @@
-from typing import Union
+from typing import Optional, Union
 from pydantic import SecretStr, AnyHttpUrl
-from .twilio_requests import TwilioRequestResource
+from .twilio_requests import TwilioHttpSession, TwilioRequestResource
 from twilio.base.exceptions import TwilioRestException
 
 
@@ -10,13 +10,14 @@ class TranscriptionResource:
         account_sid: Union[SecretStr, SecretStr],
         auth_token: Union[SecretStr, SecretStr],
         app_url: AnyHttpUrl,
+        session: Optional[TwilioHttpSession] = None,
     ):
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.base_url = "https://api.twilio.com/2010-04-01/Accounts/"
         self.app_url = app_url
         self.request_client: TwilioRequestResource = TwilioRequestResource(
-            account_sid=account_sid, auth_token=auth_token
+            account_sid=account_sid, auth_token=auth_token, session=session
         )
 
     async def get_transcription(self, transcription_sid: str):
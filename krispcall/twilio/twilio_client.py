@@ -1,7 +1,14 @@
 """
 Wrapper around the Twilio Client for the methods we need.
+
+Resources are built once per client. Sub account clients come from the
+SubaccountClients registry of the main client, keyed by account sid, and
+share its http session.
 """
 
+import typing
+from collections import OrderedDict
+from functools import cached_property
 from typing import Union
 from krispcall.twilio.caller_id_resource import CallerIdResource
 from krispcall.twilio.notify_resource import NotifyResource
@@ -13,6 +20,7 @@ from krispcall.twilio.conference_resource import ConferenceResource
 from .type import (
     TwilioSettings,
 )
+from .twilio_requests import TwilioHttpSession
 from .transcription_resource import TranscriptionResource
 from .credential_resource import CredentialsResource
 from .call_resource import CallResource
@@ -52,10 +60,59 @@ class TwilioClient:
         self.twilio_region = settings.twilio_region
         self.ring_url = settings.ring_url
         self.hold_url = settings.hold_url
+        # shared by every resource and by the sub account copies of the client
+        self.session = TwilioHttpSession(
+            limit=settings.twilio_http_pool_size,
+            limit_per_host=settings.twilio_http_pool_size_per_host,
+            timeout=settings.twilio_http_timeout,
+            max_retries=settings.twilio_http_max_retries,
+            account_concurrency=settings.twilio_http_concurrency_per_account,
+        )
+        self.subaccounts = SubaccountClients(
+            self, maxsize=settings.twilio_subaccount_clients
+        )
+        self._frozen = False
 
+    def __setattr__(self, name, value):
+        # resources are memoized with the credentials they were built with
+        if getattr(self, "_frozen", False):
+            raise Exception(f"TwilioClient of {self.account_sid} is read only")
+        super().__setattr__(name, value)
 
+    async def close(self) -> None:
+        await self.session.close()
 
-    @property
+    def subaccount_client(self, details: typing.Dict) -> "TwilioClient":
+        """Client of the sub account in details, built once per account sid"""
+        return self.subaccounts.get(details)
+
+    def _with_credentials(self, details: typing.Dict) -> "TwilioClient":
+        client = object.__new__(TwilioClient)
+        # cached resources of this client are left out
+        client.__dict__.update(
+            {
+                name: value
+                for name, value in self.__dict__.items()
+                if not isinstance(
+                    getattr(TwilioClient, name, None), cached_property
+                )
+            }
+        )
+        client.account_sid = details["string_id"]
+        client.auth_token = details["auth_token"]
+        client.api_key = details["api_key"]
+        client.api_secret = details["api_secret"]
+        for name in (
+            "outgoing_application_sid",
+            "android_push_key",
+            "ios_push_key",
+        ):
+            if name in details:
+                setattr(client, name, details[name])
+        client._frozen = True
+        return client
+
+    @cached_property
     def call_resource(self) -> CallResource:
         return CallResource(
             account_sid=self.account_sid,
@@ -69,28 +126,30 @@ class TwilioClient:
             android_push_key=self.android_push_key,
             ring_url=self.ring_url,
             hold_url=self.hold_url,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def application_resource(self) -> ApplicationResource:
         return ApplicationResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
             base_url=self.base_url,
             app_url=self.app_uri,
+            session=self.session,
         )
 
-
-    @property
+    @cached_property
     def recordings_resource(self) -> RecordingsResource:
         return RecordingsResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
             base_url=self.base_url,
             app_url=self.app_uri,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def credential_resource(self) -> CredentialsResource:
         return CredentialsResource(
             account_sid=self.account_sid,
@@ -99,40 +158,44 @@ class TwilioClient:
             ios_cert=self.ios_cert,
             ios_key=self.ios_key,
             ios_app_env=self.ios_app_env,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def bundles_resource(self) -> BundlesResource:
         return BundlesResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def end_user_resource(self) -> EndUserResource:
         return EndUserResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def document_resource(self) -> DocumentResource:
         return DocumentResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def caller_id_resource(self) -> CallerIdResource:
         return CallerIdResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
             base_url=self.base_url,
             app_url=self.app_uri,
+            session=self.session,
         )
 
-
-    @property
+    @cached_property
     def notify_resource(self) -> NotifyResource:
         return NotifyResource(
             account_sid=self.account_sid,
@@ -140,18 +203,20 @@ class TwilioClient:
             app_url=self.app_uri,
             twilio_edge=self.twilio_edge,
             twilio_region=self.twilio_region,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def use_limits_resource(self) -> UseLimitsResource:
         return UseLimitsResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
             base_url=self.base_url,
             app_url=self.app_uri,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def conference_resource(self):
         return ConferenceResource(
             account_sid=self.account_sid,
@@ -160,21 +225,67 @@ class TwilioClient:
             base_url=self.base_url,
             ring_url=self.ring_url,
             hold_url=self.hold_url,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def transcription_resource(self):
         return TranscriptionResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
             app_url=self.app_uri,
+            session=self.session,
         )
 
-    @property
+    @cached_property
     def event_streams_resource(self):
         return EventStreamsResource(
             account_sid=self.account_sid,
             auth_token=self.auth_token,
             base_url=self.base_url,
             app_url=self.app_uri,
+            session=self.session,
         )
+
+
+class SubaccountClients:
+    """LRU registry of sub account clients keyed by account sid"""
+
+    # credentials a cached client must match to be reused
+    CREDENTIAL_KEYS = (
+        "auth_token",
+        "api_key",
+        "api_secret",
+        "outgoing_application_sid",
+        "android_push_key",
+        "ios_push_key",
+    )
+
+    def __init__(self, client: TwilioClient, maxsize: int = 256):
+        self.client = client
+        self.maxsize = maxsize
+        self._clients: "OrderedDict[str, typing.Tuple[tuple, TwilioClient]]" = (
+            OrderedDict()
+        )
+
+    def _credentials(self, details: typing.Dict) -> tuple:
+        return tuple(details.get(key) for key in self.CREDENTIAL_KEYS)
+
+    def get(self, details: typing.Dict) -> TwilioClient:
+        account_sid = details["string_id"]
+        credentials = self._credentials(details)
+        cached = self._clients.get(account_sid)
+        if cached is not None and cached[0] == credentials:
+            self._clients.move_to_end(account_sid)
+            return cached[1]
+
+        # new account or rotated credentials
+        client = self.client._with_credentials(details)
+        self._clients[account_sid] = (credentials, client)
+        self._clients.move_to_end(account_sid)
+        while len(self._clients) > self.maxsize:
+            self._clients.popitem(last=False)
+        return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
@@ -1,56 +1,193 @@
 from aiohttp import BasicAuth
 import aiohttp
-from typing import Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 import asyncio
-import os
+import time
+
+from krispcall.common.metrics import TWILIO_REQUEST_SECONDS, twilio_resource
+
+# twilio rejects these before doing any work, safe to retry for every method
+RETRY_ALWAYS_STATUSES = {429}
+# only retried for idempotent methods, a retried POST could place a second call
+RETRY_IDEMPOTENT_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "DELETE"}
+# longest wait between attempts, whatever Retry-After asks for
+MAX_RETRY_DELAY_SECONDS = 5.0
+# twilio no longer accepts the credentials of the account
+AUTH_ERROR_STATUSES = {401, 403}
+
+_auth_error_listeners: List[Callable[[str], Awaitable[None]]] = []
+
+
+def on_auth_error(listener: Callable[[str], Awaitable[None]]):
+    """Registers a coroutine called with the account sid of every request
+    twilio rejected with AUTH_ERROR_STATUSES, so cached credentials of the
+    account can be dropped
+    """
+    _auth_error_listeners.append(listener)
+    return listener
+
+
+async def _notify_auth_error(account_sid: str) -> None:
+    for listener in _auth_error_listeners:
+        try:
+            await listener(account_sid)
+        except Exception as e:
+            print(f"twilio auth error listener failed: {e}")
+
+
+class TwilioHttpSession:
+    """Long lived aiohttp session shared by all the twilio resources of a process
+
+    Keeps connections alive between requests so twilio REST calls don't pay
+    DNS, TCP and TLS setup every time. Credentials are passed per request,
+    so one session serves every sub account. Requests in flight are capped
+    per account so a bulk fan-out stays under twilio's concurrency limit.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 50,
+        keepalive_timeout: float = 30,
+        timeout: float = 10,
+        max_retries: int = 3,
+        retry_backoff: float = 0.25,
+        account_concurrency: int = 25,
+        max_retry_delay: float = MAX_RETRY_DELAY_SECONDS,
+    ):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._max_retry_delay = max_retry_delay
+        self._account_concurrency = account_concurrency
+        self._account_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    ssl=False,
+                    limit=self._limit,
+                    limit_per_host=self._limit_per_host,
+                    keepalive_timeout=self._keepalive_timeout,
+                ),
+                timeout=self._timeout,
+            )
+        return self._session
+
+    def account_limit(self, account_sid: str) -> asyncio.Semaphore:
+        limit = self._account_limits.get(account_sid)
+        if limit is None:
+            limit = asyncio.Semaphore(self._account_concurrency)
+            self._account_limits[account_sid] = limit
+        return limit
+
+    def _retry_delay(self, resp: aiohttp.ClientResponse, attempt: int) -> float:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = self._retry_backoff * (2**attempt)
+        return min(delay, self._max_retry_delay)
+
+    def _should_retry(self, method: str, status: int, attempt: int) -> bool:
+        if attempt >= self._max_retries:
+            return False
+        if status in RETRY_ALWAYS_STATUSES:
+            return True
+        return status in RETRY_IDEMPOTENT_STATUSES and method in IDEMPOTENT_METHODS
+
+    async def request(
+        self, method: str, url, auth: BasicAuth, data=None
+    ) -> Any:
+        attempt = 0
+        limit = self.account_limit(auth.login)
+        resource = twilio_resource(url)
+        while True:
+            async with limit:
+                started = time.perf_counter()
+                async with self.session.request(
+                    method, str(url), data=data, auth=auth
+                ) as resp:
+                    retry = self._should_retry(method, resp.status, attempt)
+                    if not retry:
+                        body = await resp.json()
+                    TWILIO_REQUEST_SECONDS.labels(
+                        method=method, resource=resource, status=resp.status
+                    ).observe(time.perf_counter() - started)
+                    if not retry:
+                        if resp.status in AUTH_ERROR_STATUSES:
+                            await _notify_auth_error(auth.login)
+                        return body
+                    delay = self._retry_delay(resp, attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+async def fan_out(requests: Dict[str, Awaitable]) -> Dict[str, Dict]:
+    """Runs the requests concurrently, returns the result of every key.
+
+    a twilio response with a sid counts as success, error responses and
+    exceptions are reported per key instead of failing the whole batch.
+    """
+    keys = list(requests)
+    responses = await asyncio.gather(*requests.values(), return_exceptions=True)
+    results = {}
+    for key, response in zip(keys, responses):
+        if isinstance(response, Exception):
+            results[key] = {"success": False, "message": str(response)}
+        elif isinstance(response, dict) and "sid" in response:
+            results[key] = {
+                "success": True,
+                "sid": response.get("sid"),
+                "status": response.get("status"),
+            }
+        else:
+            response = response if isinstance(response, dict) else {}
+            results[key] = {
+                "success": False,
+                "code": response.get("code"),
+                "message": response.get("message"),
+            }
+    return results
+
+
+# used by resources created outside of a TwilioClient
+default_session = TwilioHttpSession()
 
 
 class TwilioRequestResource:
-    def __init__(self, account_sid, auth_token):
+    def __init__(
+        self,
+        account_sid,
+        auth_token,
+        session: Optional[TwilioHttpSession] = None,
+    ):
         self._account_sid = account_sid
         self._auth_token = auth_token
-        self.use_ssl = (
-            False  # bool(os.getenv("KRISPCALL_APP_ENV") != "development")
-        )
+        self._session = session or default_session
+
+    @property
+    def _auth(self) -> BasicAuth:
+        return BasicAuth(login=self._account_sid, password=self._auth_token)
 
     async def post(self, url, payload=None) -> Any:
-        try:
-            auth = BasicAuth(
-                login=self._account_sid, password=self._auth_token
-            )
-            async with aiohttp.ClientSession(auth=auth) as session:
-                async with session.post(
-                    url=url, data=payload, verify_ssl=self.use_ssl
-                ) as resp:
-                    response = await resp.json()
-                    return response
-        except Exception as E:
-            raise E
+        return await self._session.request("POST", url, self._auth, data=payload)
 
     async def get(self, url) -> Any:
-        async with aiohttp.ClientSession(
-            loop=asyncio.get_event_loop(),
-            connector=aiohttp.TCPConnector(ssl=False),
-            auth=aiohttp.BasicAuth(
-                login=self._account_sid, password=self._auth_token
-            ),
-        ) as session:
-            async with session.get(url) as resp:
-                response = await resp.json()
-                return response
+        return await self._session.request("GET", url, self._auth)
 
     async def delete(self, url) -> Any:
-        try:
-            async with aiohttp.ClientSession(
-                loop=asyncio.get_event_loop(),
-                auth=aiohttp.BasicAuth(
-                    login=self._account_sid, password=self._auth_token
-                ),
-            ) as session:
-                async with session.delete(
-                    url, verify_ssl=self.use_ssl
-                ) as resp:
-                    response = await resp.json()
-                    return response
-        except Exception as E:
-            raise E
+        return await self._session.request("DELETE", url, self._auth)
@@ -0,0 +1,182 @@
+"""
+Precompiled twiml for the documents rendered on every campaign call.
+
+VoiceResponse builds an ElementTree for each document and serializes it, the
+templates below are the serialized form of the same trees with the variable
+parts left as format fields. Output is byte for byte what twilio renders:
+attributes sorted by name, booleans as "true"/"false", attributes that are
+None left out, ElementTree escaping and " />" for empty elements.
+Conference names and media urls are never empty, twilio rejects them.
+
+    python scripts/benchmark_twiml_templates.py
+
+compares both renderings and asserts they are equal.
+"""
+from __future__ import annotations
+
+import functools
+import typing
+
+from pydantic import AnyHttpUrl, parse_obj_as
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+
+HOLD_MUSIC_URL = (
+    "http://com.twilio.sounds.music.s3.amazonaws.com/MARKOVICHAMP-Borghestral.mp3"
+)
+CONFERENCE_EVENTS = "start end join leave"
+
+CAMPAIGN_CONFERENCE = (
+    XML_DECLARATION + '<Response><Dial timeout="40">'
+    "<Conference {record}"
+    'recordingStatusCallback="{recording_status_callback}" '
+    'startConferenceOnEnter="true" '
+    'statusCallback="{status_callback}" '
+    f'statusCallbackEvent="{CONFERENCE_EVENTS}" '
+    'waitMethod="GET" waitUrl="{wait_url}">{name}</Conference>'
+    "</Dial></Response>"
+)
+
+NEW_CONFERENCE = (
+    XML_DECLARATION + "<Response><Dial {action}timeout=\"40\">"
+    "<Conference {end_conference_on_exit}{muted}{record}"
+    'startConferenceOnEnter="true" '
+    'statusCallback="{status_callback}" '
+    f'statusCallbackEvent="{CONFERENCE_EVENTS}" '
+    '{trim}waitMethod="GET" waitUrl="{wait_url}">{name}</Conference>'
+    "</Dial></Response>"
+)
+
+CONNECT_CONFERENCE = (
+    XML_DECLARATION + "<Response><Dial>"
+    '<Conference startConferenceOnEnter="true">{name}</Conference>'
+    "</Dial></Response>"
+)
+
+JOIN_CAMPAIGN_CONFERENCE = (
+    XML_DECLARATION + "<Response><Dial>"
+    '<Conference endConferenceOnExit="true" startConferenceOnEnter="true">'
+    "{name}</Conference></Dial></Response>"
+)
+
+PLAY = XML_DECLARATION + "<Response><Play>{url}</Play></Response>"
+
+HOLD_MUSIC = (
+    XML_DECLARATION + f'<Response><Play loop="0">{HOLD_MUSIC_URL}</Play></Response>'
+)
+
+HANGUP = XML_DECLARATION + "<Response><Hangup /></Response>"
+
+DIAL_CLIENT = (
+    XML_DECLARATION + '<Response><Dial action="{action}" method="POST" '
+    'ringTone="none"><Client>{identity}{parameters}</Client></Dial></Response>'
+)
+
+PARAMETER = '<Parameter name="{name}" value="{value}" />'
+
+
+def escape_text(value: typing.Any) -> str:
+    text = str(value)
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attr(value: typing.Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    text = escape_text(value)
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+def optional_attr(name: str, value: typing.Any) -> str:
+    """name="value" followed by a space, empty for None"""
+    if value is None:
+        return ""
+    return f'{name}="{escape_attr(value)}" '
+
+
+@functools.lru_cache(maxsize=1024)
+def http_url(url: str) -> AnyHttpUrl:
+    """parse_obj_as(AnyHttpUrl, url), validated once per distinct url"""
+    return parse_obj_as(AnyHttpUrl, url)
+
+
+def campaign_conference(
+    name: str,
+    status_callback: str,
+    recording_status_callback: str,
+    wait_url: str,
+    auto_record: bool,
+) -> str:
+    return CAMPAIGN_CONFERENCE.format(
+        name=escape_text(name),
+        status_callback=escape_attr(status_callback),
+        recording_status_callback=escape_attr(recording_status_callback),
+        wait_url=escape_attr(wait_url),
+        record='record="record-from-start" ' if auto_record else "",
+    )
+
+
+def new_conference(
+    name: str,
+    status_callback: str,
+    wait_url: str,
+    end_on_exit: bool,
+    live: bool,
+    auto_record: bool,
+    action: typing.Optional[str] = None,
+) -> str:
+    return NEW_CONFERENCE.format(
+        name=escape_text(name),
+        status_callback=escape_attr(status_callback),
+        wait_url=escape_attr(wait_url),
+        action=""
+        if action is None
+        else f'action="{escape_attr(action)}" method="POST" ',
+        end_conference_on_exit=optional_attr("endConferenceOnExit", end_on_exit),
+        muted=optional_attr("muted", live),
+        record='record="record-from-start" ' if auto_record else "",
+        trim='trim="trim-silence" ' if auto_record else "",
+    )
+
+
+def connect_conference(name: str) -> str:
+    return CONNECT_CONFERENCE.format(name=escape_text(name))
+
+
+def join_campaign_conference(name: str) -> str:
+    return JOIN_CAMPAIGN_CONFERENCE.format(name=escape_text(name))
+
+
+def play(url: str) -> str:
+    return PLAY.format(url=escape_text(url))
+
+
+def dial_client(
+    identity: str, action: str, params: typing.Optional[typing.Dict] = None
+) -> str:
+    """Dials a browser/mobile client passing params as custom parameters,
+    empty values are sent as "None"
+    """
+    parameters = "".join(
+        PARAMETER.format(name=escape_attr(name), value=escape_attr(value or "None"))
+        for name, value in (params or {}).items()
+    )
+    return DIAL_CLIENT.format(
+        identity=escape_text(identity),
+        action=escape_attr(action),
+        parameters=parameters,
+    )
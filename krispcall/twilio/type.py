@@ -44,6 +44,12 @@ class TwilioSettings(BaseSettings):
     twilio_region: str
     ring_url: AnyHttpUrl
     hold_url: AnyHttpUrl
+    twilio_http_pool_size: int = 100
+    twilio_http_pool_size_per_host: int = 50
+    twilio_http_timeout: float = 10
+    twilio_http_max_retries: int = 3
+    twilio_http_concurrency_per_account: int = 25
+    twilio_subaccount_clients: int = 256
 
 
 class NumberAvailabilityPathParams(BaseModel):
@@ -5,13 +5,13 @@ from .twilio_requests import TwilioRequestResource
 class UseLimitsResource:
     """Default usage limit triggers provided by twilio"""
 
-    def __init__(self, account_sid, auth_token, base_url, app_url):
+    def __init__(self, account_sid, auth_token, base_url, app_url, session=None):
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.base_url = base_url
         self.app_url = app_url
         self.client = TwilioRequestResource(
-            account_sid=account_sid, auth_token=auth_token
+            account_sid=account_sid, auth_token=auth_token, session=session
         )
 
     async def create_sms_limit(self, friendly_name, frequency, trigger_value=10):
@@ -1,21 +1,37 @@
 from __future__ import annotations
-from starlette.routing import Mount
+from starlette.routing import Mount, Route
 from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
 
 from krispcall.common import bootstrap
 from krispcall.common.database.bootstrap import init_database, load_exception_handlers
 from krispcall.common.locales import init_translation
+from krispcall.common.metrics import ACTIVE_CONFERENCES, metrics_body
 from krispcall.common.configs.log_config import configure_logging
+from krispcall.providers import cache as provider_cache
+from krispcall.providers.grpc.channels import close_channels
 
 
 from salesapi import settings
 from salesapi.graphql_schema import graphql
 from salesapi.middlewares import load_middlewares
+from krispcall.konference.adapters.conference_registry import ConferenceRegistry
 from krispcall.konference.entrypoints.route_handlers.routes import (
     routes as konference_routes,
 )
 
+
+async def metrics(request: Request) -> Response:
+    ACTIVE_CONFERENCES.set(
+        await ConferenceRegistry(request.app.state.cache).active_count()
+    )
+    content, media_type = metrics_body()
+    return Response(content=content, media_type=media_type)
+
+
 ROUTES = [
+    Route("/metrics", metrics, methods=["GET"]),
     Mount(
         "/api/" + settings.API_BASE_VERSION,
         routes=[Mount("/graphql", graphql)],
@@ -35,6 +51,9 @@ def new_app(settings_) -> Starlette:
     translator = init_translation()
     twilio = bootstrap.init_twillo(settings_)
     queue = bootstrap.init_queue(settings_)
+    cache = bootstrap.init_cache(settings_)
+    if settings_.provider_cache_use_redis:
+        provider_cache.use_redis(cache)
     app = Starlette(
         debug=settings_.debug,
         routes=ROUTES,
@@ -46,6 +65,9 @@ def new_app(settings_) -> Starlette:
         ],
         on_shutdown=[
             db.disconnect,
+            cache.connection_pool.disconnect,
+            twilio.close,
+            close_channels,
         ],
     )
 
@@ -54,6 +76,7 @@ def new_app(settings_) -> Starlette:
     app.state.twilio = twilio
     app.state.translator = translator
     app.state.queue = queue
+    app.state.cache = cache
     return app
 
 
@@ -6,12 +6,19 @@ from starlette.middleware.sessions import SessionMiddleware
 from starlette.middleware.authentication import AuthenticationMiddleware
 
 from krispcall.common.configs.app_settings import WebSettings
+from krispcall.common.metrics import MetricsMiddleware
+from krispcall.common.database.instrumented import QueryCountMiddleware
 from krispcall.common.error_handler.error_handlers import on_authentication_error
 from krispcall.common.middlewares.middleware import JWTAuthenticationBackend, ResponseMiddleware
 
 
 def load_middlewares(settings: WebSettings) -> typing.List[Middleware]:
     return [
+        Middleware(MetricsMiddleware),
+        Middleware(
+            QueryCountMiddleware,
+            n_plus_one_threshold=settings.pg_n_plus_one_threshold,
+        ),
         Middleware(ResponseMiddleware),
         Middleware(
             CORSMiddleware,
@@ -1,10 +1,24 @@
+import asyncio
+
 from krispcall.common.database.bootstrap import init_database
+from krispcall.common.database.instrumented import (
+    end_query_scope,
+    start_query_scope,
+)
 from salesapi import settings as config
 from krispcall.common import bootstrap
+from krispcall.providers import cache as provider_cache
+from krispcall.providers.grpc.channels import close_channels
+from arq import cron
+from prometheus_client import start_http_server
 from arq.connections import RedisSettings
 from krispcall.konference.entrypoints import queue_handlers
 from krispcall.campaigns.entrypoints import queue_handlers as camp_queues
 from krispcall.konference.billing import billing_task_queue as billing_queues
+from krispcall.konference.billing.constant import (
+    BILLING_TICK_SECONDS,
+    CREDIT_RECONCILE_SECONDS,
+)
 
 
 async def test(ctx):
@@ -14,14 +28,46 @@ async def test(ctx):
 async def startup(ctx):
     settings = config.get_application_settings()
     ctx["settings"] = settings
+    if settings.worker_metrics_port:
+        start_http_server(settings.worker_metrics_port)
     ctx["db"] = init_database(ctx["settings"])
     ctx["twilio"] = bootstrap.init_twillo(ctx["settings"])
     ctx["queue"] = bootstrap.init_queue(ctx["settings"])
+    ctx["cache"] = bootstrap.init_cache(ctx["settings"])
+    if settings.provider_cache_use_redis:
+        provider_cache.use_redis(ctx["cache"])
     await ctx["db"].connect()
     await ctx["queue"].connect()
+    ctx["dial_timer"] = asyncio.create_task(queue_handlers.run_dial_timer(ctx))
+    if settings.webhook_stream_ingestion:
+        ctx["webhook_consumer"] = asyncio.create_task(
+            queue_handlers.run_webhook_consumer(ctx)
+        )
+
+
+async def on_job_start(ctx):
+    ctx["query_stats"] = start_query_scope(
+        f"job {ctx['job_id']}", ctx["settings"].pg_n_plus_one_threshold
+    )
+
+
+async def on_job_end(ctx):
+    end_query_scope(ctx["query_stats"])
+
 
 async def shutdown(ctx):
+    ctx["dial_timer"].cancel()
+    # dials already claimed are finished, the timer would claim them again
+    await asyncio.gather(
+        ctx["dial_timer"], *ctx.get("dial_tasks", ()), return_exceptions=True
+    )
+    if "webhook_consumer" in ctx:
+        ctx["webhook_consumer"].cancel()
+        await asyncio.gather(ctx["webhook_consumer"], return_exceptions=True)
     await ctx["db"].disconnect()
+    await ctx["cache"].connection_pool.disconnect()
+    await ctx["twilio"].close()
+    await close_channels()
 
 
 class PDWorker:
@@ -38,14 +84,43 @@ class PDWorker:
         queue_handlers.queue_conversation,
         queue_handlers.add_participant_call,
         queue_handlers.add_agent_to_conversation,
+        queue_handlers.stage_next_dials,
         queue_handlers.hold_conversation_by_id,
         billing_queues.task_campaign_call_charge,
         queue_handlers.expire_cache,
+        queue_handlers.handle_parallel_answer,
         test,
     ]
+    cron_jobs = [
+        # every second, keeps buffered call statuses close to real time
+        cron(
+            queue_handlers.flush_call_status,
+            second=set(range(60)),
+            unique=True,
+            run_at_startup=True,
+        ),
+        cron(
+            camp_queues.flush_campaign_stats,
+            second=set(range(0, 60, 5)),
+            unique=True,
+            run_at_startup=True,
+        ),
+        cron(
+            billing_queues.bill_active_calls,
+            second=set(range(0, 60, BILLING_TICK_SECONDS)),
+            unique=True,
+        ),
+        cron(
+            billing_queues.reconcile_credit_ledger,
+            second=set(range(0, 60, CREDIT_RECONCILE_SECONDS)),
+            unique=True,
+        ),
+    ]
     queue_name = "arq:pd_queue"
     on_startup = startup
     on_shutdown = shutdown
+    on_job_start = on_job_start
+    on_job_end = on_job_end
 
     redis_settings = RedisSettings.from_dsn(settings.redis_settings)
     # if os.environ.get("REDIS_HOST"):
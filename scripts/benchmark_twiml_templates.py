@@ -0,0 +1,192 @@
+"""
+Compares rendering the campaign twiml with VoiceResponse against the
+precompiled templates of krispcall/twilio/twiml_templates.py.
+
+Every document is rendered both ways first and the outputs are asserted to
+be byte for byte equal, then both renderings are timed.
+
+    python scripts/benchmark_twiml_templates.py --number 20000
+"""
+from __future__ import annotations
+
+import argparse
+import timeit
+
+from twilio.twiml.voice_response import Dial, VoiceResponse
+
+from krispcall.twilio import twiml_templates
+
+APP_URL = "https://api.example.com"
+RING_URL = "https://static.example.com/ring.mp3"
+CAMPAIGN_CALLBACK = f"{APP_URL}/sales_callbacks/campaigns"
+CONFERENCE = "Ab3dE5gH7jK9mN1pQ3sT5v"
+CALLBACK_DATA = "V1NfMSxDUF8yLENGXzMsQ1ZfNCww"
+PARAMS = {"isCampaignCall": True, "campaignId": "CP9xY8", "contact": "A & B <x>"}
+
+
+def campaign_conference_twilio(auto_record: bool) -> str:
+    response = VoiceResponse()
+    dial = Dial(timeout=40)
+    dial.conference(
+        name=CONFERENCE,
+        wait_url=RING_URL,
+        wait_method="GET",
+        start_conference_on_enter=True,
+        record="record-from-start" if auto_record else None,
+        recording_status_callback=f"{CAMPAIGN_CALLBACK}/record/{CALLBACK_DATA}",
+        status_callback_event="start end join leave",
+        status_callback=f"{CAMPAIGN_CALLBACK}/{CALLBACK_DATA}",
+    )
+    response.append(dial)
+    return str(response)
+
+
+def campaign_conference_template(auto_record: bool) -> str:
+    return twiml_templates.campaign_conference(
+        name=CONFERENCE,
+        status_callback=f"{CAMPAIGN_CALLBACK}/{CALLBACK_DATA}",
+        recording_status_callback=f"{CAMPAIGN_CALLBACK}/record/{CALLBACK_DATA}",
+        wait_url=RING_URL,
+        auto_record=auto_record,
+    )
+
+
+def new_conference_twilio(incoming: bool) -> str:
+    response = VoiceResponse()
+    dial = Dial(timeout=40)
+    if incoming:
+        dial = Dial(
+            timeout=40, action=f"{APP_URL}/twilio_callbacks/missed/x", method="POST"
+        )
+    dial.conference(
+        name=CONFERENCE,
+        wait_url=RING_URL,
+        wait_method="GET",
+        start_conference_on_enter=True,
+        record="record-from-start" if incoming else None,
+        trim="trim-silence" if incoming else None,
+        muted=False,
+        end_conference_on_exit=True,
+        status_callback_event="start end join leave",
+        status_callback=f"{APP_URL}/twilio_callbacks/conference/x",
+    )
+    response.append(dial)
+    return str(response)
+
+
+def new_conference_template(incoming: bool) -> str:
+    return twiml_templates.new_conference(
+        name=CONFERENCE,
+        status_callback=f"{APP_URL}/twilio_callbacks/conference/x",
+        wait_url=RING_URL,
+        end_on_exit=True,
+        live=False,
+        auto_record=incoming,
+        action=f"{APP_URL}/twilio_callbacks/missed/x" if incoming else None,
+    )
+
+
+def join_campaign_conference_twilio() -> str:
+    response = VoiceResponse()
+    dial = Dial()
+    dial.conference(
+        name=CONFERENCE, start_conference_on_enter=True, end_conference_on_exit=True
+    )
+    response.append(dial)
+    return str(response)
+
+
+def voicemail_twilio() -> str:
+    response = VoiceResponse()
+    response.play(url=f"{APP_URL}/voicemail.mp3?a=1&b=2")
+    return str(response)
+
+
+def hold_music_twilio() -> str:
+    response = VoiceResponse()
+    response.play(url=twiml_templates.HOLD_MUSIC_URL, loop=0)
+    return str(response)
+
+
+def hangup_twilio() -> str:
+    response = VoiceResponse()
+    response.hangup()
+    return str(response)
+
+
+def dial_client_twilio() -> str:
+    response = VoiceResponse()
+    dial = Dial(
+        method="POST",
+        action=f"{APP_URL}/twilio_callbacks/terminations/incoming/ws/ch",
+        ring_tone="none",
+    )
+    client = dial.client(identity="agent-1")
+    for name, value in PARAMS.items():
+        client.parameter(name=name, value=value or "None")
+    response.append(dial)
+    return str(response)
+
+
+def dial_client_template() -> str:
+    return twiml_templates.dial_client(
+        identity="agent-1",
+        action=f"{APP_URL}/twilio_callbacks/terminations/incoming/ws/ch",
+        params=PARAMS,
+    )
+
+
+# document -> (VoiceResponse rendering, template rendering)
+CASES = {
+    "campaign_conference": (
+        lambda: campaign_conference_twilio(False),
+        lambda: campaign_conference_template(False),
+    ),
+    "campaign_conference recorded": (
+        lambda: campaign_conference_twilio(True),
+        lambda: campaign_conference_template(True),
+    ),
+    "new_conference outgoing": (
+        lambda: new_conference_twilio(False),
+        lambda: new_conference_template(False),
+    ),
+    "new_conference incoming": (
+        lambda: new_conference_twilio(True),
+        lambda: new_conference_template(True),
+    ),
+    "join_campaign_conference": (
+        join_campaign_conference_twilio,
+        lambda: twiml_templates.join_campaign_conference(CONFERENCE),
+    ),
+    "drop_voicemail": (
+        voicemail_twilio,
+        lambda: twiml_templates.play(f"{APP_URL}/voicemail.mp3?a=1&b=2"),
+    ),
+    "hold music": (hold_music_twilio, lambda: twiml_templates.HOLD_MUSIC),
+    "hangup": (hangup_twilio, lambda: twiml_templates.HANGUP),
+    "unhold dial client": (dial_client_twilio, dial_client_template),
+}
+
+
+def main(number: int) -> None:
+    for name, (twilio_render, template_render) in CASES.items():
+        expected, rendered = twilio_render(), template_render()
+        assert rendered == expected, f"{name}:\n{expected}\n{rendered}"
+
+    print(f"{'document':<30}{'VoiceResponse':>16}{'template':>12}{'speedup':>10}")
+    for name, (twilio_render, template_render) in CASES.items():
+        twilio_time = timeit.timeit(twilio_render, number=number)
+        template_time = timeit.timeit(template_render, number=number)
+        print(
+            f"{name:<30}"
+            f"{twilio_time / number * 1e6:>13.1f}us"
+            f"{template_time / number * 1e6:>9.1f}us"
+            f"{twilio_time / template_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+    main(args.number)